@@ -0,0 +1,67 @@
+"""Periodic work on a daemon thread, started and stopped from the app lifespan."""
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Call ``fn`` every ``interval`` seconds, or sooner when ``trigger`` is called.
+
+    ``stop`` wakes the thread, waits for it to exit and then runs ``fn`` once
+    more so work queued since the last run is not lost. ``delay``, if given,
+    returns the wait before each run instead, e.g. to line runs up with a
+    clock boundary.
+    """
+
+    def __init__(
+        self, name: str, interval: float, fn: Callable[[], object],
+        delay: Optional[Callable[[], float]] = None
+    ):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.delay = delay
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Started background task {self.name} (every {self.interval}s)")
+
+    def trigger(self):
+        self._wake.set()
+
+    def stop(self, final_run: bool = True):
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+            logger.info(f"Stopped background task {self.name}")
+        if final_run:
+            self._run_once()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval if self.delay is None else self.delay())
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            self._run_once()
+
+    def _run_once(self):
+        try:
+            self.fn()
+        except Exception:
+            logger.exception(f"Background task {self.name} failed")
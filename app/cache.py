@@ -0,0 +1,142 @@
+"""Small in-process caches shared by the request path."""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+from app.metrics import Counter, Gauge
+
+_MISSING = object()
+_NAMED: dict[str, "TTLCache"] = {}
+
+LOOKUPS = Counter("cache_lookups_total", "Lookups in named in-process caches", ["cache", "result"])
+ENTRIES = Gauge(
+    "cache_entries", "Entries held by named in-process caches", ["cache"],
+    function=lambda: {(name,): len(cache) for name, cache in _NAMED.items()}
+)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a time to live.
+
+    Expired entries are dropped lazily when they are looked up or pushed out
+    by the LRU bound, so there is no background sweeper. A cache given a
+    ``name`` reports its hits, misses and size at ``/metrics``.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        if name is not None:
+            _NAMED[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        value = _MISSING
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, cached = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    value = cached
+                else:
+                    del self._data[key]
+        if self.name is not None:
+            LOOKUPS.inc(cache=self.name, result="miss" if value is _MISSING else "hit")
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one.
+
+    The first caller for a key runs ``fn``; callers arriving while it runs
+    wait and get its result (or its exception) instead of running it again.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """``SingleFlight`` for coroutines sharing one event loop."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is not None:
+            return await asyncio.shield(call)
+
+        call = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except Exception as e:
+            call.set_exception(e)
+            # Mark it retrieved: with no waiters it would be logged as unhandled.
+            call.exception()
+            raise
+        else:
+            call.set_result(value)
+            return value
+        finally:
+            del self._calls[key]
@@ -0,0 +1,109 @@
+"""Operational commands, run with ``python -m app.cli <command>``."""
+import argparse
+import logging
+from sqlmodel import Session
+from app.database import engine
+from app import counters, migrations, ranking, reaper, search, timeline
+
+logger = logging.getLogger(__name__)
+
+
+def reconcile_votes(args: argparse.Namespace):
+    with Session(engine) as session:
+        repaired = counters.reconcile_vote_counts(session, batch_size=args.batch_size)
+    logger.info(f"Vote count reconcile finished, {repaired} posts repaired")
+
+
+def reconcile_follows(args: argparse.Namespace):
+    with Session(engine) as session:
+        repaired = counters.reconcile_follow_counts(session, batch_size=args.batch_size)
+    logger.info(f"Follow count reconcile finished, {repaired} users repaired")
+
+
+def refresh_hot(args: argparse.Namespace):
+    with Session(engine) as session:
+        ranking.refresh_hot_scores(session, batch_size=args.batch_size)
+
+
+def trim_timelines(args: argparse.Namespace):
+    with Session(engine) as session:
+        timeline.trim_all(session, batch_size=args.batch_size)
+
+
+def rebuild_search(args: argparse.Namespace):
+    with Session(engine) as session:
+        search.install(session)
+    logger.info("Search index rebuilt")
+
+
+def reap(args: argparse.Namespace):
+    with Session(engine) as session:
+        removed = reaper.reap(session, batch_size=args.batch_size)
+    logger.info(f"Reaper finished, {removed} deleted posts/users removed")
+
+
+def migrate(args: argparse.Namespace):
+    if args.status:
+        with engine.connect() as connection:
+            version = migrations.current_version(connection)
+            waiting = migrations.pending(connection)
+        logger.info(f"Schema version {version}, head {migrations.HEAD}")
+        for migration in waiting:
+            logger.info(f"Pending: {migration.version} ({migration.name})")
+        return
+    applied = migrations.upgrade(engine, target=args.target)
+    logger.info(f"Applied migrations {applied}" if applied else "Schema already up to date")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = commands.add_parser(
+        "reconcile-votes", help="Recompute Post.vote_count from the votes table"
+    )
+    reconcile.add_argument("--batch-size", type=int, default=500)
+    reconcile.set_defaults(handler=reconcile_votes)
+
+    reconcile_follow = commands.add_parser(
+        "reconcile-follows", help="Recompute User.follower_count/following_count from the follows table"
+    )
+    reconcile_follow.add_argument("--batch-size", type=int, default=500)
+    reconcile_follow.set_defaults(handler=reconcile_follows)
+
+    hot = commands.add_parser("refresh-hot", help="Recompute Post.hot_score for posts in the hot window")
+    hot.add_argument("--batch-size", type=int, default=500)
+    hot.set_defaults(handler=refresh_hot)
+
+    trim = commands.add_parser(
+        "trim-timelines", help="Cap every home timeline at TIMELINE_MAX_ENTRIES rows"
+    )
+    trim.add_argument("--batch-size", type=int, default=500)
+    trim.set_defaults(handler=trim_timelines)
+
+    rebuild = commands.add_parser(
+        "rebuild-search", help="Create the full-text index on an existing database and reindex posts"
+    )
+    rebuild.set_defaults(handler=rebuild_search)
+
+    reap_parser = commands.add_parser(
+        "reap", help="Remove soft-deleted posts and users along with their votes, follows and timeline rows"
+    )
+    reap_parser.add_argument("--batch-size", type=int, default=500)
+    reap_parser.set_defaults(handler=reap)
+
+    migrate_parser = commands.add_parser("migrate", help="Apply pending schema migrations")
+    migrate_parser.add_argument("--target", type=int, help="Stop after this version")
+    migrate_parser.add_argument("--status", action="store_true", help="Show the current and pending versions")
+    migrate_parser.set_defaults(handler=migrate)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
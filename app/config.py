@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -15,6 +16,62 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     DATABASE_URL: str
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    DB_ECHO: bool = False
+    DB_AUTO_MIGRATE: bool = False
+    HASH_WORKERS: int = 2
+    HASH_QUEUE_LIMIT: int = 32
+    HASH_RETRY_AFTER_SECONDS: int = 1
+    HASH_TIME_COST: int = 3
+    HASH_MEMORY_COST: int = 65536
+    HASH_PARALLELISM: int = 4
+    TIMELINE_MAX_ENTRIES: int = 500
+    TIMELINE_FANOUT_LIMIT: int = 10000
+    TIMELINE_TRIM_SECONDS: float = 300
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: float = 3600
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+    FAST_JSON: bool = True
+    POST_CACHE_SIZE: int = 10000
+    POST_CACHE_TTL_SECONDS: float = 2
+    FEED_CACHE_BACKEND: str = ""
+    FEED_CACHE_SIZE: int = 1000
+    FEED_CACHE_TTL_SECONDS: float = 5
+    FEED_CACHE_TIMEOUT_SECONDS: float = 0.25
+    VOTE_WRITE_BEHIND: bool = False
+    VOTE_BUFFER_MAX_PENDING: int = 1000
+    VOTE_FLUSH_INTERVAL_SECONDS: float = 0.5
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    TRUSTED_PROXIES: list[str] = []
+    RATE_LIMITS: dict[str, str] = {
+        "login": "10/minute",
+        "signup": "20/hour",
+        "vote": "120/minute",
+        "search": "60/minute",
+        "create_post": "30/minute",
+        "follow": "60/minute",
+        "export": "10/hour",
+    }
+    ADMIN_USER_IDS: list[int] = []
+    EXPORT_BATCH_SIZE: int = 1000
+    REAPER_BATCH_SIZE: int = 500
+    REAPER_INTERVAL_SECONDS: float = 60
+    HOT_GRAVITY: float = 1.8
+    HOT_WINDOW_HOURS: float = 168
+    HOT_REFRESH_SECONDS: float = 300
+    SUGGESTIONS_ENABLED: bool = True
+    SUGGESTIONS_MAX_CANDIDATES: int = 100
+    SUGGESTIONS_CACHE_SIZE: int = 10000
+    SUGGESTIONS_CACHE_TTL_SECONDS: float = 60
+    SUGGESTIONS_REFRESH_SECONDS: float = 600
 
     model_config = model_config
 
@@ -0,0 +1,154 @@
+"""Maintenance of denormalized counter columns."""
+import logging
+from sqlalchemy import bindparam
+from sqlmodel import Session, select, update, func, col, or_
+from app.models import Post, Vote, User, Follow
+
+logger = logging.getLogger(__name__)
+
+
+def vote_count_update(post_id: int, delta: int):
+    """Statement adjusting ``Post.vote_count`` by ``delta``.
+
+    The increment is done in SQL so concurrent voters never overwrite each
+    other's updates with a stale value read into Python. Deleted posts are
+    not matched, so a rowcount of 0 means the post is gone.
+    """
+    return (
+        update(Post)
+        .where(Post.id == post_id, Post.deleted_at == None)
+        .values(vote_count=Post.vote_count + delta)
+    )
+
+
+def bulk_vote_count_update():
+    """Executemany form of ``vote_count_update`` taking ``post_id``/``delta`` params."""
+    posts = Post.__table__
+    return (
+        update(posts)
+        .where(posts.c.id == bindparam("post_id"))
+        .values(vote_count=posts.c.vote_count + bindparam("delta"))
+    )
+
+
+def reconcile_vote_counts(session: Session, batch_size: int = 500) -> int:
+    """Repair drift between ``Post.vote_count`` and the ``votes`` table.
+
+    Posts are walked in primary-key order and each batch is recounted by a
+    single ``UPDATE ... SET vote_count = (SELECT count(*) ...)``, so a vote
+    committed while the job runs is never overwritten by a stale count.
+    Batches are committed on their own, so the job can be interrupted and
+    re-run safely. Returns the number of posts whose counter was corrected.
+    """
+    actual = (
+        select(func.count())
+        .select_from(Vote)
+        .where(Vote.post_id == Post.id)
+        .scalar_subquery()
+    )
+    repaired = 0
+    last_id = 0
+    while True:
+        ids = session.exec(
+            select(Post.id)
+            .where(Post.id > last_id)
+            .order_by(Post.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+
+        drifted = session.exec(
+            update(Post)
+            .where(col(Post.id).in_(ids), Post.vote_count != actual)
+            .values(vote_count=actual)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        session.commit()
+
+        if drifted:
+            logger.info(f"Repaired vote_count on {drifted} posts up to id {ids[-1]}")
+        repaired += drifted
+        last_id = ids[-1]
+
+    return repaired
+
+
+def follow_count_updates(follower_id: int, followed_id: int, delta: int) -> list:
+    """Statements adjusting both sides' follow counters by ``delta``.
+
+    They are returned in user id order so two transactions touching the same
+    pair of users always lock the rows in the same order.
+    """
+    updates = {
+        follower_id: update(User).where(User.id == follower_id).values(following_count=User.following_count + delta),
+        followed_id: update(User).where(User.id == followed_id).values(follower_count=User.follower_count + delta),
+    }
+    return [updates[user_id] for user_id in sorted(updates)]
+
+
+def bulk_follow_count_update(column: str):
+    """Executemany update of ``follower_count`` or ``following_count`` taking ``user_id``/``delta`` params."""
+    users = User.__table__
+    return (
+        update(users)
+        .where(users.c.id == bindparam("user_id"))
+        .values({column: users.c[column] + bindparam("delta")})
+    )
+
+
+def bump_follow_counts(session: Session, follower_id: int, followed_id: int, delta: int):
+    """Adjust ``User.following_count``/``follower_count`` in the caller's transaction."""
+    for statement in follow_count_updates(follower_id, followed_id, delta):
+        session.exec(statement)
+
+
+def reconcile_follow_counts(session: Session, batch_size: int = 500) -> int:
+    """Repair drift between the user follow counters and the ``follows`` table.
+
+    Same batching as ``reconcile_vote_counts``: both counters of a batch are
+    recounted by one correlated ``UPDATE``, so concurrent follows and
+    unfollows are never lost. Returns the number of users whose counters
+    were corrected.
+    """
+    followers = (
+        select(func.count())
+        .select_from(Follow)
+        .where(Follow.followed_id == User.id)
+        .scalar_subquery()
+    )
+    following = (
+        select(func.count())
+        .select_from(Follow)
+        .where(Follow.follower_id == User.id)
+        .scalar_subquery()
+    )
+    repaired = 0
+    last_id = 0
+    while True:
+        ids = session.exec(
+            select(User.id)
+            .where(User.id > last_id)
+            .order_by(User.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+
+        drifted = session.exec(
+            update(User)
+            .where(
+                col(User.id).in_(ids),
+                or_(User.follower_count != followers, User.following_count != following)
+            )
+            .values(follower_count=followers, following_count=following)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        session.commit()
+
+        if drifted:
+            logger.info(f"Repaired follow counts on {drifted} users up to id {ids[-1]}")
+        repaired += drifted
+        last_id = ids[-1]
+
+    return repaired
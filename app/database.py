@@ -1,17 +1,185 @@
-from sqlmodel import SQLModel, create_engine, Session
+import time
+from sqlmodel import create_engine, Session, insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, exc
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import settings
-from typing import Annotated
+from app import migrations
+from app.metrics import Counter, Gauge, Histogram
+from typing import Annotated, Optional
 from fastapi import Depends
 
 
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ["pool"]
+)
+
+
+class InstrumentedPoolMixin:
+    """Times every checkout so pool exhaustion shows up before latency does."""
+    label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(pool=self.label)
+            raise
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - start, pool=self.label)
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    label = "sync"
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    label = "async"
+
+
+def engine_options(url: str, poolclass) -> dict:
+    """Keyword arguments for ``create_engine`` built from the pool settings."""
+    options = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite lives on one connection; there is no pool to size.
+        return options
+    options.update(
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    return options
+
+
 database_url = settings.DATABASE_URL
-engine = create_engine(database_url, echo=True)
+engine = create_engine(database_url, **engine_options(database_url, InstrumentedQueuePool))
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """Swap the sync DBAPI driver in ``url`` for its asyncio counterpart."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+async_engine: Optional[AsyncEngine] = None
+if settings.DB_ASYNC:
+    async_url = settings.ASYNC_DATABASE_URL or async_database_url(database_url)
+    async_engine = create_async_engine(async_url, **engine_options(async_url, InstrumentedAsyncQueuePool))
+
+
+def pool_status(target: Engine) -> dict:
+    """Point-in-time occupancy of an engine's connection pool."""
+    pool = target.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+    }
+
+
+def pools() -> dict[str, Engine]:
+    engines = {"sync": engine}
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    return engines
+
+
+def _pool_gauge(field: str):
+    def collect():
+        return {
+            (label,): status[field]
+            for label, status in ((label, pool_status(target)) for label, target in pools().items())
+            if field in status
+        }
+    return collect
+
+
+POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use", "Connections currently checked out", ["pool"],
+    function=_pool_gauge("checked_out")
+)
+POOL_IDLE = Gauge(
+    "db_pool_connections_idle", "Connections idle in the pool", ["pool"],
+    function=_pool_gauge("checked_in")
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Connections opened beyond DB_POOL_SIZE (negative while the pool fills)", ["pool"],
+    function=_pool_gauge("overflow")
+)
+
+
+@event.listens_for(Engine, "connect")
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite only enforces FOREIGN KEY clauses when asked to, per connection."""
+    if "sqlite" in type(dbapi_connection).__module__:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def insert_ignore(dialect: str, target):
+    """``INSERT ... ON CONFLICT DO NOTHING`` for ``dialect``.
+
+    Other backends get a plain INSERT, so callers must still treat a
+    unique-key ``IntegrityError`` as "row already exists".
+    """
+    if dialect == "postgresql":
+        return postgresql.insert(target).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(target).on_conflict_do_nothing()
+    return insert(target)
+
+
+def is_foreign_key_violation(error: exc.IntegrityError) -> bool:
+    orig = error.orig
+    code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if code is not None:
+        return code == "23503"
+    return "FOREIGN KEY constraint failed" in str(orig)
+
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+    """Bring the schema up to date by applying pending migrations."""
+    migrations.upgrade(engine)
+
+def check_schema() -> int:
+    """Fail fast if ``python -m app.cli migrate`` has not been run for this release."""
+    return migrations.check(engine)
 
 def get_session():
     with Session(engine) as session:
         yield session
 
-SessionDep = Annotated[Session, Depends(get_session)]
\ No newline at end of file
+async def get_async_session():
+    # Attributes stay loaded after commit; lazy refreshes can't run outside a greenlet.
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+SessionDep = Annotated[Session, Depends(get_session)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
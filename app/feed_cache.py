@@ -0,0 +1,227 @@
+"""Read-through cache for the shared pages of ``GET /posts``.
+
+Pages of the global feed (no search, not ``mode=followed``) are the same for
+every caller, so they are cached under their normalized query (sort, limit,
+offset or cursor) as orjson-encoded posts plus the next-page cursor. Keys
+also carry a feed version: routes that create, update or delete a post call
+``invalidate`` after committing, which bumps the version so every cached
+page misses at once and the old entries just age out. Votes do not
+invalidate, so counts and the hot/top order can lag by up to
+``FEED_CACHE_TTL_SECONDS``.
+
+Concurrent misses for the same page are coalesced, so an expired first page
+costs one query per worker instead of one per waiting request.
+
+``FEED_CACHE_BACKEND`` picks where pages live: empty disables the cache,
+``"memory"`` keeps an LRU per worker (with a per-worker version, so another
+worker's writes show up once the TTL runs out), ``"redis://host:port/db"``
+shares pages and the version across workers, and ``"module:factory"`` names
+another ``CacheBackend``. A failing backend is logged and bypassed; it never
+fails the request.
+"""
+import importlib
+import logging
+import threading
+from typing import Awaitable, Callable, Optional
+import orjson
+from starlette.concurrency import run_in_threadpool
+from app.cache import AsyncSingleFlight, SingleFlight, TTLCache
+from app.config import settings
+from app.metrics import Counter
+from app.models import Post
+from app.resp import RedisClient
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = Counter("feed_cache_requests_total", "Feed pages looked up in the feed cache", ["result"])
+INVALIDATIONS = Counter("feed_cache_invalidations_total", "Feed cache version bumps")
+
+VERSION_KEY = "feed:version"
+
+FeedPage = tuple[list[Post], Optional[str]]
+
+
+class CacheBackend:
+    """Byte values with a time to live, plus integer counters.
+
+    ``blocking`` backends do network I/O; the async routers call them from
+    the threadpool instead of on the event loop.
+    """
+    blocking = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    def counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def clear(self):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize, ttl=ttl)
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._entries.set(key, value, ttl)
+
+    def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self._counters[key] = self._counters.get(key, 0) + 1
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        with self._lock:
+            self._counters.clear()
+
+
+class RedisCacheBackend(CacheBackend):
+    blocking = True
+
+    def __init__(self, client: RedisClient):
+        self.client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(key, value, ttl)
+
+    def counter(self, key: str) -> int:
+        return int(self.client.get(key) or 0)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+
+def load_backend(spec: str) -> Optional[CacheBackend]:
+    if not spec:
+        return None
+    if spec == "memory":
+        return MemoryCacheBackend(settings.FEED_CACHE_SIZE, settings.FEED_CACHE_TTL_SECONDS)
+    if spec.startswith("redis://"):
+        return RedisCacheBackend(RedisClient(spec, timeout=settings.FEED_CACHE_TIMEOUT_SECONDS))
+    module, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module), factory)()
+
+
+def encode_page(page: FeedPage) -> bytes:
+    posts, cursor = page
+    return orjson.dumps({"posts": [post.model_dump() for post in posts], "cursor": cursor})
+
+
+def decode_page(data: bytes) -> FeedPage:
+    page = orjson.loads(data)
+    return [Post.model_validate(post) for post in page["posts"]], page["cursor"]
+
+
+def page_key(version: int, sort: str, limit: int, offset: int, cursor: Optional[str]) -> str:
+    # The offset is ignored once there is a cursor, so it must not split keys.
+    return f"feed:{version}:{sort}:{limit}:{0 if cursor else offset}:{cursor or ''}"
+
+
+class FeedCache:
+    def __init__(self, backend: Optional[CacheBackend], ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+
+    def applies(self, search: str, mode: str) -> bool:
+        return self.backend is not None and not search and mode != "followed"
+
+    def _failed(self, e: Exception):
+        REQUESTS.inc(result="error")
+        logger.warning(f"Feed cache unavailable, reading from the database: {e!r}")
+
+    def fetch(self, sort: str, limit: int, offset: int, cursor: Optional[str], load: Callable[[], FeedPage]) -> FeedPage:
+        """The cached page, or ``load()``'s result stored for the next caller."""
+        try:
+            key = page_key(self.backend.counter(VERSION_KEY), sort, limit, offset, cursor)
+            data = self.backend.get(key)
+        except Exception as e:
+            self._failed(e)
+            return load()
+        if data is not None:
+            REQUESTS.inc(result="hit")
+            return decode_page(data)
+        REQUESTS.inc(result="miss")
+        return decode_page(self._flight.do(key, lambda: self._fill(key, load())))
+
+    def _fill(self, key: str, page: FeedPage) -> bytes:
+        data = encode_page(page)
+        try:
+            self.backend.set(key, data, self.ttl)
+        except Exception as e:
+            self._failed(e)
+        return data
+
+    async def _call(self, fn, *args):
+        if self.backend.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def fetch_async(
+        self, sort: str, limit: int, offset: int, cursor: Optional[str], load: Callable[[], Awaitable[FeedPage]]
+    ) -> FeedPage:
+        try:
+            key = page_key(await self._call(self.backend.counter, VERSION_KEY), sort, limit, offset, cursor)
+            data = await self._call(self.backend.get, key)
+        except Exception as e:
+            self._failed(e)
+            return await load()
+        if data is not None:
+            REQUESTS.inc(result="hit")
+            return decode_page(data)
+        REQUESTS.inc(result="miss")
+
+        async def fill() -> bytes:
+            data = encode_page(await load())
+            try:
+                await self._call(self.backend.set, key, data, self.ttl)
+            except Exception as e:
+                self._failed(e)
+            return data
+        return decode_page(await self._async_flight.do(key, fill))
+
+    def invalidate(self):
+        """Make every cached page stale; call after committing a post write."""
+        if self.backend is None:
+            return
+        try:
+            self.backend.incr(VERSION_KEY)
+            INVALIDATIONS.inc()
+        except Exception as e:
+            self._failed(e)
+
+    async def invalidate_async(self):
+        if self.backend is None:
+            return
+        try:
+            await self._call(self.backend.incr, VERSION_KEY)
+            INVALIDATIONS.inc()
+        except Exception as e:
+            self._failed(e)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+
+feed_cache = FeedCache(load_backend(settings.FEED_CACHE_BACKEND), settings.FEED_CACHE_TTL_SECONDS)
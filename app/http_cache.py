@@ -0,0 +1,64 @@
+"""Conditional GET support and the short-lived single-post cache.
+
+Post reads carry a strong ETag derived from the post's ``version`` and its
+vote count, so a polling client that already holds the current payload gets
+a bodyless 304. Public ``GET /posts/{id}`` reads are also served from a small
+per-process cache for ``POST_CACHE_TTL_SECONDS``; writers that change a post
+or its votes call ``invalidate_post`` after committing.
+"""
+import hashlib
+from typing import Iterable, Optional
+from fastapi import Request, Response, status
+from app.cache import TTLCache
+from app.config import settings
+from app.models import Post
+
+post_cache = TTLCache(settings.POST_CACHE_SIZE, ttl=settings.POST_CACHE_TTL_SECONDS, name="post")
+
+
+def cached_post(post_id: int) -> Optional[Post]:
+    return post_cache.get(post_id)
+
+
+def cache_post(post: Post) -> Post:
+    # Cache a detached copy so it never expires with the request's session.
+    copy = Post(**post.model_dump())
+    post_cache.set(post.id, copy)
+    return copy
+
+
+def invalidate_post(*post_ids: int):
+    for post_id in post_ids:
+        post_cache.pop(post_id)
+
+
+def post_etag(post: Post, votes: int) -> str:
+    return f'"{post.id}-{post.version}-{votes}"'
+
+
+def list_etag(items: Iterable[dict], cursor: Optional[str]) -> str:
+    digest = hashlib.sha1()
+    for item in items:
+        post = item["post"]
+        expanded = "".join(f"-{item[name]}" for name in ("author", "my_vote") if name in item)
+        digest.update(f"{post.id}-{post.version}-{item['votes']}{expanded};".encode())
+    digest.update((cursor or "").encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so a W/ prefix is ignored.
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Tag ``response`` with ``etag``; return a 304 to send instead if the client is current."""
+    response.headers["ETag"] = etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=dict(response.headers))
+    return None
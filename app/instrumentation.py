@@ -0,0 +1,109 @@
+"""Per-request HTTP and SQL metrics.
+
+``RequestMetricsMiddleware`` times every HTTP request by route template and
+status, and opens a ``RequestStats`` in a context variable. SQLAlchemy cursor
+events, registered on every engine, add each statement's count and duration
+to whatever request is current, so a route that starts issuing one query per
+row shows up in ``http_request_db_queries`` long before it shows up in
+latency.
+"""
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.metrics import Counter, Gauge, Histogram
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to produce a response, by route template", ["method", "route"]
+)
+RESPONSES = Counter("http_responses_total", "Responses sent, by route template and status", ["method", "route", "status"])
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled")
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed while handling a request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent waiting on SQL statements while handling a request", ["method", "route"]
+)
+QUERY_SECONDS = Histogram("db_query_duration_seconds", "Duration of individual SQL statements")
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    QUERY_SECONDS.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+@event.listens_for(Engine, "handle_error")
+def _failed_query(exception_context):
+    # after_cursor_execute does not fire for a failing statement.
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+
+def route_label(scope: dict) -> str:
+    """The matched route's path template; raw paths would explode the label set."""
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware, so the context variable it sets is the one the
+    endpoint (and the threadpool it may run on) sees."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            current_request.reset(token)
+            method = scope["method"]
+            route = route_label(scope)
+            REQUEST_SECONDS.observe(elapsed, method=method, route=route)
+            RESPONSES.inc(method=method, route=route, status=str(status_code))
+            REQUEST_QUERIES.observe(stats.queries, method=method, route=route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, method=method, route=route)
@@ -0,0 +1,40 @@
+"""Database leases for periodic jobs that should run in one worker at a time.
+
+Every worker starts the same background tasks. A job that would only repeat
+the same work in each of them first takes its row in ``task_leases``: the
+holder renews it on every run, and another worker takes over once it has
+expired, e.g. after the holder exits.
+"""
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, update, or_
+from app.database import insert_ignore
+from app.models import TaskLease
+
+HOLDER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _now() -> datetime:
+    # Stored naive, like the other timestamps, and only compared with itself.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def acquire(session: Session, name: str, ttl: float, holder: str = HOLDER) -> bool:
+    """Take or renew the ``name`` lease for ``ttl`` seconds; False if another worker holds it."""
+    now = _now()
+    try:
+        session.exec(
+            insert_ignore(session.get_bind().dialect.name, TaskLease)
+            .values(name=name, holder=holder, expires_at=now)
+        )
+    except IntegrityError:
+        session.rollback()
+    claimed = session.exec(
+        update(TaskLease)
+        .where(TaskLease.name == name, or_(TaskLease.holder == holder, TaskLease.expires_at <= now))
+        .values(holder=holder, expires_at=now + timedelta(seconds=ttl))
+    ).rowcount
+    session.commit()
+    return claimed == 1
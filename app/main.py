@@ -1,8 +1,27 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 import logging
-from app.database import create_db_and_tables
-from app.routers import auth, users, posts, vote, follow
+from app.config import settings
+from app.database import create_db_and_tables, check_schema, async_engine
+from app.instrumentation import RequestMetricsMiddleware
+from app.metrics import REGISTRY, CONTENT_TYPE
+from app.security import HashingUnavailable
+from app.ranking import hot_refresher
+from app.reaper import reaper
+from app.timeline import trimmer
+
+# Optional components are only imported when their setting turns them on.
+if settings.VOTE_WRITE_BEHIND:
+    from app.vote_buffer import vote_buffer
+if settings.SUGGESTIONS_ENABLED:
+    from app.suggestions import suggestions
+
+if settings.DB_ASYNC:
+    from app.routers.aio import auth, users, posts, vote, follow
+else:
+    from app.routers import auth, users, posts, vote, follow
+from app.routers import internal, export
 
 logging.basicConfig(
     level=logging.INFO,
@@ -12,22 +31,60 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("Startup: Creating tables...")
-    create_db_and_tables()
+    if settings.DB_AUTO_MIGRATE:
+        logger.info("Startup: Applying migrations...")
+        create_db_and_tables()
+    else:
+        check_schema()
+    if settings.VOTE_WRITE_BEHIND:
+        vote_buffer.start()
+    if settings.SUGGESTIONS_ENABLED:
+        suggestions.start()
+    hot_refresher.start()
+    hot_refresher.trigger()
+    # Picks up deletions left queued by a previous run.
+    reaper.start()
+    reaper.trigger()
+    trimmer.start()
     logger.info("Application started successfully")
     yield
     logger.info("Shutdown: Cleaning up...")
+    if settings.SUGGESTIONS_ENABLED:
+        suggestions.stop()
+    hot_refresher.stop(final_run=False)
+    reaper.stop(final_run=False)
+    trimmer.stop(final_run=False)
+    if settings.VOTE_WRITE_BEHIND:
+        vote_buffer.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(RequestMetricsMiddleware)
+
+@app.exception_handler(HashingUnavailable)
+async def hashing_unavailable_handler(request: Request, exc: HashingUnavailable):
+    logger.warning(f"Password hashing saturated, rejecting {request.url.path}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": str(settings.HASH_RETRY_AFTER_SECONDS)},
+    )
 
 @app.get("/")
 def root():
     return {"message": "Welcome to my Social Media API! Deployed via Render."}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(posts.router)
 app.include_router(vote.router)
 app.include_router(follow.router)
+app.include_router(export.router)
+app.include_router(internal.router)
 
 
@@ -0,0 +1,129 @@
+"""Versioned schema migrations.
+
+Each migration is a module in this package with an ``upgrade(connection)``
+function, listed in ``MIGRATIONS`` in order. Applied versions are recorded in
+the ``schema_version`` table; ``upgrade`` runs the missing ones, each in its
+own transaction. Migrations must be idempotent (``IF NOT EXISTS``, inspector
+checks), because a fresh database gets the current schema from the baseline
+and later migrations then find their changes already in place.
+
+Run them with ``python -m app.cli migrate``, before the new code starts
+serving. Workers only ``check`` the recorded version at startup, one cheap
+query, and refuse to start on a database that is behind (unless
+``DB_AUTO_MIGRATE`` is set).
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import Callable, Optional
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, func
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.engine import Connection, Engine
+from app.migrations import (
+    m0001_baseline, m0002_counter_columns, m0003_search_index, m0004_access_path_indexes,
+    m0005_follow_counters, m0006_hot_score, m0007_export_timestamps, m0008_soft_delete, m0009_timeline_backfill,
+    m0010_task_leases,
+)
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+schema_version = Table(
+    "schema_version", metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(128), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def _migration(version: int, module: ModuleType) -> Migration:
+    return Migration(version, module.__name__.rsplit(".", 1)[-1], module.upgrade)
+
+
+MIGRATIONS = [
+    _migration(1, m0001_baseline),
+    _migration(2, m0002_counter_columns),
+    _migration(3, m0003_search_index),
+    _migration(4, m0004_access_path_indexes),
+    _migration(5, m0005_follow_counters),
+    _migration(6, m0006_hot_score),
+    _migration(7, m0007_export_timestamps),
+    _migration(8, m0008_soft_delete),
+    _migration(9, m0009_timeline_backfill),
+    _migration(10, m0010_task_leases),
+]
+HEAD = MIGRATIONS[-1].version
+
+
+def current_version(connection: Connection) -> int:
+    """Highest applied version, 0 for a database that was never migrated."""
+    if not inspect(connection).has_table(schema_version.name):
+        return 0
+    return connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database has not been migrated to the version this code needs."""
+
+
+def recorded_version(connection: Connection) -> int:
+    """Like ``current_version`` but a single query, without reflecting the schema."""
+    try:
+        return connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        # No schema_version table yet.
+        connection.rollback()
+        return 0
+
+
+def check(engine: Engine) -> int:
+    """Raise ``SchemaOutOfDate`` unless the database is at ``HEAD`` or newer.
+
+    A newer database is fine: during a rolling deploy the old workers keep
+    serving after the new release has migrated.
+    """
+    with engine.connect() as connection:
+        version = recorded_version(connection)
+    if version < HEAD:
+        raise SchemaOutOfDate(
+            f"Database schema is at version {version} but this release needs {HEAD}; "
+            f"run `python -m app.cli migrate` first"
+        )
+    if version > HEAD:
+        logger.warning(f"Database schema version {version} is ahead of this release ({HEAD})")
+    return version
+
+
+def pending(connection: Connection) -> list[Migration]:
+    version = current_version(connection)
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> list[int]:
+    """Apply migrations up to ``target`` (default: all); returns the versions applied."""
+    with engine.begin() as connection:
+        metadata.create_all(connection)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if target is not None and migration.version > target:
+            break
+        with engine.begin() as connection:
+            if current_version(connection) >= migration.version:
+                continue
+            logger.info(f"Applying migration {migration.version} ({migration.name})")
+            migration.upgrade(connection)
+            connection.execute(schema_version.insert().values(
+                version=migration.version, name=migration.name, applied_at=datetime.now(timezone.utc)
+            ))
+        applied.append(migration.version)
+    return applied
+
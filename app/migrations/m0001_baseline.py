@@ -0,0 +1,13 @@
+"""Baseline: create any table the models define that does not exist yet.
+
+On an empty database this yields the full current schema, including the
+full-text index DDL registered by ``app.search``.
+"""
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+from app import models  # noqa: F401
+from app import search  # noqa: F401
+
+
+def upgrade(connection: Connection):
+    SQLModel.metadata.create_all(connection)
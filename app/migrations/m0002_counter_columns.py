@@ -0,0 +1,13 @@
+"""Denormalized columns added to existing tables after they were first created."""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.migrations.ops import add_column
+
+
+def upgrade(connection: Connection):
+    add_column(connection, "users_v2", "fanout_on_read", "BOOLEAN NOT NULL DEFAULT false")
+    add_column(connection, "posts", "version", "INTEGER NOT NULL DEFAULT 1")
+    if add_column(connection, "posts", "vote_count", "INTEGER NOT NULL DEFAULT 0"):
+        connection.execute(text(
+            "UPDATE posts SET vote_count = (SELECT count(*) FROM votes WHERE votes.post_id = posts.id)"
+        ))
@@ -0,0 +1,17 @@
+"""Full-text search structures for databases created before search existed."""
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from app import search
+
+
+def upgrade(connection: Connection):
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        missing = not inspect(connection).has_table("posts_fts")
+        for statement in search.SQLITE_DDL:
+            connection.exec_driver_sql(statement)
+        if missing:
+            connection.exec_driver_sql("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+    elif dialect == "postgresql":
+        for statement in search.POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
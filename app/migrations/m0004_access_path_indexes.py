@@ -0,0 +1,20 @@
+"""Indexes for the feed, vote count and follower access paths.
+
+- ``posts (published, created_at, id)``: the global feed filters on
+  ``published`` and pages by ``(created_at, id)``.
+- ``posts (user_id, created_at, id)``: an author's newest posts, used by
+  timeline backfill/prune and the followed feed.
+- ``votes (post_id)``: counts and deletes by post; the primary key leads with
+  ``user_id``.
+- ``follows (followed_id, follower_id)``: follower lookups for fan-out; the
+  primary key leads with ``follower_id``.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations.ops import create_index
+
+
+def upgrade(connection: Connection):
+    create_index(connection, "ix_posts_published_created", "posts", ["published", "created_at", "id"])
+    create_index(connection, "ix_posts_user_created", "posts", ["user_id", "created_at", "id"])
+    create_index(connection, "ix_votes_post_id", "votes", ["post_id"])
+    create_index(connection, "ix_follows_followed_follower", "follows", ["followed_id", "follower_id"])
@@ -0,0 +1,26 @@
+"""Follower/following counters on users and follow timestamps.
+
+The counters are backfilled from ``follows``. Existing follows get the
+migration time as ``created_at``, the closest value still available, so
+every row has a keyset position for the follower lists.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.migrations.ops import add_column, create_index
+
+
+def upgrade(connection: Connection):
+    if add_column(connection, "users_v2", "follower_count", "INTEGER NOT NULL DEFAULT 0"):
+        connection.execute(text(
+            "UPDATE users_v2 SET follower_count = "
+            "(SELECT count(*) FROM follows WHERE follows.followed_id = users_v2.id)"
+        ))
+    if add_column(connection, "users_v2", "following_count", "INTEGER NOT NULL DEFAULT 0"):
+        connection.execute(text(
+            "UPDATE users_v2 SET following_count = "
+            "(SELECT count(*) FROM follows WHERE follows.follower_id = users_v2.id)"
+        ))
+    if add_column(connection, "follows", "created_at", "TIMESTAMP"):
+        connection.execute(text("UPDATE follows SET created_at = CURRENT_TIMESTAMP"))
+    create_index(connection, "ix_follows_followed_created", "follows", ["followed_id", "created_at", "follower_id"])
+    create_index(connection, "ix_follows_follower_created", "follows", ["follower_id", "created_at", "followed_id"])
@@ -0,0 +1,13 @@
+"""``posts.hot_score`` and the indexes behind ``sort=hot`` and ``sort=top``.
+
+Scores start at 0; the app's hot refresher (or ``python -m app.cli
+refresh-hot``) fills them in for posts inside the hot window.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations.ops import add_column, create_index
+
+
+def upgrade(connection: Connection):
+    add_column(connection, "posts", "hot_score", "FLOAT NOT NULL DEFAULT 0")
+    create_index(connection, "ix_posts_published_hot", "posts", ["published", "hot_score", "id"])
+    create_index(connection, "ix_posts_published_votes", "posts", ["published", "vote_count", "id"])
@@ -0,0 +1,15 @@
+"""``votes.created_at`` and the creation-time indexes used by ``since=`` exports.
+
+Existing votes get the migration time, so the first incremental export
+after upgrading includes all of them once.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.migrations.ops import add_column, create_index
+
+
+def upgrade(connection: Connection):
+    if add_column(connection, "votes", "created_at", "TIMESTAMP"):
+        connection.execute(text("UPDATE votes SET created_at = CURRENT_TIMESTAMP"))
+    create_index(connection, "ix_votes_created", "votes", ["created_at"])
+    create_index(connection, "ix_posts_created", "posts", ["created_at", "id"])
@@ -0,0 +1,14 @@
+"""``deleted_at`` tombstones on posts and users, and the ``deletions`` queue.
+
+Neither column is indexed: reads only ever filter on ``deleted_at IS NULL``
+next to an existing index, and the reaper finds its work in ``deletions``.
+"""
+from sqlalchemy.engine import Connection
+from app.migrations.ops import add_column
+from app.models import Deletion
+
+
+def upgrade(connection: Connection):
+    add_column(connection, "posts", "deleted_at", "TIMESTAMP")
+    add_column(connection, "users_v2", "deleted_at", "TIMESTAMP")
+    Deletion.__table__.create(connection, checkfirst=True)
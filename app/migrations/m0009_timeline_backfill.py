@@ -0,0 +1,54 @@
+"""Fill ``timeline`` for follows made before it existed.
+
+``timeline.backfill`` only runs when someone follows, so older databases get
+an empty table and an empty followed feed. Authors over
+``TIMELINE_FANOUT_LIMIT`` followers are flagged ``fanout_on_read`` first, as
+``fan_out_post`` would have, and served on read. Every follower then gets
+the newest ``TIMELINE_MAX_ENTRIES`` posts of the other authors they follow.
+Existing entries are left alone, so re-running is harmless.
+"""
+from sqlalchemy import exists, insert, literal, select, update
+from sqlalchemy.engine import Connection
+from app.config import settings
+from app.models import Follow, Post, TimelineEntry, User
+
+BATCH_SIZE = 1000
+
+
+def upgrade(connection: Connection):
+    connection.execute(
+        update(User)
+        .where(User.follower_count > settings.TIMELINE_FANOUT_LIMIT, User.fanout_on_read == False)
+        .values(fanout_on_read=True)
+    )
+
+    last_id = 0
+    while True:
+        followers = connection.execute(
+            select(Follow.follower_id).distinct()
+            .where(Follow.follower_id > last_id)
+            .order_by(Follow.follower_id)
+            .limit(BATCH_SIZE)
+        ).scalars().all()
+        if not followers:
+            return
+        for follower_id in followers:
+            recent = (
+                select(literal(follower_id).label("user_id"), Post.id.label("post_id"), Post.created_at)
+                .join(Follow, Follow.followed_id == Post.user_id)
+                .join(User, User.id == Post.user_id)
+                .where(
+                    Follow.follower_id == follower_id,
+                    Post.published == True,
+                    Post.deleted_at == None,
+                    User.fanout_on_read == False
+                )
+                .order_by(Post.created_at.desc(), Post.id.desc())
+                .limit(settings.TIMELINE_MAX_ENTRIES)
+                .subquery()
+            )
+            missing = select(recent).where(~exists().where(
+                TimelineEntry.user_id == recent.c.user_id, TimelineEntry.post_id == recent.c.post_id
+            ))
+            connection.execute(insert(TimelineEntry).from_select(["user_id", "post_id", "created_at"], missing))
+        last_id = followers[-1]
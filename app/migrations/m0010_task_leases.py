@@ -0,0 +1,7 @@
+"""``task_leases``, so periodic jobs like the hot score refresh run in one worker."""
+from sqlalchemy.engine import Connection
+from app.models import TaskLease
+
+
+def upgrade(connection: Connection):
+    TaskLease.__table__.create(connection, checkfirst=True)
@@ -0,0 +1,19 @@
+"""Idempotent schema operations for migrations."""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+
+def has_column(connection: Connection, table: str, column: str) -> bool:
+    return any(info["name"] == column for info in inspect(connection).get_columns(table))
+
+
+def add_column(connection: Connection, table: str, column: str, ddl: str) -> bool:
+    """``ALTER TABLE ... ADD COLUMN`` unless present; returns whether it was added."""
+    if has_column(connection, table, column):
+        return False
+    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def create_index(connection: Connection, name: str, table: str, columns: list[str]):
+    connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
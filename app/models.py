@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlmodel import SQLModel, Field, Relationship # type: ignore
+from sqlmodel import SQLModel, Field, Relationship, Index, false # type: ignore
 from typing import List, Optional, Annotated
 from pydantic import EmailStr, field_validator # type: ignore
     
@@ -19,10 +19,23 @@ class User(UserBase, table=True):
     password_hash: str 
     created_at: datetime = Field(default_factory= lambda: datetime.now(timezone.utc))
     posts: List["Post"] = Relationship(back_populates="user")
+    fanout_on_read: bool = Field(default=False, sa_column_kwargs={"server_default": false()})
+    follower_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    following_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    deleted_at: Optional[datetime] = None
     
 class UserRead(UserBase):
     id: int
     created_at: datetime
+
+class UserProfile(UserRead):
+    follower_count: int
+    following_count: int
+
+class FollowUser(SQLModel):
+    id: int
+    username: str
+    followed_at: datetime
     
 class UserUpdate(UserBase):
     email: Optional[Email] = None # type: ignore
@@ -34,11 +47,22 @@ class PostBase(SQLModel):
     
 class Post(PostBase, table=True):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_published_created", "published", "created_at", "id"),
+        Index("ix_posts_user_created", "user_id", "created_at", "id"),
+        Index("ix_posts_published_hot", "published", "hot_score", "id"),
+        Index("ix_posts_published_votes", "published", "vote_count", "id"),
+        Index("ix_posts_created", "created_at", "id"),
+    )
     id: Optional[int] = Field(primary_key=True, default=None) 
     user_id: int = Field(foreign_key="users_v2.id")    
     created_at: datetime = Field(default_factory= lambda: datetime.now(timezone.utc))
     user: Optional["User"] = Relationship(back_populates="posts")
     published: bool = Field(default=True)
+    vote_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
+    hot_score: float = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    deleted_at: Optional[datetime] = None
 
 class PostCreate(PostBase):
     pass
@@ -55,26 +79,70 @@ class PostRead(PostBase):
     
 class Vote(SQLModel, table=True):
     __tablename__ = "votes"
+    __table_args__ = (
+        Index("ix_votes_post_id", "post_id"),
+        Index("ix_votes_created", "created_at"),
+    )
     user_id: int = Field(foreign_key="users_v2.id", primary_key=True)
     post_id: int =Field(foreign_key="posts.id", primary_key=True)
+    created_at: datetime = Field(default_factory= lambda: datetime.now(timezone.utc))
 
 class VoteCreate(SQLModel):
     post_id: int = Field(gt=0)
     dir: int = Field(le=1, ge=0)
 
+class VoteResult(SQLModel):
+    post_id: int
+    dir: int
+    status: str
+
+class PostAuthor(SQLModel):
+    id: int
+    username: str
+
 class PostOut(SQLModel):
     post: PostRead
     votes: int
+    author: Optional[PostAuthor] = None
+    my_vote: Optional[bool] = None
 
 class Follow(SQLModel, table=True):
     __tablename__ = "follows"
+    __table_args__ = (
+        Index("ix_follows_followed_follower", "followed_id", "follower_id"),
+        Index("ix_follows_followed_created", "followed_id", "created_at", "follower_id"),
+        Index("ix_follows_follower_created", "follower_id", "created_at", "followed_id"),
+    )
     follower_id: int = Field(foreign_key="users_v2.id", primary_key=True)
     followed_id: int = Field(foreign_key="users_v2.id", primary_key=True)
+    created_at: datetime = Field(default_factory= lambda: datetime.now(timezone.utc))
+
+class Suggestion(SQLModel):
+    id: int
+    mutual_connections: int
 
 class FollowCreate(SQLModel):
     followed_id: int = Field(gt=0)
 
-
-
-
-
+class Deletion(SQLModel, table=True):
+    """A soft-deleted post or user whose dependent rows are still to be removed."""
+    __tablename__ = "deletions"
+    kind: str = Field(primary_key=True, max_length=16)
+    target_id: int = Field(primary_key=True)
+    requested_at: datetime = Field(default_factory= lambda: datetime.now(timezone.utc))
+
+class TaskLease(SQLModel, table=True):
+    """The worker currently allowed to run a periodic job, until ``expires_at``."""
+    __tablename__ = "task_leases"
+    name: str = Field(primary_key=True, max_length=64)
+    holder: str = Field(max_length=128)
+    expires_at: datetime
+
+class TimelineEntry(SQLModel, table=True):
+    __tablename__ = "timeline"
+    __table_args__ = (
+        Index("ix_timeline_user_created", "user_id", "created_at", "post_id"),
+    )
+    user_id: int = Field(foreign_key="users_v2.id", primary_key=True)
+    post_id: int = Field(foreign_key="posts.id", primary_key=True, index=True)
+    created_at: datetime
@@ -1,15 +1,25 @@
+import time
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 from jose import jwt, JWTError # type: ignore
 from fastapi import Depends, HTTPException, status # type: ignore
 from fastapi.security import OAuth2PasswordBearer # type: ignore
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import event
 from sqlmodel import Session, select # type: ignore
 from app.config import settings
 from app.models import User
-from app.security import verify_password
-from app.database import get_session
+from app.security import verify_password_async
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_session, get_async_session
+from app.cache import TTLCache
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
+
+token_cache = TTLCache(settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS, name="token")
+principal_cache = TTLCache(settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS, name="principal")
 
 
 def create_access_token(data: dict):
@@ -21,44 +31,162 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
-def authenticate_user(username: str, password: str, session: Session):
-    query = select(User).where(User.username == username)
-    user = session.exec(query).first()
+def _find_user(session: Session, username: str) -> Optional[User]:
+    query = select(User).where(User.username == username, User.deleted_at == None)
+    return session.exec(query).first()
+
+
+def _store_rehash(session: Session, user: User, updated_hash: str):
+    user.password_hash = updated_hash
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+
+
+async def authenticate_user(username: str, password: str, session: Session):
+    """Check credentials; database work runs on the threadpool, argon2 on the hash pool."""
+    user = await run_in_threadpool(_find_user, session, username)
 
     if not user:
         return None
     
-    if not verify_password(password, user.password_hash):
+    valid, updated_hash = await verify_password_async(password, user.password_hash)
+    if not valid:
         return None
+
+    if updated_hash:
+        await run_in_threadpool(_store_rehash, session, user, updated_hash)
     
     return user
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
-    credentials_exception = HTTPException(
+async def authenticate_user_async(username: str, password: str, session: AsyncSession):
+    result = await session.exec(select(User).where(User.username == username, User.deleted_at == None))
+    user = result.first()
+
+    if not user:
+        return None
+
+    valid, updated_hash = await verify_password_async(password, user.password_hash)
+    if not valid:
+        return None
+
+    if updated_hash:
+        user.password_hash = updated_hash
+        session.add(user)
+        await session.commit()
+
+    return user
+
+
+def decode_token(token: str) -> Optional[int]:
+    """Return the user id carried by a valid token, or None.
+
+    Decoded tokens are cached until their ``exp`` so repeat requests skip
+    signature verification.
+    """
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+
+    user_id = payload.get("user_id")
+    if user_id is None:
+        return None
+
+    expires_in = payload["exp"] - time.time() if "exp" in payload else settings.TOKEN_CACHE_TTL_SECONDS
+    token_cache.set(token, user_id, ttl=expires_in)
+    return user_id
+
+
+def invalidate_principal(user_id: int):
+    """Forget the cached principal for a user whose row changed."""
+    principal_cache.pop(user_id)
+
+
+def clear_auth_caches():
+    token_cache.clear()
+    principal_cache.clear()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target: User):
+    invalidate_principal(target.id)
+
+
+def credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("user_id")
 
-        if user_id is None:
-            raise credentials_exception
-        
-    except JWTError:
-        raise credentials_exception
-    
+def cache_principal(user: User) -> User:
+    # Cache a detached copy so it never expires with the request's session.
+    principal = User(**user.model_dump())
+    principal_cache.set(user.id, principal)
+    return principal
+
+
+async def get_optional_user_id(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[int]:
+    """User id for public routes that personalise their answer; no database access.
+
+    Like ``get_current_user_id`` this never blocks, so it is ``async`` and runs
+    on the event loop instead of taking a threadpool hop per request.
+    """
+    return decode_token(token) if token else None
+
+
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    """Authenticated user id for routes that never need the user row."""
+    user_id = decode_token(token)
+    if user_id is None:
+        raise credentials_exception()
+    return user_id
+
+
+async def require_admin(user_id: int = Depends(get_current_user_id)) -> int:
+    """Authenticated user id, 403 unless it is listed in ``ADMIN_USER_IDS``."""
+    if user_id not in settings.ADMIN_USER_IDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user_id
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
+    user_id = decode_token(token)
+    if user_id is None:
+        raise credentials_exception()
+
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return user
 
     user = session.get(User, user_id)
 
-    if user is None:
-        raise credentials_exception
+    if user is None or user.deleted_at is not None:
+        raise credentials_exception()
     
-    return user
+    return cache_principal(user)
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_async_session)):
+    user_id = decode_token(token)
+    if user_id is None:
+        raise credentials_exception()
 
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return user
 
+    user = await session.get(User, user_id)
 
+    if user is None or user.deleted_at is not None:
+        raise credentials_exception()
 
+    return cache_principal(user)
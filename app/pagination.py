@@ -0,0 +1,67 @@
+"""Opaque keyset cursors for paginated list endpoints."""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Sequence
+from fastapi import HTTPException, status
+from sqlmodel import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def _decode_value(obj: dict):
+    if "dt" in obj:
+        return datetime.fromisoformat(obj["dt"])
+    return obj
+
+
+def _valid_values(values: list) -> bool:
+    # Every cursor ends with a row id and leads with sort key values, which
+    # are timestamps or numbers; anything else must not reach the binds.
+    *keys, row_id = values
+    if type(row_id) is not int:
+        return False
+    return all(isinstance(key, (datetime, int, float)) and not isinstance(key, bool) for key in keys)
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """Pack the sort key of the last row on a page into a URL-safe token."""
+    payload = json.dumps({"s": sort, "v": list(values)}, default=_encode_value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, size: int) -> list:
+    """Unpack a token produced by ``encode_cursor`` for the same sort order."""
+    invalid = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded), object_hook=_decode_value)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise invalid
+
+    if not isinstance(payload, dict) or payload.get("s") != sort:
+        raise invalid
+    values = payload.get("v")
+    if not isinstance(values, list) or len(values) != size or not _valid_values(values):
+        raise invalid
+    return values
+
+
+def keyset_after(columns: Sequence[Any], values: Sequence[Any]):
+    """Predicate selecting rows strictly after ``values`` in descending order.
+
+    Expands ``(a, b) < (x, y)`` into ``a < x OR (a = x AND b < y)`` so every
+    backend can turn it into a range scan on a matching composite index.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, column < values[i]))
+    return or_(*clauses)
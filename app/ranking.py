@@ -0,0 +1,169 @@
+"""Time-decayed "hot" score behind ``GET /posts?sort=hot``.
+
+``hot = (votes + 1) / (age_hours + 2) ** HOT_GRAVITY`` is stored in
+``Post.hot_score`` so a hot page is a range scan on
+``ix_posts_published_hot``. Ages are measured from a reference time that
+only moves in ``HOT_REFRESH_SECONDS`` steps, the same in every worker, so a
+score written by a vote is comparable with the ones written by the last
+refresh. A vote rescores its post in the statement that counts it (or right
+after, where the database has no ``power``); ``refresh_hot_scores`` moves
+everything else to the current reference time, and posts older than
+``HOT_WINDOW_HOURS`` drop to 0 and rank by id. The refresher wakes as the
+reference time steps, so voted posts are not scored ahead of the rest for
+long.
+
+Scores are written only while ``vote_count`` still holds the value they were
+computed from, so a refresh never overwrites the rescore of a vote that
+landed in between. The background refresher runs in whichever worker holds
+the ``hot-refresh`` lease; the others skip their turn.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+from sqlalchemy import bindparam, case, func, literal
+from sqlmodel import Session, select, update, col
+from app.background import PeriodicTask
+from app.config import settings
+from app.counters import vote_count_update
+from app import leases
+from app.database import engine
+from app.models import Post
+from app.pagination import keyset_after
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def reference_time(now: Optional[datetime] = None) -> datetime:
+    """``now`` rounded down to the refresh interval."""
+    now = now or datetime.now(timezone.utc)
+    step = settings.HOT_REFRESH_SECONDS
+    return EPOCH + timedelta(seconds=(now - EPOCH).total_seconds() // step * step)
+
+
+def until_next_step(now: Optional[datetime] = None) -> float:
+    """Seconds until ``reference_time`` next moves."""
+    now = now or datetime.now(timezone.utc)
+    return (reference_time(now) + timedelta(seconds=settings.HOT_REFRESH_SECONDS) - now).total_seconds()
+
+
+def hot_score(votes: int, created_at: datetime, at: datetime) -> float:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    age_hours = max((at - created_at).total_seconds() / 3600, 0)
+    if age_hours > settings.HOT_WINDOW_HOURS:
+        return 0.0
+    return (votes + 1) / (age_hours + 2) ** settings.HOT_GRAVITY
+
+
+def hot_score_sql(votes, created_at, at: datetime):
+    """``hot_score`` as a SQL expression, for Postgres."""
+    age_hours = func.greatest(func.extract("epoch", literal(at.replace(tzinfo=None)) - created_at) / 3600, 0)
+    return case(
+        (age_hours > settings.HOT_WINDOW_HOURS, 0.0),
+        else_=(votes + 1) / func.power(age_hours + 2, settings.HOT_GRAVITY)
+    )
+
+
+def hot_score_update():
+    """Executemany update taking ``post_id``/``votes``/``score`` params.
+
+    Rows whose ``vote_count`` is no longer ``votes`` are left alone: a vote
+    changed them after the score was computed and rescored them itself.
+    """
+    posts = Post.__table__
+    return (
+        update(posts)
+        .where(posts.c.id == bindparam("post_id"), posts.c.vote_count == bindparam("votes"))
+        .values(hot_score=bindparam("score"))
+    )
+
+
+def bump_vote_count(session: Session, post_id: int, delta: int) -> bool:
+    """Adjust ``post_id``'s vote count and rescore it; False if the post is deleted.
+
+    Postgres does both in one UPDATE. Elsewhere the counter update returns
+    what the score is computed from and a second UPDATE writes it.
+    """
+    at = reference_time()
+    statement = vote_count_update(post_id, delta)
+    if session.get_bind().dialect.name == "postgresql":
+        statement = statement.values(hot_score=hot_score_sql(Post.vote_count + delta, Post.created_at, at))
+        return session.exec(statement.returning(Post.id)).first() is not None
+    row = session.exec(statement.returning(Post.vote_count, Post.created_at)).first()
+    if row is None:
+        return False
+    votes, created_at = row
+    session.exec(hot_score_update(), params={
+        "post_id": post_id, "votes": votes, "score": hot_score(votes, created_at, at)
+    })
+    return True
+
+
+def rescore(session: Session, post_ids: Iterable[int]):
+    """Recompute the hot score of ``post_ids`` in the caller's transaction."""
+    post_ids = set(post_ids)
+    if not post_ids:
+        return
+    at = reference_time()
+    rows = session.exec(
+        select(Post.id, Post.vote_count, Post.created_at).where(col(Post.id).in_(post_ids))
+    ).all()
+    if rows:
+        session.exec(hot_score_update(), params=[
+            {"post_id": post_id, "votes": votes, "score": hot_score(votes, created_at, at)}
+            for post_id, votes, created_at in rows
+        ])
+
+
+def refresh_hot_scores(session: Session, batch_size: int = 500) -> int:
+    """Decay every published post in the window to the current reference time.
+
+    Walks the window newest first, committing each batch. Returns the number
+    of posts rescored.
+    """
+    at = reference_time()
+    cutoff = (at - timedelta(hours=settings.HOT_WINDOW_HOURS)).replace(tzinfo=None)
+    order = (Post.created_at, Post.id)
+    rescored = 0
+    last = None
+    while True:
+        stmt = (
+            select(Post.id, Post.vote_count, Post.created_at)
+            .where(Post.published == True, Post.created_at >= cutoff)
+            .order_by(*(column.desc() for column in order))
+            .limit(batch_size)
+        )
+        if last is not None:
+            stmt = stmt.where(keyset_after(order, last))
+        batch = session.exec(stmt).all()
+        if not batch:
+            break
+        session.exec(hot_score_update(), params=[
+            {"post_id": post_id, "votes": votes, "score": hot_score(votes, created_at, at)}
+            for post_id, votes, created_at in batch
+        ])
+        session.commit()
+        rescored += len(batch)
+        last_id, _, last_created = batch[-1]
+        last = (last_created, last_id)
+
+    expired = session.exec(
+        update(Post)
+        .where(Post.published == True, Post.hot_score > 0, Post.created_at < cutoff)
+        .values(hot_score=0)
+    )
+    session.commit()
+    logger.info(f"Refreshed hot scores for {rescored} posts, {expired.rowcount} aged out")
+    return rescored
+
+
+def _refresh():
+    with Session(engine) as session:
+        # Renewed every run, so it only changes hands once its holder stops.
+        if leases.acquire(session, "hot-refresh", ttl=settings.HOT_REFRESH_SECONDS * 2):
+            refresh_hot_scores(session)
+
+
+hot_refresher = PeriodicTask("hot-refresh", settings.HOT_REFRESH_SECONDS, _refresh, delay=until_next_step)
@@ -0,0 +1,208 @@
+"""Token-bucket admission control for expensive routes.
+
+Each limited route names a limit in ``settings.RATE_LIMITS`` such as
+``"login": "10/minute"``: a bucket of 10 tokens refilled at 10 per minute,
+one bucket per caller. Callers with a valid bearer token are keyed by user
+id, everyone else by client address. Behind a reverse proxy every request
+comes from the proxy, so ``TRUSTED_PROXIES`` lists the addresses (or ``"*"``)
+whose ``X-Forwarded-For`` is believed; the client is the rightmost address
+in it that is not one of those proxies. A request that finds its bucket empty
+gets 429 with ``Retry-After`` set to when the next token arrives, before the
+route touches argon2 or the database.
+
+Buckets live in a ``RateLimitBackend``. ``MemoryBackend`` keeps them in
+per-process shards, so with several workers each one enforces the limit on
+its own share of traffic; ``RATE_LIMIT_BACKEND`` names a factory
+(``"package.module:callable"``) for a shared store instead.
+"""
+import importlib
+import logging
+import math
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Optional
+from fastapi import HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.metrics import Counter, Gauge
+from app.oauth2 import decode_token
+
+logger = logging.getLogger(__name__)
+
+CHECKS = Counter("rate_limit_checks_total", "Requests checked against a rate limit", ["limit"])
+REJECTED = Counter("rate_limit_rejected_total", "Requests rejected with 429", ["limit"])
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class Limit:
+    capacity: int
+    period: float
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.period
+
+
+@lru_cache(maxsize=256)
+def parse_limit(spec: str) -> Limit:
+    """``"<count>/<second|minute|hour|day>"``, e.g. ``"10/minute"``."""
+    count, _, period = spec.partition("/")
+    try:
+        return Limit(int(count), PERIODS[period.strip()])
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit {spec!r}, expected e.g. '10/minute'")
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+class RateLimitBackend:
+    """Where buckets are kept. ``acquire`` takes ``cost`` tokens if it can.
+
+    ``blocking`` backends do network I/O; checks against them run in the
+    threadpool instead of on the event loop.
+    """
+    blocking = False
+
+    def acquire(self, key: str, limit: Limit, cost: int = 1) -> Decision:
+        raise NotImplementedError
+
+    def clear(self):
+        pass
+
+
+class MemoryBackend(RateLimitBackend):
+    """Buckets in ``shards`` dicts, each behind its own lock.
+
+    A bucket is ``(tokens, updated_at, full_at)`` and is refilled from the
+    elapsed time when it is next touched. A bucket past ``full_at`` is
+    indistinguishable from a missing one, so shards drop such entries
+    whenever they grow past ``max_keys / shards`` instead of running a
+    sweeper thread.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100000):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self._shard_limit = max(1, max_keys // shards)
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for buckets, _ in self._shards)
+
+    def acquire(self, key: str, limit: Limit, cost: int = 1) -> Decision:
+        buckets, lock = self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            tokens, updated_at, _ = buckets.get(key, (limit.capacity, now, now))
+            tokens = min(limit.capacity, tokens + (now - updated_at) * limit.refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            full_at = now + (limit.capacity - tokens) / limit.refill_rate
+            buckets[key] = (tokens, now, full_at)
+            if len(buckets) > self._shard_limit:
+                self._expire(buckets, now)
+
+        retry_after = 0.0 if allowed else (cost - tokens) / limit.refill_rate
+        return Decision(allowed, int(tokens), retry_after)
+
+    @staticmethod
+    def _expire(buckets: dict, now: float):
+        for key in [key for key, (_, _, full_at) in buckets.items() if full_at <= now]:
+            del buckets[key]
+
+    def clear(self):
+        for buckets, lock in self._shards:
+            with lock:
+                buckets.clear()
+
+
+def load_backend(spec: str) -> RateLimitBackend:
+    if spec == "memory":
+        return MemoryBackend()
+    module, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module), factory)()
+
+
+# Fail at startup, not on the first request, if a configured limit is malformed.
+for _spec in settings.RATE_LIMITS.values():
+    parse_limit(_spec)
+
+backend = load_backend(settings.RATE_LIMIT_BACKEND)
+
+BUCKETS = Gauge(
+    "rate_limit_buckets", "Buckets held by the in-memory rate limit store",
+    function=lambda: {(): len(backend)} if isinstance(backend, MemoryBackend) else {}
+)
+
+
+def client_address(request: Request) -> str:
+    """The caller's address, read through ``X-Forwarded-For`` from trusted proxies."""
+    host = request.client.host if request.client else "unknown"
+    trusted = settings.TRUSTED_PROXIES
+    if host not in trusted and "*" not in trusted:
+        return host
+    forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+    # Each proxy appends the address it saw, so anything left of the first
+    # untrusted entry from the right may have been sent by the client itself.
+    for address in reversed(forwarded):
+        if address not in trusted:
+            return address
+    return forwarded[0] if forwarded else host
+
+
+def caller_key(request: Request) -> str:
+    """``user:<id>`` for a valid bearer token, otherwise ``ip:<address>``."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        user_id = decode_token(token)
+        if user_id is not None:
+            return f"user:{user_id}"
+    return f"ip:{client_address(request)}"
+
+
+def check(name: str, request: Request, cost: int = 1):
+    """Take ``cost`` tokens from the caller's ``name`` bucket or raise 429."""
+    spec = settings.RATE_LIMITS.get(name)
+    if not settings.RATE_LIMIT_ENABLED or not spec:
+        return
+    key = caller_key(request)
+    limit = parse_limit(spec)
+    # A request larger than the whole bucket could otherwise never succeed.
+    decision = backend.acquire(f"{name}:{key}", limit, min(cost, limit.capacity))
+    CHECKS.inc(limit=name)
+    if not decision.allowed:
+        REJECTED.inc(limit=name)
+        logger.warning(f"Rate limit {name} exceeded by {key}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(max(1, math.ceil(decision.retry_after)))},
+        )
+
+
+async def check_async(name: str, request: Request, cost: int = 1):
+    """``check`` for async callers, off the event loop only for blocking backends."""
+    if backend.blocking:
+        await run_in_threadpool(check, name, request, cost)
+    else:
+        check(name, request, cost)
+
+
+def rate_limit(name: str, when: Optional[Callable[[Request], bool]] = None):
+    """Route dependency applying the ``name`` limit, optionally only ``when`` it matches.
+
+    It is ``async`` so the default in-memory check costs no threadpool hop.
+    """
+    async def dependency(request: Request):
+        if when is None or when(request):
+            await check_async(name, request)
+    return dependency
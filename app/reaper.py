@@ -0,0 +1,199 @@
+"""Soft deletion of posts and users, and the background reaper that finishes it.
+
+Deleting a post or an account only stamps ``deleted_at`` (every read filters
+on it) and queues a ``deletions`` row, so the request never waits on a
+popular post's votes or a big account's follows. The reaper then works
+through the queue, removing dependent rows ``REAPER_BATCH_SIZE`` at a time
+and committing each batch on its own:
+
+- a post: its votes, its timeline entries, then the post itself;
+- a user: the votes they cast (adjusting those posts' counts), their follows
+  in both directions (adjusting the other side's counters), their own
+  timeline, each of their posts as above, and finally the user row.
+
+All progress is in the database. Batches are deleted with ``RETURNING`` and
+counters adjusted only for rows this run actually removed, so a restarted
+reaper, or one running in several workers at once, just carries on with
+whatever is left. A queue entry is dropped only once its target row is gone.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, update, delete, col, func, and_, or_
+from app.background import PeriodicTask
+from app.config import settings
+from app.counters import bulk_vote_count_update, bulk_follow_count_update
+from app.database import engine, insert_ignore
+from app.metrics import Counter, Gauge
+from app.models import Deletion, Follow, Post, TimelineEntry, User, Vote
+from app import http_cache, ranking
+
+logger = logging.getLogger(__name__)
+
+POST = "post"
+USER = "user"
+
+ROWS = Counter("reaper_rows_deleted_total", "Rows removed by the deletion reaper", ["table"])
+COMPLETED = Counter("reaper_deletions_completed_total", "Soft-deleted posts and users fully removed", ["kind"])
+PENDING = Gauge("reaper_pending_deletions", "Queued deletions as of the reaper's last run", ["kind"])
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _enqueue(session: Session, kind: str, target_id: int, at: datetime):
+    session.exec(
+        insert_ignore(session.get_bind().dialect.name, Deletion)
+        .values(kind=kind, target_id=target_id, requested_at=at)
+    )
+
+
+def soft_delete_post(session: Session, post_id: int):
+    """Tombstone a post and queue it for the reaper, in the caller's transaction."""
+    now = _now()
+    session.exec(update(Post).where(Post.id == post_id, Post.deleted_at == None).values(deleted_at=now))
+    _enqueue(session, POST, post_id, now)
+
+
+def soft_delete_user(session: Session, user_id: int) -> list[int]:
+    """Tombstone a user and their posts and queue the user for the reaper.
+
+    The posts are hidden here, with one update on ``ix_posts_user_created``,
+    so nothing of the account stays visible while the reaper catches up.
+    Returns the ids of the posts hidden, for the caller to uncache.
+    """
+    now = _now()
+    session.exec(update(User).where(User.id == user_id, User.deleted_at == None).values(deleted_at=now))
+    post_ids = list(session.exec(
+        update(Post).where(Post.user_id == user_id, Post.deleted_at == None).values(deleted_at=now).returning(Post.id)
+    ).scalars())
+    _enqueue(session, USER, user_id, now)
+    return post_ids
+
+
+def _drain(
+    session: Session,
+    model,
+    owner,
+    other,
+    owner_id: int,
+    batch_size: int,
+    on_batch: Optional[Callable[[list[int]], None]] = None
+) -> int:
+    """Delete every ``model`` row with ``owner == owner_id`` in committed batches.
+
+    ``on_batch`` gets the ``other`` column of each deleted batch, before its
+    commit, to adjust counters in the same transaction. Returns rows deleted.
+    """
+    deleted = 0
+    while True:
+        chosen = select(other).where(owner == owner_id).limit(batch_size)
+        batch = list(session.exec(
+            delete(model).where(owner == owner_id, col(other).in_(chosen)).returning(other)
+        ).scalars())
+        if not batch:
+            return deleted
+        if on_batch is not None:
+            on_batch(batch)
+        session.commit()
+        ROWS.inc(len(batch), table=model.__tablename__)
+        deleted += len(batch)
+
+
+def _unvote(session: Session, post_ids: list[int]):
+    session.exec(bulk_vote_count_update(), params=[{"post_id": post_id, "delta": -1} for post_id in post_ids])
+    ranking.rescore(session, post_ids)
+    http_cache.invalidate_post(*post_ids)
+
+
+def _unfollow(session: Session, column: str, user_ids: list[int]):
+    session.exec(bulk_follow_count_update(column), params=[{"user_id": user_id, "delta": -1} for user_id in user_ids])
+
+
+def _finish(session: Session, kind: str, target_id: int, model) -> bool:
+    """Delete the tombstoned row itself and its queue entry."""
+    try:
+        session.exec(delete(model).where(model.id == target_id, model.deleted_at != None))
+        session.exec(delete(Deletion).where(Deletion.kind == kind, Deletion.target_id == target_id))
+        session.commit()
+    except IntegrityError:
+        # A row referencing it was written after its batch was drained (e.g. a
+        # buffered vote); it is picked up again on the next run.
+        session.rollback()
+        logger.warning(f"Reaper could not remove {kind} {target_id} yet, will retry")
+        return False
+    COMPLETED.inc(kind=kind)
+    return True
+
+
+def reap_post(session: Session, post_id: int, batch_size: int) -> bool:
+    _drain(session, Vote, Vote.post_id, Vote.user_id, post_id, batch_size)
+    _drain(session, TimelineEntry, TimelineEntry.post_id, TimelineEntry.user_id, post_id, batch_size)
+    return _finish(session, POST, post_id, Post)
+
+
+def reap_user(session: Session, user_id: int, batch_size: int) -> bool:
+    _drain(session, Vote, Vote.user_id, Vote.post_id, user_id, batch_size,
+           lambda post_ids: _unvote(session, post_ids))
+    _drain(session, Follow, Follow.follower_id, Follow.followed_id, user_id, batch_size,
+           lambda user_ids: _unfollow(session, "follower_count", user_ids))
+    _drain(session, Follow, Follow.followed_id, Follow.follower_id, user_id, batch_size,
+           lambda user_ids: _unfollow(session, "following_count", user_ids))
+    _drain(session, TimelineEntry, TimelineEntry.user_id, TimelineEntry.post_id, user_id, batch_size)
+
+    complete = True
+    last_id = 0
+    while True:
+        post_ids = session.exec(
+            select(Post.id).where(Post.user_id == user_id, Post.id > last_id).order_by(Post.id).limit(batch_size)
+        ).all()
+        if not post_ids:
+            break
+        for post_id in post_ids:
+            # Posts tombstoned with the user are not queued on their own.
+            complete = reap_post(session, post_id, batch_size) and complete
+        last_id = post_ids[-1]
+    return complete and _finish(session, USER, user_id, User)
+
+
+def _update_pending(session: Session):
+    counts = dict(session.exec(select(Deletion.kind, func.count()).group_by(Deletion.kind)).all())
+    for kind in (POST, USER):
+        PENDING.set(counts.get(kind, 0), kind=kind)
+
+
+def reap(session: Session, batch_size: int = 500) -> int:
+    """Work through the deletion queue once; returns the number of targets removed.
+
+    Posts come before users, and each entry is visited once per run, so an
+    entry that keeps failing cannot stall the rest of the queue.
+    """
+    reapers = {POST: reap_post, USER: reap_user}
+    _update_pending(session)
+    removed = 0
+    last = None
+    while True:
+        stmt = select(Deletion.kind, Deletion.target_id).order_by(Deletion.kind, Deletion.target_id).limit(batch_size)
+        if last is not None:
+            stmt = stmt.where(or_(Deletion.kind > last[0], and_(Deletion.kind == last[0], Deletion.target_id > last[1])))
+        entries = session.exec(stmt).all()
+        if not entries:
+            break
+        for kind, target_id in entries:
+            if reapers[kind](session, target_id, batch_size):
+                removed += 1
+        last = entries[-1]
+    _update_pending(session)
+    if removed:
+        logger.info(f"Reaper removed {removed} deleted posts/users")
+    return removed
+
+
+def _reap():
+    with Session(engine) as session:
+        reap(session, settings.REAPER_BATCH_SIZE)
+
+
+reaper = PeriodicTask("reaper", settings.REAPER_INTERVAL_SECONDS, _reap)
@@ -0,0 +1,135 @@
+"""Minimal blocking client for the Redis protocol (RESP2).
+
+Covers what the caches need: sending a command and reading its reply over a
+small pool of sockets. Any server speaking RESP works (Redis, Valkey,
+KeyDB, or the fake the tests run). URLs look like
+``redis://[:password@]host[:port][/db]``.
+"""
+import queue
+import socket
+from typing import Optional, Union
+from urllib.parse import unquote, urlsplit
+
+Reply = Union[None, int, bytes, list]
+
+
+class RedisError(Exception):
+    """An error reply from the server, or a reply this client cannot parse."""
+
+
+def encode_command(*args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def read_reply(stream) -> Reply:
+    line = stream.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by the server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body
+    if kind == b"-":
+        raise RedisError(body.decode(errors="replace"))
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        size = int(body)
+        if size < 0:
+            return None
+        data = stream.read(size + 2)
+        if len(data) != size + 2:
+            raise ConnectionError("Connection closed by the server")
+        return data[:-2]
+    if kind == b"*":
+        size = int(body)
+        return None if size < 0 else [read_reply(stream) for _ in range(size)]
+    raise RedisError(f"Unexpected reply {line[:32]!r}")
+
+
+class Connection:
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stream = self.sock.makefile("rb")
+
+    def execute(self, *args) -> Reply:
+        self.sock.sendall(encode_command(*args))
+        return read_reply(self.stream)
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+
+class RedisClient:
+    """Thread-safe: each command borrows a pooled connection.
+
+    A connection that fails mid-command is discarded rather than returned,
+    since its reply stream may be out of step with its requests.
+    """
+
+    def __init__(self, url: str, timeout: float = 1.0, max_idle: int = 8):
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"Unsupported cache URL {url!r}, expected redis://host:port/db")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.password = unquote(parts.password) if parts.password else None
+        self.timeout = timeout
+        self._idle: queue.LifoQueue[Connection] = queue.LifoQueue(maxsize=max_idle)
+
+    def _connect(self) -> Connection:
+        connection = Connection(self.host, self.port, self.timeout)
+        try:
+            if self.password:
+                connection.execute("AUTH", self.password)
+            if self.db:
+                connection.execute("SELECT", self.db)
+        except Exception:
+            connection.close()
+            raise
+        return connection
+
+    def execute(self, *args) -> Reply:
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        try:
+            reply = connection.execute(*args)
+        except RedisError:
+            self._release(connection)
+            raise
+        except Exception:
+            connection.close()
+            raise
+        self._release(connection)
+        return reply
+
+    def _release(self, connection: Connection):
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.execute("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.execute("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    def incr(self, key: str) -> int:
+        return self.execute("INCR", key)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,29 @@
+"""Authentication router for user login (asyncio database path)."""
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from typing import Annotated
+from app.ratelimit import rate_limit
+from app.database import AsyncSessionDep
+from app.oauth2 import authenticate_user_async, create_access_token
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Authentication"])
+
+@router.post("/login", dependencies=[Depends(rate_limit("login"))])
+async def login(
+    user_credentials: Annotated[OAuth2PasswordRequestForm, Depends()],
+    session: AsyncSessionDep
+):
+    logger.info(f"Login attempt for username: {user_credentials.username}")
+    user = await authenticate_user_async(user_credentials.username, user_credentials.password, session)
+    if not user:
+        logger.warning(f"Login failed for username: {user_credentials.username}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid Credentials"
+        )
+    
+    access_token = create_access_token(data={"user_id": user.id})
+    logger.info(f"User {user.username} logged in successfully")
+    return {"access_token": access_token, "token_type": "bearer"}
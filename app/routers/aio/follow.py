@@ -0,0 +1,97 @@
+"""Follow router for managing user follows (asyncio database path)."""
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from app.database import AsyncSessionDep, is_foreign_key_violation
+from app.models import User, FollowCreate
+from app.ratelimit import rate_limit
+from app.oauth2 import get_current_user_async
+from app import timeline
+from app.counters import follow_count_updates
+from app.routers.follow import add_follow_statement, following_statement, remove_follow_statement, update_suggestions
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Follow"])
+
+@router.post("/follow", status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit("follow"))])
+async def follow_user(
+    follow_in: FollowCreate,
+    session: AsyncSessionDep,
+    current_user: User = Depends(get_current_user_async)
+):
+    logger.info(f"User {current_user.id} attempting to follow user {follow_in.followed_id}")
+    
+    if follow_in.followed_id == current_user.id:
+        logger.warning(f"User {current_user.id} attempted to follow themselves")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Users cannot follow themselves"
+        )
+    
+    try:
+        followed = (await session.exec(
+            add_follow_statement(session.bind.dialect.name, current_user.id, follow_in.followed_id)
+        )).first()
+    except IntegrityError as e:
+        await session.rollback()
+        followed = None
+        if is_foreign_key_violation(e):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User to follow not found"
+            )
+    
+    if followed is None:
+        if (await session.exec(following_statement(current_user.id, follow_in.followed_id))).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User to follow not found"
+            )
+        logger.warning(f"User {current_user.id} already following user {follow_in.followed_id}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Already following this user"
+        )
+    
+    for statement in follow_count_updates(current_user.id, follow_in.followed_id, 1):
+        await session.exec(statement)
+    await session.run_sync(timeline.backfill, current_user.id, follow_in.followed_id)
+    await session.commit()
+    update_suggestions(True, current_user.id, follow_in.followed_id)
+    logger.info(f"User {current_user.id} successfully followed user {follow_in.followed_id}")
+    
+    return {"message": "Successfully followed the user"}
+
+@router.delete("/unfollow/{followed_id}", status_code=status.HTTP_200_OK)
+async def unfollow_user(
+    followed_id: int,
+    session: AsyncSessionDep,
+    current_user: User = Depends(get_current_user_async)
+):
+    logger.info(f"User {current_user.id} attempting to unfollow user {followed_id}")
+    
+    if followed_id == current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot unfollow yourself"
+        )
+    
+    unfollowed = (await session.exec(remove_follow_statement(current_user.id, followed_id))).first()
+    
+    if unfollowed is None:
+        logger.warning(f"User {current_user.id} not following user {followed_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not following this user"
+        )
+    
+    for statement in follow_count_updates(current_user.id, followed_id, -1):
+        await session.exec(statement)
+    await session.run_sync(timeline.prune, current_user.id, followed_id)
+    await session.commit()
+    update_suggestions(False, current_user.id, followed_id)
+    logger.info(f"User {current_user.id} successfully unfollowed user {followed_id}")
+    
+    return {"message": "Successfully unfollowed the user"}
+
+
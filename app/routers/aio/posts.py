@@ -0,0 +1,168 @@
+"""Posts router for creating, reading, updating, and deleting posts (asyncio database path)."""
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
+from app.models import Post, PostCreate, User, PostRead, PostUpdate, PostOut
+from app.database import AsyncSessionDep
+from app.ratelimit import rate_limit
+from app.oauth2 import get_current_user_async, get_optional_user_id
+from app import timeline
+from app import http_cache
+from app import ranking
+from app.feed_cache import feed_cache
+from app.config import settings
+from app.serialization import FastJSONResponse, post_out_list
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor
+from app.reaper import reaper, soft_delete_post
+from app.routers.posts import (
+    FEED_SORT, SEARCH_SORT, FeedSort, is_search, feed_query, read_followed, global_page, feed_items, feed_page,
+    parse_expand, parse_ids, posts_by_ids, expand_items, pending_delta,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Posts"])
+
+@router.post("/posts", response_model=PostRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit("create_post"))])
+async def create_post(
+    post_in: PostCreate,
+    session: AsyncSessionDep,
+    current_user: User = Depends(get_current_user_async)
+):
+    logger.info(f"User {current_user.id} creating post: {post_in.title[:50]}")
+    new_post = Post(**post_in.model_dump(), user_id=current_user.id)
+    new_post.hot_score = ranking.hot_score(0, new_post.created_at, ranking.reference_time())
+    session.add(new_post)
+    await session.flush()
+    await session.run_sync(timeline.fan_out_post, new_post)
+    await session.commit()
+    await feed_cache.invalidate_async()
+    await session.refresh(new_post)
+    return new_post
+
+@router.get("/posts/{id}", response_model=PostOut, response_model_exclude_none=True)
+async def get_post(
+    id: int,
+    session: AsyncSessionDep,
+    request: Request,
+    response: Response,
+    viewer_id: Optional[int] = Depends(get_optional_user_id),
+    expand: str = ""
+):
+    fields = parse_expand(expand)
+    post = http_cache.cached_post(id)
+    if post is None:
+        post = await session.get(Post, id)
+        if not post or post.deleted_at is not None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"post with id: {id} was not found")
+        post = http_cache.cache_post(post)
+    
+    votes = post.vote_count + pending_delta(viewer_id, post.id)
+    item = {"post": post, "votes": votes}
+    if fields:
+        await session.run_sync(expand_items, [item], fields, viewer_id)
+        etag = http_cache.list_etag([item], None)
+    else:
+        etag = http_cache.post_etag(post, votes)
+    cached = http_cache.not_modified(request, response, etag)
+    if cached is not None:
+        return cached
+    return item
+
+@router.get(
+    "/posts", response_model=list[PostOut], response_class=FastJSONResponse, response_model_exclude_none=True,
+    dependencies=[Depends(rate_limit("search", when=is_search))]
+)
+async def get_posts(
+    session: AsyncSessionDep,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user_async),
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = 0,
+    search: str = "",
+    mode: str = "",
+    sort: FeedSort = FEED_SORT,
+    cursor: Optional[str] = None,
+    ids: Optional[str] = None,
+    expand: str = ""
+):
+    logger.info(f"User {current_user.id} fetching posts - mode: {mode}, search: {search}, sort: {sort}")
+    fields = parse_expand(expand)
+    cursor_sort = SEARCH_SORT if search else sort
+    after = decode_cursor(cursor, cursor_sort, 2) if cursor else None
+
+    if ids is not None:
+        posts = await session.run_sync(posts_by_ids, parse_ids(ids))
+        items = feed_items(response, posts, None, current_user.id)
+    elif feed_cache.applies(search, mode):
+        posts, next_page = await feed_cache.fetch_async(
+            sort, limit, offset, cursor, lambda: session.run_sync(global_page, sort, limit, after, offset)
+        )
+        items = feed_items(response, posts, next_page, current_user.id)
+    else:
+        if mode == "followed" and sort == FEED_SORT and not search:
+            rows = await session.run_sync(read_followed, current_user.id, limit, after, offset)
+        else:
+            dialect = session.bind.dialect.name
+            stmt = feed_query(dialect, current_user.id, search, mode, limit, after, offset, sort)
+            rows = (await session.exec(stmt)).all()
+        items = feed_page(response, cursor_sort, limit, rows, current_user.id)
+    if fields:
+        await session.run_sync(expand_items, items, fields, current_user.id)
+    etag = http_cache.list_etag(items, response.headers.get(NEXT_CURSOR_HEADER))
+    cached = http_cache.not_modified(request, response, etag)
+    if cached is not None:
+        return cached
+    if settings.FAST_JSON:
+        return post_out_list(items, response.headers)
+    return items
+    
+@router.delete("/posts/{id}")
+async def delete_post(
+    id: int,
+    session: AsyncSessionDep,
+    current_user: User = Depends(get_current_user_async)
+):
+    logger.info(f"User {current_user.id} deleting post {id}")
+    post = await session.get(Post, id)
+    if not post or post.deleted_at is not None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+    
+    if post.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Unauthorized"
+        )
+    
+    # Votes and timeline rows are removed by the reaper.
+    await session.run_sync(soft_delete_post, post.id)
+    await session.commit()
+    http_cache.invalidate_post(id)
+    await feed_cache.invalidate_async()
+    reaper.trigger()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.put("/posts/{id}")
+async def update_post(
+    id: int,
+    session: AsyncSessionDep,
+    post_in: PostUpdate,
+    current_user: User = Depends(get_current_user_async)
+):
+    logger.info(f"User {current_user.id} updating post {id}")
+    post = await session.get(Post, id)
+    if not post or post.deleted_at is not None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+    
+    if post.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Unauthorized")
+    
+    update_data = post_in.model_dump(exclude_unset=True)
+    post.sqlmodel_update(update_data)
+    post.version = Post.version + 1
+    session.add(post)
+    await session.commit()
+    http_cache.invalidate_post(id)
+    await feed_cache.invalidate_async()
+    await session.refresh(post)
+    return post
@@ -0,0 +1,116 @@
+"""User router for signup and profile reads (asyncio database path)."""
+import logging
+from typing import Optional
+from app.models import User, UserCreate, UserRead, UserProfile, FollowUser, Suggestion
+from app.database import AsyncSessionDep
+from app.security import hash_password_async
+from app.oauth2 import get_current_user_async, get_current_user_id
+from app.feed_cache import feed_cache
+from app.reaper import soft_delete_user
+from app.ratelimit import rate_limit
+from app.serialization import FastJSONResponse
+from app.pagination import decode_cursor
+from app.routers.users import account_deleted, follow_list_query, follow_list_page, suggestion_list
+from fastapi import APIRouter, status, HTTPException, Depends, Query, Response
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Users"])
+
+@router.post("/signup", response_model=UserRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit("signup"))])
+async def signup(user_in: UserCreate, session: AsyncSessionDep):
+    logger.info(f"Signup attempt for username: {user_in.username}")
+    
+    result = await session.exec(select(User).where((User.email == user_in.email) | (User.username == user_in.username)))
+    if result.first():
+        logger.warning(f"Signup failed: email or username already exists")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User with this email or username already exists")
+    
+    hashed_pwd = await hash_password_async(user_in.password)
+    extra_user = User(
+        email = user_in.email, 
+        username = user_in.username, 
+        password_hash= hashed_pwd
+    )
+    session.add(extra_user)
+    await session.commit()
+    await session.refresh(extra_user)
+    logger.info(f"User created successfully: {extra_user.username}")
+    return extra_user
+
+@router.get("/users/me", response_model=UserRead)
+async def get_current_user_profile(
+    current_user: User = Depends(get_current_user_async)
+):
+    logger.info(f"User profile requested: {current_user.username}")
+    return current_user
+
+@router.delete("/users/me", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_current_user(
+    session: AsyncSessionDep,
+    current_user: User = Depends(get_current_user_async)
+):
+    """Hide the account and its posts now; the reaper removes the rest."""
+    logger.info(f"User {current_user.id} deleting their account")
+    post_ids = await session.run_sync(soft_delete_user, current_user.id)
+    await session.commit()
+    account_deleted(current_user.id, post_ids)
+    await feed_cache.invalidate_async()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.get("/users/me/suggestions", response_model=list[Suggestion])
+async def get_suggestions(
+    user_id: int = Depends(get_current_user_id),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Friends-of-friends ranked by mutual connections, served from memory."""
+    return suggestion_list(user_id, limit)
+
+@router.get("/users/{id}", response_model=UserProfile)
+async def get_user_profile(
+    id: int,
+    session: AsyncSessionDep,
+    current_user: User = Depends(get_current_user_async)
+):
+    user = await session.get(User, id)
+    if user is None or user.deleted_at is not None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"user with id: {id} was not found")
+    return user
+
+async def _follow_list(
+    relation: str,
+    id: int,
+    session: AsyncSession,
+    response: Response,
+    limit: int,
+    cursor: Optional[str]
+):
+    after = decode_cursor(cursor, relation, 2) if cursor else None
+    user = await session.get(User, id)
+    if user is None or user.deleted_at is not None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"user with id: {id} was not found")
+    rows = (await session.exec(follow_list_query(relation, id, limit, after))).all()
+    return follow_list_page(response, relation, limit, rows)
+
+@router.get("/users/{id}/followers", response_model=list[FollowUser], response_class=FastJSONResponse)
+async def get_followers(
+    id: int,
+    session: AsyncSessionDep,
+    response: Response,
+    current_user: User = Depends(get_current_user_async),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    return await _follow_list("followers", id, session, response, limit, cursor)
+
+@router.get("/users/{id}/following", response_model=list[FollowUser], response_class=FastJSONResponse)
+async def get_following(
+    id: int,
+    session: AsyncSessionDep,
+    response: Response,
+    current_user: User = Depends(get_current_user_async),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    return await _follow_list("following", id, session, response, limit, cursor)
@@ -0,0 +1,98 @@
+"""Vote router for upvoting/downvoting posts (asyncio database path)."""
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.exc import IntegrityError
+from app.config import settings
+from app.database import AsyncSessionDep, is_foreign_key_violation
+from app.models import VoteCreate, VoteResult, Post, User
+from app import http_cache
+from app import ranking
+from app.serialization import FastJSONResponse
+from app.ratelimit import rate_limit
+from app.oauth2 import get_current_user_async
+from app.routers.vote import (
+    VoteBatch, apply_vote_batch, add_vote_statement, remove_vote_statement, vote_state_statement, queue_vote,
+    queue_vote_batch, rate_limit_batch
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Vote"])
+
+@router.post("/vote", status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit("vote"))])
+async def vote(
+    vote: VoteCreate,
+    session: AsyncSessionDep,
+    response: Response,
+    current_user: User = Depends(get_current_user_async)
+):
+    logger.info(f"User {current_user.id} voting on post {vote.post_id} (dir: {vote.dir})")
+    
+    if settings.VOTE_WRITE_BEHIND:
+        from app.vote_buffer import vote_buffer
+        voted = vote_buffer.state(current_user.id, vote.post_id)
+        if voted is None:
+            row = (await session.exec(vote_state_statement(current_user.id, vote.post_id))).first()
+            voted = None if row is None else row[1] is not None
+        response.status_code = status.HTTP_202_ACCEPTED
+        return queue_vote(current_user.id, vote, voted)
+    
+    if vote.dir == 1:
+        try:
+            added = (await session.exec(
+                add_vote_statement(session.bind.dialect.name, current_user.id, vote.post_id)
+            )).first()
+        except IntegrityError as e:
+            await session.rollback()
+            added = None
+            if is_foreign_key_violation(e):
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+        if added is None:
+            logger.warning(f"User {current_user.id} already voted on post {vote.post_id}")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="User has already voted on this post"
+            )
+        
+        if not await session.run_sync(ranking.bump_vote_count, vote.post_id, 1):
+            # The post exists but has been deleted.
+            await session.rollback()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+        await session.commit()
+        http_cache.invalidate_post(vote.post_id)
+        logger.info(f"Vote added for user {current_user.id} on post {vote.post_id}")
+        return {"message": "Vote added successfully"}
+    
+    else:
+        removed = (await session.exec(remove_vote_statement(current_user.id, vote.post_id))).first()
+        if removed is None:
+            post = await session.get(Post, vote.post_id)
+            if post is None or post.deleted_at is not None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vote does not exist"
+            )
+        
+        if not await session.run_sync(ranking.bump_vote_count, vote.post_id, -1):
+            await session.rollback()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+        await session.commit()
+        http_cache.invalidate_post(vote.post_id)
+        logger.info(f"Vote removed for user {current_user.id} on post {vote.post_id}")
+        return {"message": "Vote removed successfully"}
+
+@router.post(
+    "/votes/batch", response_model=list[VoteResult], response_class=FastJSONResponse,
+    dependencies=[Depends(rate_limit_batch)]
+)
+async def vote_batch(
+    votes: VoteBatch,
+    session: AsyncSessionDep,
+    response: Response,
+    current_user: User = Depends(get_current_user_async)
+):
+    logger.info(f"User {current_user.id} submitting {len(votes)} votes")
+    if settings.VOTE_WRITE_BEHIND:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await session.run_sync(queue_vote_batch, current_user.id, votes)
+    return await session.run_sync(apply_vote_batch, current_user.id, votes)
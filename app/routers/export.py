@@ -0,0 +1,104 @@
+"""NDJSON exports of posts and votes.
+
+Rows are read as plain column tuples with ``yield_per`` (a server-side cursor
+where the driver has one) and written out one batch per chunk, so memory
+stays flat however many rows an export covers. The request's session stays
+open until the response has been sent, which is what lets the generator keep
+reading from it.
+
+Both database modes serve exports from the sync engine: the stream is
+consumed from a threadpool iterator either way.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+from app.config import settings
+from app.database import SessionDep
+from app.models import Post, User, Vote
+from app.ratelimit import rate_limit
+from app.oauth2 import get_current_user, require_admin
+from app.serialization import NDJSON_MEDIA_TYPE, ndjson_chunks
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Export"])
+
+POST_COLUMNS = (Post.id, Post.user_id, Post.title, Post.content, Post.published, Post.created_at, Post.vote_count)
+VOTE_COLUMNS = (Vote.user_id, Vote.post_id, Vote.created_at)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Timestamps are stored as naive UTC.
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def export_statements(user_id: Optional[int], since: Optional[datetime]):
+    """Post and vote selects for one user, or everyone when ``user_id`` is None.
+
+    ``since`` keeps rows created at or after it, so an incremental export
+    passes the time its previous run started. Deleted posts, and votes by
+    deleted users or on deleted posts, are left out while the reaper catches up.
+    """
+    posts = select(*POST_COLUMNS).where(Post.deleted_at == None).order_by(Post.created_at, Post.id)
+    votes = (
+        select(*VOTE_COLUMNS)
+        .join(Post, Post.id == Vote.post_id)
+        .join(User, User.id == Vote.user_id)
+        .where(Post.deleted_at == None, User.deleted_at == None)
+    )
+    if user_id is not None:
+        posts = posts.where(Post.user_id == user_id)
+        votes = votes.where(Vote.user_id == user_id).order_by(Vote.post_id)
+    else:
+        votes = votes.order_by(Vote.created_at)
+    since = _naive_utc(since)
+    if since is not None:
+        posts = posts.where(Post.created_at >= since)
+        votes = votes.where(Vote.created_at >= since)
+    return posts, votes
+
+
+def _records(session: Session, stmt, kind: str) -> Iterator[list[dict]]:
+    result = session.exec(stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+    for rows in result.partitions():
+        yield [{"type": kind, **row._mapping} for row in rows]
+
+
+def export_batches(session: Session, user_id: Optional[int], since: Optional[datetime]) -> Iterator[list[dict]]:
+    posts, votes = export_statements(user_id, since)
+    yield from _records(session, posts, "post")
+    yield from _records(session, votes, "vote")
+
+
+def stream_export(session: Session, user_id: Optional[int], since: Optional[datetime], filename: str):
+    return StreamingResponse(
+        ndjson_chunks(export_batches(session, user_id, since)),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/users/me/export", response_class=StreamingResponse, dependencies=[Depends(rate_limit("export"))])
+def export_own_data(
+    session: SessionDep,
+    current_user: User = Depends(get_current_user),
+    since: Optional[datetime] = None
+):
+    user_id = current_user.id
+    logger.info(f"User {user_id} exporting their data (since: {since})")
+    return stream_export(session, user_id, since, f"export-user-{user_id}.ndjson")
+
+
+@router.get("/admin/export", response_class=StreamingResponse)
+def export_all_data(
+    session: SessionDep,
+    admin_id: int = Depends(require_admin),
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None
+):
+    logger.info(f"Admin {admin_id} exporting {'user ' + str(user_id) if user_id else 'all'} data (since: {since})")
+    return stream_export(session, user_id, since, "export.ndjson")
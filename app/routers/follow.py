@@ -1,15 +1,64 @@
 """Follow router for managing user follows."""
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import select
-from app.database import SessionDep
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import literal
+from sqlmodel import select, delete
+from app.database import SessionDep, insert_ignore, is_foreign_key_violation
 from app.models import Follow, User, FollowCreate
+from app.ratelimit import rate_limit
 from app.oauth2 import get_current_user
+from app import timeline
+from app.counters import bump_follow_counts
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Follow"])
 
-@router.post("/follow", status_code=status.HTTP_201_CREATED)
+def add_follow_statement(dialect: str, follower_id: int, followed_id: int):
+    """Insert a follow of a live user unless it exists.
+
+    The row is selected from ``users`` so a missing or deleted account inserts
+    nothing, like a duplicate does; RETURNING yields no row in either case
+    and ``following_statement`` tells them apart.
+    """
+    followed = select(literal(follower_id), User.id).where(User.id == followed_id, User.deleted_at == None)
+    return (
+        insert_ignore(dialect, Follow)
+        .from_select(["follower_id", "followed_id"], followed)
+        .returning(Follow.followed_id)
+    )
+
+
+def following_statement(follower_id: int, followed_id: int):
+    """Selects the followed id only if the follow exists and its target is live."""
+    return (
+        select(Follow.followed_id)
+        .join(User, User.id == Follow.followed_id)
+        .where(Follow.follower_id == follower_id, Follow.followed_id == followed_id, User.deleted_at == None)
+    )
+
+
+def update_suggestions(added: bool, follower_id: int, followed_id: int):
+    """Tell this worker's suggestion graph about a committed follow or unfollow."""
+    if not settings.SUGGESTIONS_ENABLED:
+        return
+    from app.suggestions import suggestions
+    if added:
+        suggestions.follow(follower_id, followed_id)
+    else:
+        suggestions.unfollow(follower_id, followed_id)
+
+
+def remove_follow_statement(follower_id: int, followed_id: int):
+    return (
+        delete(Follow)
+        .where(Follow.follower_id == follower_id, Follow.followed_id == followed_id)
+        .returning(Follow.followed_id)
+    )
+
+
+@router.post("/follow", status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit("follow"))])
 def follow_user(
     follow_in: FollowCreate,
     session: SessionDep,
@@ -24,32 +73,35 @@ def follow_user(
             detail="Users cannot follow themselves"
         )
     
-    followed_user = session.get(User, follow_in.followed_id)
-    if not followed_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User to follow not found"
-        )
+    try:
+        followed = session.exec(
+            add_follow_statement(session.get_bind().dialect.name, current_user.id, follow_in.followed_id)
+        ).first()
+    except IntegrityError as e:
+        session.rollback()
+        followed = None
+        if is_foreign_key_violation(e):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User to follow not found"
+            )
     
-    query = select(Follow).where(
-        Follow.follower_id == current_user.id,
-        Follow.followed_id == follow_in.followed_id
-    )
-    found_follow = session.exec(query).first()
-    
-    if found_follow:
+    if followed is None:
+        if session.exec(following_statement(current_user.id, follow_in.followed_id)).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User to follow not found"
+            )
         logger.warning(f"User {current_user.id} already following user {follow_in.followed_id}")
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Already following this user"
         )
     
-    new_follow = Follow(
-        follower_id=current_user.id,
-        followed_id=follow_in.followed_id
-    )
-    session.add(new_follow)
+    bump_follow_counts(session, current_user.id, follow_in.followed_id, 1)
+    timeline.backfill(session, current_user.id, follow_in.followed_id)
     session.commit()
+    update_suggestions(True, current_user.id, follow_in.followed_id)
     logger.info(f"User {current_user.id} successfully followed user {follow_in.followed_id}")
     
     return {"message": "Successfully followed the user"}
@@ -68,21 +120,19 @@ def unfollow_user(
             detail="Cannot unfollow yourself"
         )
     
-    query = select(Follow).where(
-        Follow.follower_id == current_user.id,
-        Follow.followed_id == followed_id
-    )
-    found_follow = session.exec(query).first()
+    unfollowed = session.exec(remove_follow_statement(current_user.id, followed_id)).first()
     
-    if not found_follow:
+    if unfollowed is None:
         logger.warning(f"User {current_user.id} not following user {followed_id}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Not following this user"
         )
     
-    session.delete(found_follow)
+    bump_follow_counts(session, current_user.id, followed_id, -1)
+    timeline.prune(session, current_user.id, followed_id)
     session.commit()
+    update_suggestions(False, current_user.id, followed_id)
     logger.info(f"User {current_user.id} successfully unfollowed user {followed_id}")
     
     return {"message": "Successfully unfollowed the user"}
@@ -0,0 +1,28 @@
+"""Internal operational endpoints, hidden from the public API schema.
+
+They expose process and pool internals, so only ``ADMIN_USER_IDS`` may call them.
+"""
+import os
+from fastapi import APIRouter, Depends
+from app.database import POOL_WAIT, POOL_TIMEOUTS, pools, pool_status
+from app.oauth2 import require_admin
+
+router = APIRouter(
+    prefix="/internal", tags=["Internal"], include_in_schema=False, dependencies=[Depends(require_admin)]
+)
+
+@router.get("/pool")
+def get_pool_status():
+    """Connection pool occupancy and checkout waits for this worker process."""
+    return {
+        "pid": os.getpid(),
+        "pools": {
+            label: {
+                **pool_status(target),
+                "checkout_waits": POOL_WAIT.count(pool=label),
+                "checkout_wait_seconds_total": POOL_WAIT.sum(pool=label),
+                "checkout_timeouts": POOL_TIMEOUTS.value(pool=label),
+            }
+            for label, target in pools().items()
+        },
+    }
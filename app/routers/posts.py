@@ -1,15 +1,192 @@
 """Posts router for creating, reading, updating, and deleting posts."""
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlmodel import select, func
-from app.models import Post, PostCreate, User, PostRead, PostUpdate, PostOut, Vote, Follow
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
+from sqlmodel import Session, select, col
+from app.models import Post, PostCreate, User, PostRead, PostUpdate, PostOut, Follow, Vote
 from app.database import SessionDep
-from app.oauth2 import get_current_user
+from app.ratelimit import rate_limit
+from app.oauth2 import get_current_user, get_optional_user_id
+from app import timeline
+from app import search as search_index
+from app import http_cache
+from app import ranking
+from app.feed_cache import feed_cache
+from app.config import settings
+from app.serialization import FastJSONResponse, post_out_list
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, keyset_after
+from app.reaper import reaper, soft_delete_post
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Posts"])
 
-@router.post("/posts", response_model=PostRead, status_code=status.HTTP_201_CREATED)
+FEED_SORT = "new"
+SEARCH_SORT = "relevance"
+FEED_ORDERS = {
+    "new": (Post.created_at, Post.id),
+    "hot": (Post.hot_score, Post.id),
+    "top": (Post.vote_count, Post.id),
+}
+FeedSort = Literal["hot", "new", "top"]
+EXPANSIONS = ("author", "my_vote")
+MAX_IDS = 100
+
+def is_search(request: Request) -> bool:
+    return bool(request.query_params.get("search"))
+
+def feed_query(
+    dialect: str,
+    user_id: int,
+    search: str,
+    mode: str,
+    limit: int,
+    after: Optional[list] = None,
+    offset: int = 0,
+    sort: str = FEED_SORT
+):
+    """Select ``(Post, sort key)`` rows for a page of the global or searched feed.
+
+    Searches rank by relevance; otherwise ``sort`` picks one of
+    ``FEED_ORDERS``, each backed by a ``(published, key, id)`` index.
+    """
+    if search:
+        ranked = search_index.match(dialect, search)
+        order = (ranked.c.score, Post.id)
+        stmt = select(Post, ranked.c.score).join(ranked, ranked.c.id == Post.id)
+    else:
+        order = FEED_ORDERS[sort]
+        stmt = select(Post, order[0])
+    stmt = (
+        stmt.where(Post.published == True, Post.deleted_at == None)
+        .order_by(*(column.desc() for column in order))
+    )
+    if mode == "followed":
+        subquery = (
+            select(Follow.followed_id)
+            .where(Follow.follower_id == user_id)
+        )
+        stmt = stmt.where(Post.user_id.in_(subquery))
+    if after is not None:
+        stmt = stmt.where(keyset_after(order, after))
+    else:
+        stmt = stmt.offset(offset)
+    return stmt.limit(limit)
+
+def global_page(session: Session, sort: str, limit: int, after: Optional[list] = None, offset: int = 0):
+    """A page of the unfiltered feed as ``(posts, next cursor)``, the shape ``feed_cache`` stores."""
+    rows = session.exec(feed_query(session.get_bind().dialect.name, None, "", "", limit, after, offset, sort)).all()
+    return [post for post, _ in rows], next_cursor(sort, limit, rows)
+
+def read_followed(
+    session: Session,
+    user_id: int,
+    limit: int,
+    after: Optional[list] = None,
+    offset: int = 0
+):
+    """Read a page of the caller's home timeline as ``(Post, sort key)`` rows."""
+    posts = timeline.read(session, user_id, limit, after=after, offset=offset)
+    return [(post, post.created_at) for post in posts]
+
+def next_cursor(sort: str, limit: int, rows) -> Optional[str]:
+    if len(rows) < limit:
+        return None
+    post, key = rows[-1]
+    return encode_cursor(sort, (key, post.id))
+
+def pending_delta(user_id: Optional[int], post_id: int) -> int:
+    """Change the viewer's buffered votes make to the post's count.
+
+    ``app.vote_buffer`` is only imported when ``VOTE_WRITE_BEHIND`` is on.
+    """
+    if not settings.VOTE_WRITE_BEHIND:
+        return 0
+    from app.vote_buffer import vote_buffer
+    return vote_buffer.pending_delta(user_id, post_id)
+
+def buffered_vote(user_id: int, post_id: int) -> Optional[bool]:
+    """The viewer's buffered vote on the post, if write-behind holds one."""
+    if not settings.VOTE_WRITE_BEHIND:
+        return None
+    from app.vote_buffer import vote_buffer
+    return vote_buffer.state(user_id, post_id)
+
+def feed_items(response: Response, posts: list[Post], cursor: Optional[str], viewer_id: Optional[int] = None) -> list[dict]:
+    """Shape a page of posts for ``PostOut`` and attach the next-page cursor.
+
+    Counts include the viewer's own votes still waiting in the write-behind buffer.
+    """
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+    return [
+        {"post": post, "votes": post.vote_count + pending_delta(viewer_id, post.id)}
+        for post in posts
+    ]
+
+def feed_page(response: Response, sort: str, limit: int, rows, viewer_id: Optional[int] = None) -> list[dict]:
+    """``feed_items`` for ``(Post, sort key)`` rows."""
+    return feed_items(response, [post for post, _ in rows], next_cursor(sort, limit, rows), viewer_id)
+
+def parse_expand(expand: str) -> frozenset[str]:
+    """``expand=author,my_vote`` as a set of field names."""
+    fields = frozenset(field.strip() for field in expand.split(",") if field.strip())
+    unknown = fields.difference(EXPANSIONS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown expand field(s) {', '.join(sorted(unknown))}; expected {', '.join(EXPANSIONS)}"
+        )
+    return fields
+
+def parse_ids(ids: str) -> list[int]:
+    """``ids=3,1,2`` as distinct post ids, in the order given."""
+    try:
+        post_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        post_ids = []
+    if not post_ids or len(post_ids) > MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must be a comma-separated list of 1 to {MAX_IDS} post ids"
+        )
+    return post_ids
+
+def posts_by_ids(session: Session, post_ids: list[int]) -> list[Post]:
+    """The posts among ``post_ids`` that exist, in the order asked for, with one query."""
+    found = {
+        post.id: post
+        for post in session.exec(select(Post).where(col(Post.id).in_(post_ids), Post.deleted_at == None))
+    }
+    return [found[post_id] for post_id in post_ids if post_id in found]
+
+def expand_items(session: Session, items: list[dict], expand: frozenset[str], viewer_id: Optional[int]) -> list[dict]:
+    """Fill the ``expand`` fields of ``PostOut`` items with one query per field for the whole page.
+
+    ``my_vote`` needs a caller and is left out for anonymous reads; it
+    reflects votes still waiting in the write-behind buffer.
+    """
+    if not items:
+        return items
+    if "author" in expand:
+        user_ids = {item["post"].user_id for item in items}
+        authors = {
+            user_id: {"id": user_id, "username": username}
+            for user_id, username in session.exec(select(User.id, User.username).where(col(User.id).in_(user_ids)))
+        }
+        for item in items:
+            item["author"] = authors.get(item["post"].user_id)
+    if "my_vote" in expand and viewer_id is not None:
+        post_ids = [item["post"].id for item in items]
+        voted = set(session.exec(
+            select(Vote.post_id).where(Vote.user_id == viewer_id, col(Vote.post_id).in_(post_ids))
+        ))
+        for item in items:
+            post_id = item["post"].id
+            buffered = buffered_vote(viewer_id, post_id)
+            item["my_vote"] = post_id in voted if buffered is None else buffered
+    return items
+
+@router.post("/posts", response_model=PostRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit("create_post"))])
 def create_post(
     post_in: PostCreate,
     session: SessionDep,
@@ -17,47 +194,91 @@ def create_post(
 ):
     logger.info(f"User {current_user.id} creating post: {post_in.title[:50]}")
     new_post = Post(**post_in.model_dump(), user_id=current_user.id)
+    new_post.hot_score = ranking.hot_score(0, new_post.created_at, ranking.reference_time())
     session.add(new_post)
+    session.flush()
+    timeline.fan_out_post(session, new_post)
     session.commit()
+    feed_cache.invalidate()
     session.refresh(new_post)
     return new_post
 
-@router.get("/posts/{id}", response_model=PostOut) 
-def get_post(id: int, session: SessionDep):
-    post = session.get(Post, id)
-    if not post:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"post with id: {id} was not found")
+@router.get("/posts/{id}", response_model=PostOut, response_model_exclude_none=True)
+def get_post(
+    id: int,
+    session: SessionDep,
+    request: Request,
+    response: Response,
+    viewer_id: Optional[int] = Depends(get_optional_user_id),
+    expand: str = ""
+):
+    fields = parse_expand(expand)
+    post = http_cache.cached_post(id)
+    if post is None:
+        post = session.get(Post, id)
+        if not post or post.deleted_at is not None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"post with id: {id} was not found")
+        post = http_cache.cache_post(post)
     
-    votes = session.exec(select(func.count(Vote.post_id)).where(Vote.post_id == id)).one()
-    return {"post": post, "votes": votes}
+    votes = post.vote_count + pending_delta(viewer_id, post.id)
+    item = {"post": post, "votes": votes}
+    if fields:
+        expand_items(session, [item], fields, viewer_id)
+        etag = http_cache.list_etag([item], None)
+    else:
+        etag = http_cache.post_etag(post, votes)
+    cached = http_cache.not_modified(request, response, etag)
+    if cached is not None:
+        return cached
+    return item
 
-@router.get("/posts", response_model=list[PostOut])
+@router.get(
+    "/posts", response_model=list[PostOut], response_class=FastJSONResponse, response_model_exclude_none=True,
+    dependencies=[Depends(rate_limit("search", when=is_search))]
+)
 def get_posts(
     session: SessionDep,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=100),
     offset: int = 0,
     search: str = "",
-    mode: str = ""
+    mode: str = "",
+    sort: FeedSort = FEED_SORT,
+    cursor: Optional[str] = None,
+    ids: Optional[str] = None,
+    expand: str = ""
 ):
-    logger.info(f"User {current_user.id} fetching posts - mode: {mode}, search: {search}")
-    stmt = (
-        select(Post, func.count(Vote.post_id).label("votes"))
-        .join(Vote, Vote.post_id == Post.id, isouter=True)
-        .group_by(Post.id)
-        .where(Post.title.like(f"%{search}%"))
-        .where(Post.published == True)
-    )
-    if mode == "followed":
-        subquery = (
-            select(Follow.followed_id)
-            .where(Follow.follower_id == current_user.id)
+    logger.info(f"User {current_user.id} fetching posts - mode: {mode}, search: {search}, sort: {sort}")
+    fields = parse_expand(expand)
+    cursor_sort = SEARCH_SORT if search else sort
+    after = decode_cursor(cursor, cursor_sort, 2) if cursor else None
+
+    if ids is not None:
+        items = feed_items(response, posts_by_ids(session, parse_ids(ids)), None, current_user.id)
+    elif feed_cache.applies(search, mode):
+        posts, next_page = feed_cache.fetch(
+            sort, limit, offset, cursor, lambda: global_page(session, sort, limit, after, offset)
         )
-        stmt = stmt.where(Post.user_id.in_(subquery))
-    stmt = stmt.limit(limit).offset(offset)
-    
-    results = session.exec(stmt).all()
-    return [{"post": post, "votes": votes} for post, votes in results]
+        items = feed_items(response, posts, next_page, current_user.id)
+    else:
+        if mode == "followed" and sort == FEED_SORT and not search:
+            rows = read_followed(session, current_user.id, limit, after, offset)
+        else:
+            dialect = session.get_bind().dialect.name
+            stmt = feed_query(dialect, current_user.id, search, mode, limit, after, offset, sort)
+            rows = session.exec(stmt).all()
+        items = feed_page(response, cursor_sort, limit, rows, current_user.id)
+    if fields:
+        expand_items(session, items, fields, current_user.id)
+    etag = http_cache.list_etag(items, response.headers.get(NEXT_CURSOR_HEADER))
+    cached = http_cache.not_modified(request, response, etag)
+    if cached is not None:
+        return cached
+    if settings.FAST_JSON:
+        return post_out_list(items, response.headers)
+    return items
     
 @router.delete("/posts/{id}")
 def delete_post(
@@ -67,7 +288,7 @@ def delete_post(
 ):
     logger.info(f"User {current_user.id} deleting post {id}")
     post = session.get(Post, id)
-    if not post:
+    if not post or post.deleted_at is not None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
     
     if post.user_id != current_user.id:
@@ -76,8 +297,12 @@ def delete_post(
             detail="Unauthorized"
         )
     
-    session.delete(post)
+    # Votes and timeline rows are removed by the reaper.
+    soft_delete_post(session, post.id)
     session.commit()
+    http_cache.invalidate_post(id)
+    feed_cache.invalidate()
+    reaper.trigger()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.put("/posts/{id}")
@@ -89,7 +314,7 @@ def update_post(
 ):
     logger.info(f"User {current_user.id} updating post {id}")
     post = session.get(Post, id)
-    if not post:
+    if not post or post.deleted_at is not None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
     
     if post.user_id != current_user.id:
@@ -97,8 +322,11 @@ def update_post(
     
     update_data = post_in.model_dump(exclude_unset=True)
     post.sqlmodel_update(update_data)
+    post.version = Post.version + 1
     session.add(post)
     session.commit()
+    http_cache.invalidate_post(id)
+    feed_cache.invalidate()
     session.refresh(post)
     return post
 
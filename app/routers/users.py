@@ -1,32 +1,84 @@
 import logging
-from app.models import User, UserCreate, UserRead
+from typing import Optional
+from app.models import User, UserCreate, UserRead, UserProfile, FollowUser, Suggestion, Follow
 from app.database import SessionDep
-from app.security import hash_password
-from app.oauth2 import get_current_user
-from fastapi import APIRouter, status, HTTPException, Depends
-from sqlmodel import select
+from app.security import hash_password_async
+from app.oauth2 import get_current_user, get_current_user_id, invalidate_principal
+from app.config import settings
+from app.feed_cache import feed_cache
+from app.reaper import reaper, soft_delete_user
+from app import http_cache
+from app.ratelimit import rate_limit
+from app.serialization import FastJSONResponse
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, keyset_after
+from fastapi import APIRouter, status, HTTPException, Depends, Query, Response
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import Session, select
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Users"])
 
-@router.post("/signup", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def signup(user_in: UserCreate, session: SessionDep):
+def _find_existing_user(session: Session, user_in: UserCreate):
+    return session.exec(select(User).where((User.email == user_in.email) | (User.username == user_in.username))).first()
+
+def follow_list_query(relation: str, user_id: int, limit: int, after: Optional[list] = None):
+    """Select ``(id, username, followed_at)`` for a page of a user's followers or
+    followings, newest follow first.
+
+    Pages by ``(Follow.created_at, other user id)`` so each page is a range
+    scan on ``ix_follows_followed_created``/``ix_follows_follower_created``,
+    however many follows the user has.
+    """
+    if relation == "followers":
+        own, other = Follow.followed_id, Follow.follower_id
+    else:
+        own, other = Follow.follower_id, Follow.followed_id
+    order = (Follow.created_at, other)
+    stmt = (
+        select(User.id, User.username, Follow.created_at)
+        .join(User, User.id == other)
+        .where(own == user_id, User.deleted_at == None)
+        .order_by(*(column.desc() for column in order))
+    )
+    if after is not None:
+        stmt = stmt.where(keyset_after(order, after))
+    return stmt.limit(limit)
+
+def follow_list_page(response: Response, relation: str, limit: int, rows):
+    """Shape a page of ``follow_list_query`` rows as ``list[FollowUser]``.
+
+    The dicts are built in ``FollowUser`` field order, so with ``FAST_JSON``
+    they skip validation and are rendered directly.
+    """
+    if len(rows) == limit:
+        user_id, _, followed_at = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(relation, (followed_at, user_id))
+    page = [{"id": user_id, "username": username, "followed_at": followed_at} for user_id, username, followed_at in rows]
+    if settings.FAST_JSON:
+        return FastJSONResponse(page, headers=dict(response.headers))
+    return page
+
+def _insert_user(session: Session, user: User):
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+
+@router.post("/signup", response_model=UserRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit("signup"))])
+async def signup(user_in: UserCreate, session: SessionDep):
     logger.info(f"Signup attempt for username: {user_in.username}")
     
-    existing_user = session.exec(select(User).where((User.email == user_in.email) | (User.username == user_in.username))).first()
+    existing_user = await run_in_threadpool(_find_existing_user, session, user_in)
     if existing_user:
         logger.warning(f"Signup failed: email or username already exists")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User with this email or username already exists")
     
-    hashed_pwd = hash_password(user_in.password)
+    hashed_pwd = await hash_password_async(user_in.password)
     extra_user = User(
         email = user_in.email, 
         username = user_in.username, 
         password_hash= hashed_pwd
     )
-    session.add(extra_user)
-    session.commit()
-    session.refresh(extra_user)
+    await run_in_threadpool(_insert_user, session, extra_user)
     logger.info(f"User created successfully: {extra_user.username}")
     return extra_user
 
@@ -36,3 +88,93 @@ def get_current_user_profile(
 ):
     logger.info(f"User profile requested: {current_user.username}")
     return current_user
+
+def account_deleted(user_id: int, post_ids: list[int]):
+    """Drop the deleted account from this worker's caches and wake the reaper."""
+    invalidate_principal(user_id)
+    http_cache.invalidate_post(*post_ids)
+    if settings.SUGGESTIONS_ENABLED:
+        from app.suggestions import suggestions
+        suggestions.remove_user(user_id)
+    if settings.VOTE_WRITE_BEHIND:
+        from app.vote_buffer import vote_buffer
+        vote_buffer.discard_user(user_id)
+    reaper.trigger()
+
+@router.delete("/users/me", status_code=status.HTTP_204_NO_CONTENT)
+def delete_current_user(
+    session: SessionDep,
+    current_user: User = Depends(get_current_user)
+):
+    """Hide the account and its posts now; the reaper removes the rest."""
+    logger.info(f"User {current_user.id} deleting their account")
+    post_ids = soft_delete_user(session, current_user.id)
+    session.commit()
+    account_deleted(current_user.id, post_ids)
+    feed_cache.invalidate()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+def suggestion_list(user_id: int, limit: int) -> list[dict]:
+    if not settings.SUGGESTIONS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Suggestions are disabled")
+    from app.suggestions import suggestions
+    return [
+        {"id": candidate, "mutual_connections": mutuals}
+        for candidate, mutuals in suggestions.suggest(user_id, limit)
+    ]
+
+@router.get("/users/me/suggestions", response_model=list[Suggestion])
+def get_suggestions(
+    user_id: int = Depends(get_current_user_id),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Friends-of-friends ranked by mutual connections, served from memory."""
+    return suggestion_list(user_id, limit)
+
+@router.get("/users/{id}", response_model=UserProfile)
+def get_user_profile(
+    id: int,
+    session: SessionDep,
+    current_user: User = Depends(get_current_user)
+):
+    user = session.get(User, id)
+    if user is None or user.deleted_at is not None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"user with id: {id} was not found")
+    return user
+
+def _follow_list(
+    relation: str,
+    id: int,
+    session: Session,
+    response: Response,
+    limit: int,
+    cursor: Optional[str]
+):
+    after = decode_cursor(cursor, relation, 2) if cursor else None
+    user = session.get(User, id)
+    if user is None or user.deleted_at is not None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"user with id: {id} was not found")
+    rows = session.exec(follow_list_query(relation, id, limit, after)).all()
+    return follow_list_page(response, relation, limit, rows)
+
+@router.get("/users/{id}/followers", response_model=list[FollowUser], response_class=FastJSONResponse)
+def get_followers(
+    id: int,
+    session: SessionDep,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    return _follow_list("followers", id, session, response, limit, cursor)
+
+@router.get("/users/{id}/following", response_model=list[FollowUser], response_class=FastJSONResponse)
+def get_following(
+    id: int,
+    session: SessionDep,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    return _follow_list("following", id, session, response, limit, cursor)
@@ -1,54 +1,245 @@
 """Vote router for upvoting/downvoting posts."""
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.database import SessionDep
-from app.models import Vote, VoteCreate, Post, User
+from typing import Annotated, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status
+from sqlalchemy.exc import IntegrityError
+from app.config import settings
+from app.database import SessionDep, insert_ignore, is_foreign_key_violation
+from app.models import Vote, VoteCreate, VoteResult, Post, User
+from app import http_cache
+from app import ranking
+from app.serialization import FastJSONResponse
+from app.ratelimit import rate_limit, check_async as check_rate_limit
 from app.oauth2 import get_current_user
-from sqlmodel import select
+from app.counters import bulk_vote_count_update
+from sqlmodel import Session, select, delete, col, and_
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Vote"])
 
-@router.post("/vote", status_code=status.HTTP_201_CREATED)
+MAX_BATCH_VOTES = 100
+
+VoteBatch = Annotated[list[VoteCreate], Body(min_length=1, max_length=MAX_BATCH_VOTES)]
+
+
+async def rate_limit_batch(request: Request, votes: VoteBatch):
+    """The ``vote`` limit for ``/votes/batch``, one token per vote in the batch.
+
+    A dependency like ``rate_limit``, so callers over the limit are turned
+    away before authentication and the database session.
+    """
+    await check_rate_limit("vote", request, cost=len(votes))
+
+
+def add_vote_statement(dialect: str, user_id: int, post_id: int):
+    """Insert a vote unless it exists; RETURNING yields no row for a duplicate.
+
+    A missing post surfaces as a foreign key violation from the database.
+    """
+    return (
+        insert_ignore(dialect, Vote)
+        .values(user_id=user_id, post_id=post_id)
+        .returning(Vote.post_id)
+    )
+
+
+def remove_vote_statement(user_id: int, post_id: int):
+    return (
+        delete(Vote)
+        .where(Vote.user_id == user_id, Vote.post_id == post_id)
+        .returning(Vote.post_id)
+    )
+
+
+def vote_state_statement(user_id: int, post_id: int):
+    """Select ``(post id, voter id)``: no row if the post is missing, NULL voter if not voted."""
+    return (
+        select(Post.id, Vote.user_id)
+        .outerjoin(Vote, and_(Vote.post_id == Post.id, Vote.user_id == user_id))
+        .where(Post.id == post_id, Post.deleted_at == None)
+    )
+
+
+def queue_vote(user_id: int, vote: VoteCreate, voted: Optional[bool]) -> dict:
+    """Acknowledge a vote from the write-behind buffer.
+
+    ``voted`` is the caller's current state (None if the post does not exist);
+    the 404/409 answers match the direct write path.
+    """
+    from app.vote_buffer import vote_buffer
+    if voted is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+    if not vote_buffer.submit(user_id, vote.post_id, vote.dir, voted):
+        if vote.dir == 1:
+            logger.warning(f"User {user_id} already voted on post {vote.post_id}")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="User has already voted on this post"
+            )
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vote does not exist")
+    logger.info(f"Vote queued for user {user_id} on post {vote.post_id} (dir: {vote.dir})")
+    return {"message": "Vote accepted"}
+
+
+def batch_state(session: Session, user_id: int, votes: list[VoteCreate]) -> tuple[set[int], set[int]]:
+    """The batch's live post ids, and those among them the user has a stored vote on."""
+    post_ids = {item.post_id for item in votes}
+    existing_posts = set(session.exec(
+        select(Post.id).where(col(Post.id).in_(post_ids), Post.deleted_at == None)
+    ).all())
+    voted = set(session.exec(
+        select(Vote.post_id).where(Vote.user_id == user_id, col(Vote.post_id).in_(existing_posts))
+    ).all()) if existing_posts else set()
+    return existing_posts, voted
+
+
+def queue_vote_batch(session: Session, user_id: int, votes: list[VoteCreate]) -> list[dict]:
+    """Write-behind form of ``apply_vote_batch``: each item goes through the buffer.
+
+    Items are checked against the stored votes plus anything already
+    buffered, exactly as ``POST /vote`` does, so the flusher stays the only
+    writer for the caller's votes.
+    """
+    from app.vote_buffer import vote_buffer
+    existing_posts, voted = batch_state(session, user_id, votes)
+    results = []
+    for item in votes:
+        if item.post_id not in existing_posts:
+            outcome = "post_not_found"
+        elif vote_buffer.submit(user_id, item.post_id, item.dir, item.post_id in voted):
+            outcome = "added" if item.dir == 1 else "removed"
+        else:
+            outcome = "already_voted" if item.dir == 1 else "not_voted"
+        results.append({"post_id": item.post_id, "dir": item.dir, "status": outcome})
+    return results
+
+
+def apply_vote_batch(session: Session, user_id: int, votes: list[VoteCreate]) -> list[dict]:
+    """Apply a list of votes in one transaction with a fixed number of statements.
+
+    Items are resolved in order against the caller's current votes, so a
+    later item sees the effect of an earlier one on the same post. Only the
+    net change per post is written.
+    """
+    existing_posts, voted = batch_state(session, user_id, votes)
+
+    state = set(voted)
+    results = []
+    for item in votes:
+        if item.post_id not in existing_posts:
+            outcome = "post_not_found"
+        elif item.dir == 1:
+            outcome = "already_voted" if item.post_id in state else "added"
+            state.add(item.post_id)
+        else:
+            outcome = "removed" if item.post_id in state else "not_voted"
+            state.discard(item.post_id)
+        results.append({"post_id": item.post_id, "dir": item.dir, "status": outcome})
+
+    added = state - voted
+    removed = voted - state
+    # Count only rows actually written, so a concurrent request touching the
+    # same votes cannot push the counters out of step.
+    if added:
+        votes_table = Vote.__table__
+        added = set(session.exec(
+            insert_ignore(session.get_bind().dialect.name, votes_table)
+            .values([{"user_id": user_id, "post_id": post_id} for post_id in added])
+            .returning(votes_table.c.post_id)
+        ).scalars())
+    if removed:
+        removed = set(session.exec(
+            delete(Vote)
+            .where(Vote.user_id == user_id, col(Vote.post_id).in_(removed))
+            .returning(Vote.post_id)
+        ).scalars())
+    if added or removed:
+        session.exec(
+            bulk_vote_count_update(),
+            params=[{"post_id": post_id, "delta": 1} for post_id in added]
+            + [{"post_id": post_id, "delta": -1} for post_id in removed]
+        )
+        ranking.rescore(session, added | removed)
+    session.commit()
+    http_cache.invalidate_post(*added, *removed)
+    return results
+
+
+@router.post("/vote", status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit("vote"))])
 def vote(
     vote: VoteCreate,
     session: SessionDep,
+    response: Response,
     current_user: User = Depends(get_current_user)
 ):
     logger.info(f"User {current_user.id} voting on post {vote.post_id} (dir: {vote.dir})")
     
-    post = session.get(Post, vote.post_id)
-    if not post:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
-    
-    query = select(Vote).where(
-        Vote.post_id == vote.post_id,
-        Vote.user_id == current_user.id
-    )
-    found_vote = session.exec(query).first()    
+    if settings.VOTE_WRITE_BEHIND:
+        from app.vote_buffer import vote_buffer
+        voted = vote_buffer.state(current_user.id, vote.post_id)
+        if voted is None:
+            row = session.exec(vote_state_statement(current_user.id, vote.post_id)).first()
+            voted = None if row is None else row[1] is not None
+        response.status_code = status.HTTP_202_ACCEPTED
+        return queue_vote(current_user.id, vote, voted)
     
     if vote.dir == 1:
-        if found_vote:
+        try:
+            added = session.exec(
+                add_vote_statement(session.get_bind().dialect.name, current_user.id, vote.post_id)
+            ).first()
+        except IntegrityError as e:
+            session.rollback()
+            added = None
+            if is_foreign_key_violation(e):
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+        if added is None:
             logger.warning(f"User {current_user.id} already voted on post {vote.post_id}")
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="User has already voted on this post"
             )
         
-        new_vote = Vote(post_id=vote.post_id, user_id=current_user.id)
-        session.add(new_vote)
+        if not ranking.bump_vote_count(session, vote.post_id, 1):
+            # The post exists but has been deleted.
+            session.rollback()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
         session.commit()
+        http_cache.invalidate_post(vote.post_id)
         logger.info(f"Vote added for user {current_user.id} on post {vote.post_id}")
         return {"message": "Vote added successfully"}
     
     else:
-        if not found_vote:
+        removed = session.exec(remove_vote_statement(current_user.id, vote.post_id)).first()
+        if removed is None:
+            post = session.get(Post, vote.post_id)
+            if post is None or post.deleted_at is not None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Vote does not exist"
             )
         
-        session.delete(found_vote)
+        if not ranking.bump_vote_count(session, vote.post_id, -1):
+            session.rollback()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
         session.commit()
+        http_cache.invalidate_post(vote.post_id)
         logger.info(f"Vote removed for user {current_user.id} on post {vote.post_id}")
         return {"message": "Vote removed successfully"}
+
+@router.post(
+    "/votes/batch", response_model=list[VoteResult], response_class=FastJSONResponse,
+    dependencies=[Depends(rate_limit_batch)]
+)
+def vote_batch(
+    votes: VoteBatch,
+    session: SessionDep,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
+    logger.info(f"User {current_user.id} submitting {len(votes)} votes")
+    if settings.VOTE_WRITE_BEHIND:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return queue_vote_batch(session, current_user.id, votes)
+    return apply_vote_batch(session, current_user.id, votes)
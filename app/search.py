@@ -0,0 +1,106 @@
+"""Full-text search over post titles and content.
+
+SQLite uses an external-content FTS5 table and Postgres a generated
+``tsvector`` column with a GIN index. Both are maintained by the database
+itself (triggers / generated column), so every insert, update and delete of a
+post is indexed in the same transaction as the write, whichever code path
+issued it. Other backends fall back to an unranked ``LIKE`` scan.
+"""
+import logging
+import re
+from sqlalchemy import DDL, event, literal_column, table, column
+from sqlmodel import Session, select, literal, or_, false, func
+from app.models import Post
+
+logger = logging.getLogger(__name__)
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+    "title, content, content='posts', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN "
+    "INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF title, content ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+]
+
+POSTGRES_DDL = [
+    "ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)",
+]
+
+for statement in SQLITE_DDL:
+    event.listen(Post.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_DDL:
+    event.listen(Post.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(
+    Post.__table__, "before_drop", DDL("DROP TABLE IF EXISTS posts_fts").execute_if(dialect="sqlite")
+)
+
+# Title matches outweigh body matches in both engines.
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+fts = table("posts_fts", column("rowid"))
+
+
+def terms(text: str) -> list[str]:
+    """Split user input into plain word tokens safe to embed in a query."""
+    return re.findall(r"\w+", text)
+
+
+def match(dialect: str, text: str):
+    """Subquery of ``(id, score)`` for posts matching ``text``.
+
+    ``dialect`` is the name of the SQLAlchemy dialect the query will run on.
+    Higher scores are better matches. Every term must match, as a prefix, in
+    either the title or the content.
+    """
+    words = terms(text)
+
+    if not words:
+        return select(Post.id, literal(0.0).label("score")).where(false()).subquery()
+
+    if dialect == "sqlite":
+        query = " ".join(f'"{word}"*' for word in words)
+        score = -func.bm25(literal_column("posts_fts"), TITLE_WEIGHT, CONTENT_WEIGHT)
+        return (
+            select(fts.c.rowid.label("id"), score.label("score"))
+            .where(literal_column("posts_fts").op("MATCH")(query))
+            .subquery()
+        )
+
+    if dialect == "postgresql":
+        tsquery = func.to_tsquery("english", " & ".join(f"{word}:*" for word in words))
+        vector = literal_column("posts.search_vector")
+        return (
+            select(Post.id, func.ts_rank(vector, tsquery).label("score"))
+            .where(vector.op("@@")(tsquery))
+            .subquery()
+        )
+
+    pattern = [f"%{word}%" for word in words]
+    return (
+        select(Post.id, literal(0.0).label("score"))
+        .where(*(or_(Post.title.like(p), Post.content.like(p)) for p in pattern))
+        .subquery()
+    )
+
+
+def install(session: Session):
+    """Create the search structures on an existing database and reindex it."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_DDL:
+            session.connection().exec_driver_sql(statement)
+        session.connection().exec_driver_sql("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+    elif dialect == "postgresql":
+        for statement in POSTGRES_DDL:
+            session.connection().exec_driver_sql(statement)
+    else:
+        logger.warning(f"No full-text index available for {dialect}, search falls back to LIKE")
+    session.commit()
@@ -1,13 +1,90 @@
-from pwdlib import PasswordHash
+"""Password hashing.
+
+Argon2 is deliberately CPU- and memory-hungry, so request handlers hash on a
+small dedicated thread pool (argon2-cffi releases the GIL while hashing)
+instead of the shared AnyIO threadpool. Jobs beyond
+``HASH_WORKERS + HASH_QUEUE_LIMIT`` are refused with ``HashingUnavailable``
+so a login burst fails fast rather than queueing behind itself.
+
+The hasher, and with it argon2, is only imported on first use, which keeps
+it off the worker startup path.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
 from app.config import settings
+from app.metrics import Counter, Gauge, Histogram
+
+
+@lru_cache(maxsize=None)
+def password_hasher():
+    from pwdlib import PasswordHash
+    from pwdlib.hashers.argon2 import Argon2Hasher
+    return PasswordHash((
+        Argon2Hasher(
+            time_cost=settings.HASH_TIME_COST,
+            memory_cost=settings.HASH_MEMORY_COST,
+            parallelism=settings.HASH_PARALLELISM,
+        ),
+    ))
+
+HASH_SECONDS = Histogram(
+    "password_hash_seconds", "Time spent computing a password hash", ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+HASH_QUEUE_DEPTH = Gauge("password_hash_queue_depth", "Hash jobs waiting for a worker")
+HASH_REJECTED = Counter("password_hash_rejected_total", "Hash jobs refused because the queue was full")
+
+
+class HashingUnavailable(Exception):
+    """The hashing pool is saturated; the caller should retry later."""
+
 
+_executor = ThreadPoolExecutor(max_workers=settings.HASH_WORKERS, thread_name_prefix="password-hash")
+_capacity = threading.BoundedSemaphore(settings.HASH_WORKERS + settings.HASH_QUEUE_LIMIT)
 
-password_hash = PasswordHash.recommended()
 
 def hash_password(password: str) -> str:
-    return password_hash.hash(password)
+    return password_hasher().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return password_hash.verify(plain_password, hashed_password)
+    return password_hasher().verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Verify a password and return a fresh hash if the stored one is outdated."""
+    return password_hasher().verify_and_update(plain_password, hashed_password)
+
+
+def _timed(operation: str, fn, *args):
+    HASH_QUEUE_DEPTH.dec()
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        HASH_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+
+async def _offload(operation: str, fn, *args):
+    if not _capacity.acquire(blocking=False):
+        HASH_REJECTED.inc()
+        raise HashingUnavailable()
+
+    HASH_QUEUE_DEPTH.inc()
+    try:
+        future = _executor.submit(_timed, operation, fn, *args)
+    except BaseException:
+        HASH_QUEUE_DEPTH.dec()
+        _capacity.release()
+        raise
+    future.add_done_callback(lambda _: _capacity.release())
+    return await asyncio.wrap_future(future)
+
 
+async def hash_password_async(password: str) -> str:
+    return await _offload("hash", hash_password, password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return await _offload("verify", verify_and_update_password, plain_password, hashed_password)
@@ -0,0 +1,53 @@
+"""orjson rendering for list endpoints.
+
+FastAPI validates a returned list against its ``response_model`` item by item
+and then encodes it with the stdlib ``json`` module. For feed pages built from
+ORM rows that validation only copies data the database already typed, so with
+``FAST_JSON`` enabled the routers build plain dicts in the response model's
+field order and hand them straight to ``FastJSONResponse``. The bytes are the
+same either way: datetimes keep pydantic's ISO format (``Z`` for UTC) and
+non-ASCII text is emitted as UTF-8, as ``JSONResponse`` does.
+"""
+from typing import Any, Iterable, Iterator, Mapping, Optional
+import orjson
+from fastapi.responses import JSONResponse
+from app.models import PostRead
+
+POST_READ_FIELDS = tuple(PostRead.model_fields)
+# Optional ``PostOut`` fields, present only when asked for with ``expand``.
+EXPANDED_FIELDS = ("author", "my_vote")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def post_read(post) -> dict:
+    return {name: getattr(post, name) for name in POST_READ_FIELDS}
+
+
+def post_out(item: dict) -> dict:
+    out = {"post": post_read(item["post"]), "votes": item["votes"]}
+    for name in EXPANDED_FIELDS:
+        if item.get(name) is not None:
+            out[name] = item[name]
+    return out
+
+
+def post_out_list(items: Iterable[dict], headers: Optional[Mapping[str, str]] = None) -> FastJSONResponse:
+    """Render ``{"post": Post, "votes": n}`` items as ``list[PostOut]`` without validation.
+
+    Unexpanded fields are left out, as ``response_model_exclude_none`` does.
+    """
+    return FastJSONResponse(
+        [post_out(item) for item in items],
+        headers=dict(headers) if headers is not None else None,
+    )
+
+
+def ndjson_chunks(batches: Iterable[Iterable[Mapping]]) -> Iterator[bytes]:
+    """Encode each batch of records as one chunk of newline-delimited JSON."""
+    for batch in batches:
+        yield b"".join(orjson.dumps(dict(record), option=orjson.OPT_UTC_Z) + b"\n" for record in batch)
@@ -0,0 +1,286 @@
+"""In-memory "who to follow" suggestions over the follow graph.
+
+Every worker keeps the whole graph as an adjacency map from user id to a
+sorted ``array`` of the ids they follow, which is eight bytes per edge
+instead of a Python object per ``Follow`` row. Arrays are never changed once
+published: a follow or unfollow swaps in a new copy, so ranking can run on a
+snapshot of references taken under the lock without holding it. A user's
+candidates are the accounts followed by the accounts they follow, ranked by
+how many of those mutual connections lead to them.
+
+The graph is loaded from ``follows`` in the background after startup (until
+then every user gets an empty list), kept current by the follow routes
+calling ``follow``/``unfollow`` after they commit, and reloaded every
+``SUGGESTIONS_REFRESH_SECONDS`` to pick up follows made through other
+workers. Rankings are precomputed for the last ``SUGGESTIONS_CACHE_SIZE``
+users who asked: only a user's first request ranks inline. After that the
+``suggestions-rank`` task re-ranks them off the request path, right away for
+users who followed or unfollowed someone, after every reload, and once their
+ranking is ``SUGGESTIONS_CACHE_TTL_SECONDS`` old, which picks up changes made
+through a friend. Accounts the user already follows are filtered out on
+every read, so a stale ranking never suggests them. A deleted account is
+dropped with ``remove_user`` and never suggested again; reloads skip follows
+of accounts the reaper has not removed yet. Nothing on the request path
+touches the database.
+"""
+import heapq
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter as Tally, OrderedDict
+from typing import Optional
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select, col
+from app.background import PeriodicTask
+from app.config import settings
+from app.database import engine
+from app.metrics import Gauge, Histogram
+from app.models import Follow, User
+
+logger = logging.getLogger(__name__)
+
+RELOAD_SECONDS = Histogram(
+    "suggestions_graph_reload_seconds", "Time to reload the follow graph from the database",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+)
+
+EMPTY = array("q")
+
+
+def _inserted(ids: array, value: int) -> Optional[array]:
+    """A copy of ``ids`` with ``value`` added, or None if it is already there."""
+    i = bisect_left(ids, value)
+    if i < len(ids) and ids[i] == value:
+        return None
+    copy = ids[:i]
+    copy.append(value)
+    copy.extend(ids[i:])
+    return copy
+
+
+def _discarded(ids: array, value: int) -> Optional[array]:
+    """A copy of ``ids`` without ``value``, or None if it is not there."""
+    i = bisect_left(ids, value)
+    if i < len(ids) and ids[i] == value:
+        return ids[:i] + ids[i + 1:]
+    return None
+
+
+def _contains(ids: array, value: int) -> bool:
+    i = bisect_left(ids, value)
+    return i < len(ids) and ids[i] == value
+
+
+class FollowGraph:
+    def __init__(self, target: Engine, max_candidates: int, cache_size: int, cache_ttl: float, refresh_interval: float):
+        self.engine = target
+        self.max_candidates = max_candidates
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._following: dict[int, array] = {}
+        self._edges = 0
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._removed: set[int] = set()
+        self._journal: Optional[list[tuple[Optional[bool], int, Optional[int]]]] = None
+        # user id -> (monotonic time ranked, ranking), least recently read first.
+        self._ranked: OrderedDict[int, tuple[float, list[tuple[int, int]]]] = OrderedDict()
+        self._stale: set[int] = set()
+        self.task = PeriodicTask("suggestions-reload", refresh_interval, self.reload)
+        self.ranker = PeriodicTask("suggestions-rank", cache_ttl, self.rerank)
+
+    def __len__(self) -> int:
+        return self._edges
+
+    def follow(self, follower_id: int, followed_id: int):
+        with self._lock:
+            self._apply(True, follower_id, followed_id)
+            self._mark_stale(follower_id)
+        self.ranker.trigger()
+
+    def unfollow(self, follower_id: int, followed_id: int):
+        with self._lock:
+            self._apply(False, follower_id, followed_id)
+            self._mark_stale(follower_id)
+        self.ranker.trigger()
+
+    def remove_user(self, user_id: int):
+        """Forget a deleted account's follows and stop suggesting it."""
+        with self._lock:
+            self._remove(user_id)
+            self._ranked.pop(user_id, None)
+
+    def _mark_stale(self, user_id: int):
+        # Called with the lock held.
+        if user_id in self._ranked:
+            self._stale.add(user_id)
+
+    def _remove(self, user_id: int):
+        # Called with the lock held. Follows *of* the user stay in other
+        # arrays until the next reload, so reads filter on ``_removed``.
+        if self._journal is not None:
+            self._journal.append((None, user_id, None))
+        self._removed.add(user_id)
+        self._edges -= len(self._following.pop(user_id, EMPTY))
+
+    def _apply(self, added: bool, follower_id: int, followed_id: int):
+        # Called with the lock held. Events that arrive while a reload reads
+        # the table are replayed onto the new graph, which may or may not
+        # already contain them; both operations are idempotent.
+        if self._journal is not None:
+            self._journal.append((added, follower_id, followed_id))
+        ids = self._following.get(follower_id, EMPTY)
+        updated = _inserted(ids, followed_id) if added else _discarded(ids, followed_id)
+        if updated is not None:
+            self._following[follower_id] = updated
+            self._edges += 1 if added else -1
+
+    def suggest(self, user_id: int, limit: int) -> list[tuple[int, int]]:
+        """Up to ``limit`` ``(user_id, mutual connections)`` pairs, best first."""
+        with self._lock:
+            entry = self._ranked.get(user_id)
+            if entry is not None:
+                self._ranked.move_to_end(user_id)
+        if entry is None:
+            ranked = self._rank(user_id)
+            self._store(user_id, ranked, new=True)
+        else:
+            ranked = entry[1]
+
+        with self._lock:
+            following = self._following.get(user_id, EMPTY)
+            removed = self._removed
+        return [
+            (candidate, mutuals) for candidate, mutuals in ranked
+            if not _contains(following, candidate) and candidate not in removed
+        ][:limit]
+
+    def _rank(self, user_id: int) -> list[tuple[int, int]]:
+        # Only the references are taken under the lock; the arrays they point
+        # to are immutable, so the tally runs without blocking writers.
+        with self._lock:
+            following = self._following.get(user_id, EMPTY)
+            friends = [self._following.get(friend, EMPTY) for friend in following]
+            removed = set(self._removed)
+        tally = Tally()
+        for ids in friends:
+            tally.update(ids)
+        tally.pop(user_id, None)
+        for user in removed:
+            tally.pop(user, None)
+        for followed in following:
+            tally.pop(followed, None)
+        return heapq.nlargest(self.max_candidates, tally.items(), key=lambda item: (item[1], -item[0]))
+
+    def _store(self, user_id: int, ranked: list[tuple[int, int]], new: bool):
+        with self._lock:
+            if not new and user_id not in self._ranked:
+                # Evicted or deleted while it was being ranked.
+                return
+            self._ranked[user_id] = (time.monotonic(), ranked)
+            if new:
+                self._ranked.move_to_end(user_id)
+                while len(self._ranked) > self.cache_size:
+                    self._ranked.popitem(last=False)
+
+    def rerank(self, everyone: bool = False) -> int:
+        """Re-rank users whose follows changed or whose ranking has aged out.
+
+        ``everyone`` re-ranks every precomputed user, as after a reload.
+        Returns the number of users ranked.
+        """
+        cutoff = time.monotonic() - self.cache_ttl
+        with self._lock:
+            if everyone:
+                due = list(self._ranked)
+            else:
+                due = [user_id for user_id, (ranked_at, _) in self._ranked.items() if ranked_at <= cutoff]
+                due.extend(self._stale - set(due))
+            self._stale = set()
+        for user_id in due:
+            self._store(user_id, self._rank(user_id), new=False)
+        return len(due)
+
+    def reload(self):
+        """Rebuild the graph from the ``follows`` table and swap it in."""
+        with self._reload_lock:
+            start = time.perf_counter()
+            with self._lock:
+                self._journal = []
+            try:
+                following, edges = self._read()
+            except Exception:
+                with self._lock:
+                    self._journal = None
+                raise
+
+            with self._lock:
+                journal, self._journal = self._journal, None
+                self._following, self._edges = following, edges
+                # The new graph already leaves out earlier deletions.
+                self._removed = set()
+                for added, follower_id, followed_id in journal:
+                    if added is None:
+                        self._remove(follower_id)
+                    else:
+                        self._apply(added, follower_id, followed_id)
+            elapsed = time.perf_counter() - start
+            RELOAD_SECONDS.observe(elapsed)
+            logger.info(f"Loaded follow graph with {edges} edges in {elapsed:.2f}s")
+        # Still on the reload thread, so requests keep reading the old
+        # rankings until the new ones are in.
+        ranked = self.rerank(everyone=True)
+        logger.info(f"Re-ranked suggestions for {ranked} users")
+
+    def _read(self) -> tuple[dict[int, array], int]:
+        following: dict[int, array] = {}
+        edges = 0
+        with Session(self.engine) as session:
+            deleted = select(User.id).where(User.deleted_at != None)
+            rows = session.exec(
+                select(Follow.follower_id, Follow.followed_id)
+                .where(col(Follow.follower_id).not_in(deleted), col(Follow.followed_id).not_in(deleted))
+                .order_by(Follow.follower_id, Follow.followed_id)
+                .execution_options(yield_per=10000)
+            )
+            for follower_id, followed_id in rows:
+                # Primary key order: each following array is built already sorted.
+                following.setdefault(follower_id, array("q")).append(followed_id)
+                edges += 1
+        return following, edges
+
+    def clear(self):
+        with self._lock:
+            self._following, self._edges = {}, 0
+            self._removed = set()
+            self._ranked.clear()
+            self._stale = set()
+
+    def start(self):
+        self.task.start()
+        self.task.trigger()
+        self.ranker.start()
+
+    def stop(self):
+        self.ranker.stop(final_run=False)
+        self.task.stop(final_run=False)
+
+
+suggestions = FollowGraph(
+    engine,
+    max_candidates=settings.SUGGESTIONS_MAX_CANDIDATES,
+    cache_size=settings.SUGGESTIONS_CACHE_SIZE,
+    cache_ttl=settings.SUGGESTIONS_CACHE_TTL_SECONDS,
+    refresh_interval=settings.SUGGESTIONS_REFRESH_SECONDS,
+)
+
+EDGES = Gauge(
+    "suggestions_graph_edges", "Follow edges held by the in-memory suggestion graph",
+    function=lambda: {(): len(suggestions)}
+)
+RANKED = Gauge(
+    "suggestions_ranked_users", "Users whose suggestions are precomputed",
+    function=lambda: {(): len(suggestions._ranked)}
+)
@@ -0,0 +1,179 @@
+"""Precomputed home timelines backing ``GET /posts?mode=followed``.
+
+New posts are pushed into a ``timeline`` row per follower when they are
+created (fan-out on write), so reading the followed feed is an index range
+scan over the reader's own rows. Authors with more than
+``TIMELINE_FANOUT_LIMIT`` followers are flagged ``fanout_on_read`` instead and
+their posts are merged in at read time, so one post never turns into an
+unbounded burst of writes.
+
+Fan-out only appends, so timelines are capped at ``TIMELINE_MAX_ENTRIES``
+by the ``timeline-trim`` background task (in whichever worker holds its
+lease) rather than on read, which keeps the followed feed read-only.
+"""
+import logging
+from typing import Optional, Sequence
+from sqlmodel import Session, select, insert, delete, update, literal, col, func
+from app.background import PeriodicTask
+from app.config import settings
+from app import leases
+from app.database import engine
+from app.models import Post, User, Follow, TimelineEntry
+from app.pagination import keyset_after
+
+logger = logging.getLogger(__name__)
+
+
+def fan_out_post(session: Session, post: Post):
+    """Push a freshly flushed post into its author's followers' timelines."""
+    followers = session.exec(select(User.follower_count).where(User.id == post.user_id)).one()
+
+    if followers > settings.TIMELINE_FANOUT_LIMIT:
+        session.exec(
+            update(User)
+            .where(User.id == post.user_id, User.fanout_on_read == False)
+            .values(fanout_on_read=True)
+        )
+        logger.info(f"User {post.user_id} has {followers} followers, serving post {post.id} on read")
+        return
+
+    session.exec(
+        insert(TimelineEntry).from_select(
+            ["user_id", "post_id", "created_at"],
+            select(Follow.follower_id, literal(post.id), literal(post.created_at))
+            .where(Follow.followed_id == post.user_id)
+        )
+    )
+
+
+def backfill(session: Session, follower_id: int, followed_id: int):
+    """Copy the newest posts of a newly followed author into a timeline."""
+    recent = (
+        select(literal(follower_id), Post.id, Post.created_at)
+        .join(User, User.id == Post.user_id)
+        .where(
+            Post.user_id == followed_id,
+            Post.published == True,
+            Post.deleted_at == None,
+            User.fanout_on_read == False
+        )
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(settings.TIMELINE_MAX_ENTRIES)
+    )
+    session.exec(insert(TimelineEntry).from_select(["user_id", "post_id", "created_at"], recent))
+    trim(session, follower_id)
+
+
+def prune(session: Session, follower_id: int, followed_id: int):
+    """Drop an unfollowed author's posts from a timeline."""
+    session.exec(
+        delete(TimelineEntry).where(
+            TimelineEntry.user_id == follower_id,
+            col(TimelineEntry.post_id).in_(select(Post.id).where(Post.user_id == followed_id))
+        )
+    )
+
+
+def trim(session: Session, user_id: int) -> bool:
+    """Cap a timeline at ``TIMELINE_MAX_ENTRIES`` rows, dropping the oldest.
+
+    Returns whether anything was deleted.
+    """
+    order = (TimelineEntry.created_at, TimelineEntry.post_id)
+    cutoff = session.exec(
+        select(*order)
+        .where(TimelineEntry.user_id == user_id)
+        .order_by(*(column.desc() for column in order))
+        .offset(settings.TIMELINE_MAX_ENTRIES - 1)
+        .limit(1)
+    ).first()
+    if cutoff is None:
+        return False
+
+    result = session.exec(
+        delete(TimelineEntry).where(
+            TimelineEntry.user_id == user_id,
+            keyset_after(order, cutoff)
+        )
+    )
+    return result.rowcount > 0
+
+
+def trim_all(session: Session, batch_size: int = 500) -> int:
+    """Trim every timeline over ``TIMELINE_MAX_ENTRIES``.
+
+    Owners over the cap are found a batch at a time in user id order from
+    ``ix_timeline_user_created``, and each batch is committed on its own.
+    Returns the number of timelines trimmed.
+    """
+    trimmed = 0
+    last_id = 0
+    while True:
+        over = session.exec(
+            select(TimelineEntry.user_id)
+            .where(TimelineEntry.user_id > last_id)
+            .group_by(TimelineEntry.user_id)
+            .having(func.count() > settings.TIMELINE_MAX_ENTRIES)
+            .order_by(TimelineEntry.user_id)
+            .limit(batch_size)
+        ).all()
+        if not over:
+            break
+        for user_id in over:
+            trim(session, user_id)
+        session.commit()
+        trimmed += len(over)
+        last_id = over[-1]
+    if trimmed:
+        logger.info(f"Trimmed {trimmed} timelines to {settings.TIMELINE_MAX_ENTRIES} entries")
+    return trimmed
+
+
+def read(
+    session: Session,
+    user_id: int,
+    limit: int,
+    after: Optional[Sequence] = None,
+    offset: int = 0
+) -> list[Post]:
+    """Return a page of a user's timeline, newest first.
+
+    ``after`` is a ``(created_at, id)`` keyset position as produced for the
+    global feed, so cursors are interchangeable between the two paths.
+    """
+    window = limit + offset
+
+    pushed = (
+        select(Post)
+        .join(TimelineEntry, TimelineEntry.post_id == Post.id)
+        .where(TimelineEntry.user_id == user_id, Post.published == True, Post.deleted_at == None)
+        .order_by(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc())
+    )
+    high_fanout = (
+        select(User.id)
+        .join(Follow, Follow.followed_id == User.id)
+        .where(Follow.follower_id == user_id, User.fanout_on_read == True)
+    )
+    pulled = (
+        select(Post)
+        .where(col(Post.user_id).in_(high_fanout), Post.published == True, Post.deleted_at == None)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+    )
+    if after is not None:
+        pushed = pushed.where(keyset_after((TimelineEntry.created_at, TimelineEntry.post_id), after))
+        pulled = pulled.where(keyset_after((Post.created_at, Post.id), after))
+
+    posts = {post.id: post for post in session.exec(pushed.limit(window)).all()}
+    posts.update((post.id, post) for post in session.exec(pulled.limit(window)).all())
+
+    ordered = sorted(posts.values(), key=lambda post: (post.created_at, post.id), reverse=True)
+    return ordered[offset:window]
+
+
+def _trim():
+    with Session(engine) as session:
+        if leases.acquire(session, "timeline-trim", ttl=settings.TIMELINE_TRIM_SECONDS * 2):
+            trim_all(session)
+
+
+trimmer = PeriodicTask("timeline-trim", settings.TIMELINE_TRIM_SECONDS, _trim)
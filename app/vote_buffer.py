@@ -0,0 +1,223 @@
+"""Write-behind buffer for ``POST /vote`` (enabled with ``VOTE_WRITE_BEHIND``).
+
+Votes are acknowledged from memory and written in bulk by a background
+flusher, so a burst on one hot post costs one transaction per flush instead
+of one per voter. Each ``(user_id, post_id)`` keeps only its latest
+direction, together with the change it makes to ``Post.vote_count``, which
+lets the voter read their own pending votes before they are persisted.
+
+The buffer lives in the worker process: votes still pending when a worker
+dies without running its shutdown hook are lost. A batch the database
+rejects outright is split until the offending entries are isolated; those
+are dropped so they cannot hold every later vote back.
+"""
+import logging
+import threading
+import time
+from collections import Counter as Tally
+from typing import Optional
+from sqlalchemy import tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, delete, col
+from app import http_cache, ranking
+from app.background import PeriodicTask
+from app.config import settings
+from app.counters import bulk_vote_count_update
+from app.database import engine, insert_ignore
+from app.metrics import Counter, Gauge, Histogram
+from app.models import Post, User, Vote
+
+logger = logging.getLogger(__name__)
+
+FLUSH_LAG = Histogram(
+    "vote_buffer_flush_lag_seconds", "Age of the oldest buffered vote when its batch was written",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+FLUSHED = Counter("vote_buffer_flushed_total", "Buffered votes written to the database")
+DEDUPLICATED = Counter("vote_buffer_deduplicated_total", "Votes folded into an already pending entry")
+DROPPED = Counter("vote_buffer_dropped_total", "Buffered votes the database rejected and that were discarded")
+
+
+class PendingVote:
+    __slots__ = ("dir", "delta", "queued_at")
+
+    def __init__(self, dir: int, delta: int, queued_at: float):
+        self.dir = dir
+        self.delta = delta
+        self.queued_at = queued_at
+
+
+class VoteBuffer:
+    def __init__(self, target: Engine, max_pending: int, interval: float):
+        self.engine = target
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[int, int], PendingVote] = {}
+        self._inflight: dict[tuple[int, int], PendingVote] = {}
+        self._flush_lock = threading.Lock()
+        self.task = PeriodicTask("vote-flusher", interval, self.flush)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def state(self, user_id: int, post_id: int) -> Optional[bool]:
+        """Whether the user has voted, if the buffer knows better than the database."""
+        key = (user_id, post_id)
+        with self._lock:
+            entry = self._pending.get(key) or self._inflight.get(key)
+        return None if entry is None else entry.dir == 1
+
+    def pending_delta(self, user_id: int, post_id: int) -> int:
+        """Change the user's unflushed votes make to ``post_id``'s vote count."""
+        key = (user_id, post_id)
+        with self._lock:
+            pending = self._pending.get(key)
+            inflight = self._inflight.get(key)
+        return (pending.delta if pending else 0) + (inflight.delta if inflight else 0)
+
+    def submit(self, user_id: int, post_id: int, dir: int, voted: bool) -> bool:
+        """Queue a vote; ``voted`` is the persisted state read by the caller.
+
+        Returns False when the vote would not change anything, i.e. the
+        caller should answer 409 (already voted) or 404 (no vote to remove).
+        """
+        key = (user_id, post_id)
+        with self._lock:
+            pending = self._pending.get(key)
+            below = pending or self._inflight.get(key)
+            current = voted if below is None else below.dir == 1
+            if current == (dir == 1):
+                return False
+
+            step = 1 if dir == 1 else -1
+            if pending is None:
+                self._pending[key] = PendingVote(dir, step, time.monotonic())
+            else:
+                DEDUPLICATED.inc()
+                pending.dir = dir
+                pending.delta += step
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self.task.trigger()
+        return True
+
+    def discard_user(self, user_id: int):
+        """Forget the queued votes of a deleted account."""
+        with self._lock:
+            for key in [key for key in self._pending if key[0] == user_id]:
+                del self._pending[key]
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of entries flushed."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+
+            oldest = min(entry.queued_at for entry in batch.values())
+            try:
+                written = self._write_split(batch)
+            except Exception:
+                logger.exception(f"Vote flush of {len(batch)} entries failed, requeueing")
+                self._requeue(batch)
+                raise
+            finally:
+                with self._lock:
+                    self._inflight = {}
+
+            FLUSH_LAG.observe(time.monotonic() - oldest)
+            FLUSHED.inc(len(batch))
+            logger.info(f"Flushed {len(batch)} buffered votes ({written} rows changed)")
+            return len(batch)
+
+    def _write_split(self, batch: dict[tuple[int, int], PendingVote]) -> int:
+        try:
+            return self._write(batch)
+        except IntegrityError:
+            if len(batch) == 1:
+                (user_id, post_id), = batch
+                logger.warning(f"Dropping buffered vote of user {user_id} on post {post_id}: rejected by the database")
+                DROPPED.inc()
+                return 0
+        items = list(batch.items())
+        half = len(items) // 2
+        return self._write_split(dict(items[:half])) + self._write_split(dict(items[half:]))
+
+    def _write(self, batch: dict[tuple[int, int], PendingVote]) -> int:
+        adds = [key for key, entry in batch.items() if entry.dir == 1]
+        removes = [key for key, entry in batch.items() if entry.dir == 0]
+
+        with Session(self.engine) as session:
+            changed = Tally()
+            if adds:
+                # Posts and voters deleted since the vote was acknowledged are
+                # dropped here: hard-deleted ones would fail the batch on the
+                # foreign key, soft-deleted ones would leave the reaper a vote
+                # it has already drained.
+                live_posts = set(session.exec(
+                    select(Post.id).where(
+                        col(Post.id).in_({post_id for _, post_id in adds}),
+                        Post.deleted_at == None
+                    )
+                ).all())
+                live_users = set(session.exec(
+                    select(User.id).where(
+                        col(User.id).in_({user_id for user_id, _ in adds}),
+                        User.deleted_at == None
+                    )
+                ).all())
+                rows = [
+                    {"user_id": user_id, "post_id": post_id} for user_id, post_id in adds
+                    if post_id in live_posts and user_id in live_users
+                ]
+                if rows:
+                    votes_table = Vote.__table__
+                    for post_id in session.exec(
+                        insert_ignore(session.get_bind().dialect.name, votes_table)
+                        .values(rows)
+                        .returning(votes_table.c.post_id)
+                    ).scalars():
+                        changed[post_id] += 1
+            if removes:
+                for post_id in session.exec(
+                    delete(Vote)
+                    .where(tuple_(Vote.user_id, Vote.post_id).in_(removes))
+                    .returning(Vote.post_id)
+                ).scalars():
+                    changed[post_id] -= 1
+
+            updates = [{"post_id": post_id, "delta": delta} for post_id, delta in changed.items() if delta]
+            if updates:
+                session.exec(bulk_vote_count_update(), params=updates)
+                ranking.rescore(session, [item["post_id"] for item in updates])
+            session.commit()
+        http_cache.invalidate_post(*changed)
+        return sum(abs(delta) for delta in changed.values())
+
+    def _requeue(self, batch: dict[tuple[int, int], PendingVote]):
+        with self._lock:
+            for key, entry in batch.items():
+                newer = self._pending.get(key)
+                if newer is None:
+                    self._pending[key] = entry
+                else:
+                    newer.delta += entry.delta
+                    newer.queued_at = entry.queued_at
+
+    def start(self):
+        self.task.start()
+
+    def stop(self):
+        """Stop the flusher and drain whatever is still queued."""
+        self.task.stop()
+
+
+vote_buffer = VoteBuffer(engine, settings.VOTE_BUFFER_MAX_PENDING, settings.VOTE_FLUSH_INTERVAL_SECONDS)
+
+PENDING = Gauge(
+    "vote_buffer_pending", "Votes acknowledged but not yet written",
+    function=lambda: {(): len(vote_buffer)}
+)
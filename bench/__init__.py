@@ -0,0 +1 @@
+"""Load-test and benchmark harness (``python -m bench --help``)."""
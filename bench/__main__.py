@@ -0,0 +1,189 @@
+"""Benchmark command line, run with ``python -m bench <command>``.
+
+The app reads its settings at import time, so ``--database-url`` (and
+defaults for the other required settings) are put in the environment before
+anything from ``app`` is imported.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger("bench")
+
+
+def configure(database_url: str):
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "120")
+    # Every benchmark request comes from one address and a few accounts.
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _write(report: dict, output: str):
+    text = json.dumps(report, indent=2)
+    if output == "-":
+        print(text)
+    else:
+        Path(output).write_text(text + "\n")
+        logger.info(f"Wrote {output}")
+
+
+def seed_command(args: argparse.Namespace):
+    from app.database import engine
+    from bench.seed import seed
+    seed(engine, args.users, args.posts, args.votes, args.follows, seed=args.seed, reset=not args.keep)
+
+
+def run_command(args: argparse.Namespace):
+    from sqlmodel import Session, select, func
+    from app.database import engine
+    from app.models import Post, User
+    from bench import runner, workload
+    from bench.report import summarize
+
+    tokens = runner.Tokens(engine)
+    if args.replay:
+        stream = workload.replay(Path(args.replay))
+        source = f"replay:{args.replay}"
+    else:
+        with Session(engine) as session:
+            max_post = session.exec(select(func.max(Post.id))).one() or 1
+            max_user = session.exec(select(func.max(User.id))).one() or 1
+        mix = workload.parse_mix(args.mix)
+        stream = workload.synthetic(mix, args.requests + args.warmup, max_user, max_post, seed=args.seed)
+        source = f"mix:{args.mix}"
+
+    server = None
+    try:
+        if args.url:
+            mode = f"http:{args.url}"
+            samples, wall = asyncio.run(runner.run_http(args.url, stream, tokens, args.concurrency, args.warmup))
+        elif args.uvicorn:
+            mode = f"uvicorn:{args.workers}"
+            server = runner.start_uvicorn(args.port, args.workers)
+            url = f"http://127.0.0.1:{args.port}"
+            samples, wall = asyncio.run(runner.run_http(url, stream, tokens, args.concurrency, args.warmup))
+        else:
+            mode = "in-process"
+            from app.main import app
+            samples, wall = asyncio.run(runner.run_in_process(app, stream, tokens, args.concurrency, args.warmup))
+    finally:
+        runner.stop_uvicorn(server)
+
+    report = summarize(samples, wall, {
+        "mode": mode,
+        "source": source,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "database": engine.url.render_as_string(hide_password=True),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+    })
+    _write(report, args.output)
+    total = report["total"]
+    logger.info(
+        f"{total['count']} requests, {total['throughput_rps']} req/s, "
+        f"p50 {total['p50_ms']}ms p95 {total['p95_ms']}ms p99 {total['p99_ms']}ms, {total['errors']} errors"
+    )
+
+
+def compare_command(args: argparse.Namespace):
+    from bench.report import compare
+    baseline = json.loads(Path(args.baseline).read_text())
+    candidate = json.loads(Path(args.candidate).read_text())
+    result = compare(baseline, candidate, threshold=args.threshold, metric=args.metric)
+    _write(result, args.output)
+    if result["regressions"]:
+        logger.warning(f"Regressions: {', '.join(result['regressions'])}")
+        sys.exit(1)
+
+
+def startup_command(args: argparse.Namespace):
+    from bench.startup import measure
+    result = measure(args.runs, args.port)
+    result["revision"] = _git_revision()
+    result["python"] = platform.python_version()
+    _write(result, args.output)
+    median = result["first_response_s"]["median"]
+    logger.info(f"First response after {median}s (median of {args.runs})")
+    if args.max_seconds is not None and median > args.max_seconds:
+        logger.warning(f"Startup slower than {args.max_seconds}s")
+        sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="Create a synthetic dataset (drops existing tables)")
+    seed.add_argument("--database-url", default="sqlite:///bench.db")
+    seed.add_argument("--users", type=int, default=200)
+    seed.add_argument("--posts", type=int, default=2000)
+    seed.add_argument("--votes", type=int, default=10000)
+    seed.add_argument("--follows", type=int, default=20, help="Accounts followed by each user")
+    seed.add_argument("--seed", type=int, default=0)
+    seed.add_argument("--keep", action="store_true", help="Add to existing tables instead of recreating them")
+    seed.set_defaults(handler=seed_command)
+
+    run = commands.add_parser("run", help="Send a workload and report latency per endpoint")
+    run.add_argument("--database-url", default="sqlite:///bench.db")
+    run.add_argument("--mix", default="read-heavy", help="Named mix or operation=weight pairs")
+    run.add_argument("--replay", help="JSONL file of recorded requests to send instead of a mix")
+    run.add_argument("--requests", type=int, default=2000)
+    run.add_argument("--warmup", type=int, default=100)
+    run.add_argument("--concurrency", type=int, default=16)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--uvicorn", action="store_true", help="Serve the app with uvicorn and go over HTTP")
+    run.add_argument("--workers", type=int, default=1)
+    run.add_argument("--port", type=int, default=8765)
+    run.add_argument("--url", help="Benchmark an already running server instead")
+    run.add_argument("--output", default="-", help="Report path, '-' for stdout")
+    run.set_defaults(handler=run_command)
+
+    diff = commands.add_parser("compare", help="Compare two reports; exits 1 on regression")
+    diff.add_argument("baseline")
+    diff.add_argument("candidate")
+    diff.add_argument("--threshold", type=float, default=0.10)
+    diff.add_argument("--metric", default="p95_ms", choices=("p50_ms", "p95_ms", "p99_ms"))
+    diff.add_argument("--output", default="-")
+    diff.set_defaults(handler=compare_command)
+
+    startup = commands.add_parser("startup", help="Time a cold worker start; exits 1 over --max-seconds")
+    startup.add_argument("--database-url", default="sqlite:///bench.db")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--port", type=int, default=8765)
+    startup.add_argument("--max-seconds", type=float, help="Fail if the median time to first response is above this")
+    startup.add_argument("--output", default="-")
+    startup.set_defaults(handler=startup_command)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    if hasattr(args, "database_url"):
+        configure(args.database_url)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Latency summaries and run-to-run comparison."""
+import math
+from collections import Counter, defaultdict
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _stats(latencies: list[float], statuses: Counter, wall: float) -> dict:
+    ordered = sorted(latencies)
+    stats = {
+        "count": len(ordered),
+        "errors": sum(count for status, count in statuses.items() if status == "error" or int(status) >= 500),
+        "status": dict(sorted(statuses.items())),
+        "throughput_rps": round(len(ordered) / wall, 2) if wall else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+    for pct in PERCENTILES:
+        stats[f"p{pct}_ms"] = round(percentile(ordered, pct) * 1000, 3)
+    return stats
+
+
+def summarize(samples: list[tuple[str, str, float]], wall: float, meta: dict) -> dict:
+    """Build the JSON report from ``(endpoint, status, seconds)`` samples."""
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    for endpoint, status, seconds in samples:
+        latencies[endpoint].append(seconds)
+        statuses[endpoint][status] += 1
+
+    every_status = Counter()
+    for counts in statuses.values():
+        every_status.update(counts)
+    return {
+        "meta": {**meta, "wall_seconds": round(wall, 3)},
+        "total": _stats([seconds for _, _, seconds in samples], every_status, wall),
+        "endpoints": {
+            endpoint: _stats(latencies[endpoint], statuses[endpoint], wall)
+            for endpoint in sorted(latencies)
+        },
+    }
+
+
+def compare(baseline: dict, candidate: dict, threshold: float = 0.10, metric: str = "p95_ms") -> dict:
+    """Per-endpoint change from ``baseline`` to ``candidate``.
+
+    An endpoint regresses when ``metric`` grows, or throughput drops, by more
+    than ``threshold`` (a fraction), or when it starts returning errors.
+    """
+    endpoints = {}
+    regressions = []
+    for endpoint in sorted(set(baseline["endpoints"]) | set(candidate["endpoints"])):
+        before = baseline["endpoints"].get(endpoint)
+        after = candidate["endpoints"].get(endpoint)
+        if before is None or after is None:
+            endpoints[endpoint] = {"only_in": "candidate" if before is None else "baseline"}
+            continue
+
+        change = {}
+        for key in (*(f"p{pct}_ms" for pct in PERCENTILES), "throughput_rps", "errors"):
+            change[key] = {
+                "baseline": before[key],
+                "candidate": after[key],
+                "change": round((after[key] - before[key]) / before[key], 4) if before[key] else None,
+            }
+        slower = change[metric]["change"]
+        throughput = change["throughput_rps"]["change"]
+        if (
+            (slower is not None and slower > threshold)
+            or (throughput is not None and throughput < -threshold)
+            or (after["errors"] > 0 and before["errors"] == 0)
+        ):
+            regressions.append(endpoint)
+        endpoints[endpoint] = change
+
+    return {"metric": metric, "threshold": threshold, "regressions": regressions, "endpoints": endpoints}
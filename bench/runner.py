@@ -0,0 +1,122 @@
+"""Drive a request stream against the app, in-process or over HTTP."""
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Optional
+import httpx
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+from app.models import User
+from app.oauth2 import create_access_token
+
+logger = logging.getLogger(__name__)
+
+
+class Tokens:
+    """Bearer headers for seeded accounts, addressed by their index."""
+
+    def __init__(self, engine: Engine):
+        with Session(engine) as session:
+            self.user_ids = list(session.exec(select(User.id).order_by(User.id)).all())
+        if not self.user_ids:
+            raise RuntimeError("The database has no users; run `python -m bench seed` first")
+        self._headers: dict[int, dict] = {}
+
+    def headers(self, index: int) -> dict:
+        user_id = self.user_ids[index % len(self.user_ids)]
+        if user_id not in self._headers:
+            token = create_access_token(data={"user_id": user_id})
+            self._headers[user_id] = {"Authorization": f"Bearer {token}"}
+        return self._headers[user_id]
+
+
+async def _send(client: httpx.AsyncClient, request: dict, tokens: Tokens) -> tuple[str, str, float]:
+    name = request.get("name") or f"{request['method']} {request['path']}"
+    headers = tokens.headers(request["user"]) if request.get("user") is not None else None
+    start = time.perf_counter()
+    try:
+        res = await client.request(
+            request["method"], request["path"],
+            params=request.get("params"), json=request.get("json"), data=request.get("form"),
+            headers=headers
+        )
+        status = str(res.status_code)
+    except httpx.HTTPError as e:
+        logger.warning(f"{name} failed: {e!r}")
+        status = "error"
+    return name, status, time.perf_counter() - start
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    stream: list[dict],
+    tokens: Tokens,
+    concurrency: int,
+    warmup: int = 0
+) -> tuple[list, float]:
+    """Send ``stream`` with ``concurrency`` requests in flight.
+
+    The first ``warmup`` requests are sent but not recorded. Returns the
+    samples and the wall-clock time of the measured part.
+    """
+    for request in stream[:warmup]:
+        await _send(client, request, tokens)
+
+    pending = iter(stream[warmup:])
+    samples = []
+
+    async def worker():
+        for request in pending:
+            samples.append(await _send(client, request, tokens))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+async def run_in_process(app, stream, tokens, concurrency, warmup=0):
+    """Call the ASGI app directly: measures the app without socket or server overhead."""
+    # Unhandled errors become 500s, as they would behind a server.
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await drive(client, stream, tokens, concurrency, warmup)
+
+
+async def run_http(base_url, stream, tokens, concurrency, warmup=0):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        return await drive(client, stream, tokens, concurrency, warmup)
+
+
+def start_uvicorn(port: int, workers: int = 1, timeout: float = 30) -> subprocess.Popen:
+    """Start ``uvicorn app.main:app`` with the current environment and wait until it answers."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=os.environ.copy()
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    stop_uvicorn(server)
+    raise RuntimeError(f"uvicorn did not answer on port {port} within {timeout}s")
+
+
+def stop_uvicorn(server: Optional[subprocess.Popen]):
+    if server is None:
+        return
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
@@ -0,0 +1,112 @@
+"""Populate a database with a reproducible synthetic social graph."""
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, SQLModel, insert, select, func
+from app import counters, migrations, timeline
+from app import search  # noqa: F401  registers the full-text index DDL with create_all
+from app.models import User, Post, Vote, Follow
+from app.security import hash_password
+
+logger = logging.getLogger(__name__)
+
+PASSWORD = "benchpass123"
+WORDS = (
+    "python", "fastapi", "database", "latency", "coffee", "weekend", "release",
+    "travel", "music", "garden", "football", "recipe", "startup", "cloud", "sunset",
+)
+
+
+def username(index: int) -> str:
+    return f"bench{index}"
+
+
+def _chunks(rows: list, size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def seed(
+    engine: Engine,
+    users: int,
+    posts: int,
+    votes: int,
+    follows: int,
+    seed: int = 0,
+    reset: bool = True,
+    batch_size: int = 1000
+) -> dict:
+    """Create ``users`` accounts, ``posts`` posts, ``votes`` votes and
+    ``follows`` followed accounts per user, then build the derived data
+    (vote counters and home timelines) the app would have maintained.
+
+    The same arguments always produce the same graph and content.
+    """
+    rng = random.Random(seed)
+    if reset:
+        SQLModel.metadata.drop_all(engine)
+        migrations.metadata.drop_all(engine)
+    migrations.upgrade(engine)
+
+    # One argon2 hash shared by every account; hashing per user would
+    # dominate the seeding time.
+    password_hash = hash_password(PASSWORD)
+    now = datetime.now(timezone.utc)
+
+    with Session(engine) as session:
+        for chunk in _chunks(list(range(users)), batch_size):
+            session.exec(insert(User), params=[
+                {
+                    "username": username(i), "email": f"{username(i)}@bench.local",
+                    "password_hash": password_hash, "created_at": now
+                }
+                for i in chunk
+            ])
+        session.commit()
+        user_ids = list(session.exec(select(User.id).order_by(User.id)).all())
+
+        post_rows = []
+        for i in range(posts):
+            title = " ".join(rng.choices(WORDS, k=3))
+            post_rows.append({
+                "title": title,
+                "content": f"{title} " + " ".join(rng.choices(WORDS, k=12)),
+                "user_id": rng.choice(user_ids),
+                "published": True,
+                "created_at": now - timedelta(seconds=posts - i),
+            })
+        for chunk in _chunks(post_rows, batch_size):
+            session.exec(insert(Post), params=chunk)
+        session.commit()
+        post_ids = list(session.exec(select(Post.id).order_by(Post.id)).all())
+
+        votes = min(votes, len(user_ids) * len(post_ids))
+        vote_pairs = set()
+        while len(vote_pairs) < votes:
+            vote_pairs.add((rng.choice(user_ids), rng.choice(post_ids)))
+        for chunk in _chunks(sorted(vote_pairs), batch_size):
+            session.exec(insert(Vote), params=[{"user_id": u, "post_id": p} for u, p in chunk])
+        session.commit()
+        counters.reconcile_vote_counts(session, batch_size=batch_size)
+
+        follow_pairs = []
+        for follower in user_ids:
+            others = [user_id for user_id in user_ids if user_id != follower]
+            for followed in rng.sample(others, min(follows, len(others))):
+                follow_pairs.append((follower, followed))
+        for chunk in _chunks(follow_pairs, batch_size):
+            session.exec(insert(Follow), params=[{"follower_id": a, "followed_id": b} for a, b in chunk])
+            for follower, followed in chunk:
+                timeline.backfill(session, follower, followed)
+            session.commit()
+        counters.reconcile_follow_counts(session, batch_size=batch_size)
+
+        summary = {
+            "users": session.exec(select(func.count()).select_from(User)).one(),
+            "posts": session.exec(select(func.count()).select_from(Post)).one(),
+            "votes": session.exec(select(func.count()).select_from(Vote)).one(),
+            "follows": session.exec(select(func.count()).select_from(Follow)).one(),
+        }
+    logger.info(f"Seeded {summary}")
+    return summary
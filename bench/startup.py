@@ -0,0 +1,55 @@
+"""Cold start: how long a fresh worker takes before it can serve.
+
+Each measurement runs in a new interpreter so nothing is already imported:
+``import_s`` is the time to import ``app.main``, ``lifespan_s`` the time to
+run its startup, and ``first_response_s`` the time from launching uvicorn to
+the first answered request.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from bench import runner
+
+PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+started = asyncio.run(main())
+print(json.dumps({"import_s": imported - start, "lifespan_s": started - imported}))
+"""
+
+
+def probe() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True, env=os.environ.copy()
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def first_response(port: int) -> float:
+    start = time.perf_counter()
+    server = runner.start_uvicorn(port, timeout=60)
+    elapsed = time.perf_counter() - start
+    runner.stop_uvicorn(server)
+    return elapsed
+
+
+def measure(runs: int, port: int) -> dict:
+    samples = {"import_s": [], "lifespan_s": [], "first_response_s": []}
+    for _ in range(runs):
+        for name, value in probe().items():
+            samples[name].append(value)
+        samples["first_response_s"].append(first_response(port))
+    return {
+        name: {"median": round(statistics.median(values), 4), "max": round(max(values), 4)}
+        for name, values in samples.items()
+    }
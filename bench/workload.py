@@ -0,0 +1,123 @@
+"""Request streams for the benchmark runner.
+
+A request is a dict with ``method``, ``path`` and optionally ``name`` (the
+label results are grouped under, defaulting to ``"<METHOD> <path>"``),
+``params``, ``json``, ``form`` and ``user`` (index of the seeded account
+whose bearer token is sent). Recorded traffic is replayed from a JSONL file
+with one such object per line; synthetic streams are drawn from a weighted
+mix of the operations below.
+"""
+import json
+import random
+from pathlib import Path
+from bench.seed import PASSWORD, WORDS, username
+
+MIXES = {
+    "read-heavy": {
+        "feed": 40, "followed_feed": 20, "search": 5, "get_post": 20,
+        "vote": 10, "follow": 2, "unfollow": 1, "create_post": 1, "login": 1,
+    },
+    "write-heavy": {
+        "feed": 20, "get_post": 10, "vote": 40, "follow": 10, "unfollow": 10, "create_post": 10,
+    },
+    "login": {"login": 1},
+}
+
+
+def _feed(rng, users, posts):
+    return {"name": "GET /posts", "method": "GET", "path": "/posts", "params": {"limit": 20}}
+
+def _followed_feed(rng, users, posts):
+    return {"name": "GET /posts?mode=followed", "method": "GET", "path": "/posts",
+            "params": {"limit": 20, "mode": "followed"}}
+
+def _hot_feed(rng, users, posts):
+    return {"name": "GET /posts?sort=hot", "method": "GET", "path": "/posts",
+            "params": {"limit": 20, "sort": "hot"}}
+
+def _search(rng, users, posts):
+    return {"name": "GET /posts?search", "method": "GET", "path": "/posts",
+            "params": {"limit": 20, "search": rng.choice(WORDS)}}
+
+def _get_post(rng, users, posts):
+    return {"name": "GET /posts/{id}", "method": "GET", "path": f"/posts/{rng.randint(1, posts)}"}
+
+def _vote(rng, users, posts):
+    return {"name": "POST /vote", "method": "POST", "path": "/vote",
+            "json": {"post_id": rng.randint(1, posts), "dir": rng.randint(0, 1)}}
+
+def _follow(rng, users, posts):
+    return {"name": "POST /follow", "method": "POST", "path": "/follow",
+            "json": {"followed_id": rng.randint(1, users)}}
+
+def _unfollow(rng, users, posts):
+    return {"name": "DELETE /unfollow/{id}", "method": "DELETE", "path": f"/unfollow/{rng.randint(1, users)}"}
+
+def _suggestions(rng, users, posts):
+    return {"name": "GET /users/me/suggestions", "method": "GET", "path": "/users/me/suggestions"}
+
+def _create_post(rng, users, posts):
+    title = " ".join(rng.choices(WORDS, k=3))
+    return {"name": "POST /posts", "method": "POST", "path": "/posts",
+            "json": {"title": title, "content": " ".join(rng.choices(WORDS, k=12))}}
+
+def _login(rng, users, posts):
+    return {"name": "POST /login", "method": "POST", "path": "/login", "authenticated": False,
+            "form": {"username": username(rng.randrange(users)), "password": PASSWORD}}
+
+
+OPERATIONS = {
+    "feed": _feed,
+    "followed_feed": _followed_feed,
+    "hot_feed": _hot_feed,
+    "search": _search,
+    "get_post": _get_post,
+    "vote": _vote,
+    "follow": _follow,
+    "unfollow": _unfollow,
+    "suggestions": _suggestions,
+    "create_post": _create_post,
+    "login": _login,
+}
+
+
+def parse_mix(spec: str) -> dict[str, int]:
+    """A named mix, or ``operation=weight`` pairs such as ``feed=5,vote=1``."""
+    if spec in MIXES:
+        return MIXES[spec]
+    mix = {}
+    for part in spec.split(","):
+        operation, _, weight = part.partition("=")
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}, expected one of {sorted(OPERATIONS)}")
+        mix[operation] = int(weight or 1)
+    return mix
+
+
+def synthetic(mix: dict[str, int], count: int, users: int, posts: int, seed: int = 0) -> list[dict]:
+    """``count`` requests drawn from ``mix`` against a seeded database."""
+    rng = random.Random(seed)
+    operations = list(mix)
+    weights = [mix[operation] for operation in operations]
+    stream = []
+    for operation in rng.choices(operations, weights=weights, k=count):
+        request = OPERATIONS[operation](rng, users, posts)
+        if request.pop("authenticated", True):
+            request["user"] = rng.randrange(users)
+        stream.append(request)
+    return stream
+
+
+def replay(path: Path) -> list[dict]:
+    """Requests recorded one JSON object per line; blank lines are skipped."""
+    stream = []
+    with open(path) as recorded:
+        for number, line in enumerate(recorded, start=1):
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if "method" not in request or "path" not in request:
+                raise ValueError(f"{path}:{number}: a request needs 'method' and 'path'")
+            stream.append(request)
+    return stream
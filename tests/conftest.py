@@ -3,8 +3,11 @@ from fastapi.testclient import TestClient
 from sqlmodel import Session, SQLModel, create_engine, select
 from app.main import app
 from app.database import get_session
-from app.oauth2 import create_access_token
+from app.oauth2 import create_access_token, clear_auth_caches
 from app import models
+from app.http_cache import post_cache
+from app.suggestions import suggestions
+from app import ratelimit
 
 sqlite_url = "sqlite:///test.db"  
 engine = create_engine(
@@ -22,6 +25,26 @@ def session_fixture():
         
     SQLModel.metadata.drop_all(engine)
 
+@pytest.fixture(autouse=True)
+def reset_auth_caches():
+    yield
+    clear_auth_caches()
+
+@pytest.fixture(autouse=True)
+def reset_post_cache():
+    yield
+    post_cache.clear()
+
+@pytest.fixture(autouse=True)
+def reset_suggestions():
+    yield
+    suggestions.clear()
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    yield
+    ratelimit.backend.clear()
+
 @pytest.fixture(name="client")
 def client_fixture(session: Session):
     def get_session_override():
@@ -0,0 +1,126 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_async_session, async_database_url
+from app.routers.aio import auth, users, posts, vote, follow
+from tests.conftest import sqlite_url
+
+@pytest.fixture
+def async_client(session):
+    async_engine = create_async_engine(async_database_url(sqlite_url), poolclass=NullPool)
+
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as async_session:
+            yield async_session
+
+    app = FastAPI()
+    for module in (auth, users, posts, vote, follow):
+        app.include_router(module.router)
+    app.dependency_overrides[get_async_session] = get_async_session_override
+
+    with TestClient(app) as client:
+        yield client
+
+def signup_and_login(client, username):
+    user = {"email": f"{username}@gmail.com", "password": "password123", "username": username}
+    res = client.post("/signup", json=user)
+    assert res.status_code == 201
+    res = client.post("/login", data={"username": username, "password": user["password"]})
+    assert res.status_code == 200
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///test.db") == "sqlite+aiosqlite:///test.db"
+    assert async_database_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+def test_async_post_lifecycle(async_client):
+    headers = signup_and_login(async_client, "asyncuser")
+
+    res = async_client.post("/posts", json={"title": "async title", "content": "async content"}, headers=headers)
+    assert res.status_code == 201
+    post_id = res.json()["id"]
+
+    res = async_client.post("/vote", json={"post_id": post_id, "dir": 1}, headers=headers)
+    assert res.status_code == 201
+    res = async_client.post("/vote", json={"post_id": post_id, "dir": 1}, headers=headers)
+    assert res.status_code == 409
+    res = async_client.post("/vote", json={"post_id": 80000, "dir": 1}, headers=headers)
+    assert res.status_code == 404
+
+    res = async_client.get(f"/posts/{post_id}")
+    assert res.json()["votes"] == 1
+
+    res = async_client.post("/votes/batch", json=[{"post_id": post_id, "dir": 0}, {"post_id": post_id, "dir": 1}], headers=headers)
+    assert [item["status"] for item in res.json()] == ["removed", "added"]
+
+    res = async_client.get("/posts", params={"search": "async"}, headers=headers)
+    assert [item["post"]["id"] for item in res.json()] == [post_id]
+
+    res = async_client.put(f"/posts/{post_id}", json={"title": "renamed"}, headers=headers)
+    assert res.json()["title"] == "renamed"
+
+    res = async_client.post("/vote", json={"post_id": post_id, "dir": 0}, headers=headers)
+    assert res.status_code == 201
+    res = async_client.delete(f"/posts/{post_id}", headers=headers)
+    assert res.status_code == 204
+    assert async_client.get(f"/posts/{post_id}").status_code == 404
+
+def test_async_followed_feed(async_client):
+    headers1 = signup_and_login(async_client, "follower")
+    headers2 = signup_and_login(async_client, "author")
+    author_id = async_client.get("/users/me", headers=headers2).json()["id"]
+
+    res = async_client.post("/follow", json={"followed_id": author_id}, headers=headers1)
+    assert res.status_code == 201
+    res = async_client.post("/follow", json={"followed_id": author_id}, headers=headers1)
+    assert res.status_code == 409
+    res = async_client.post("/follow", json={"followed_id": 80000}, headers=headers1)
+    assert res.status_code == 404
+    post_id = async_client.post("/posts", json={"title": "t", "content": "c"}, headers=headers2).json()["id"]
+
+    res = async_client.get("/posts", params={"mode": "followed"}, headers=headers1)
+    assert [item["post"]["id"] for item in res.json()] == [post_id]
+    assert async_client.get(f"/users/{author_id}", headers=headers1).json()["follower_count"] == 1
+    res = async_client.get(f"/users/{author_id}/followers", headers=headers1)
+    assert [item["username"] for item in res.json()] == ["follower"]
+
+    res = async_client.delete(f"/unfollow/{author_id}", headers=headers1)
+    assert res.status_code == 200
+    res = async_client.delete(f"/unfollow/{author_id}", headers=headers1)
+    assert res.status_code == 404
+    assert async_client.get(f"/users/{author_id}", headers=headers1).json()["follower_count"] == 0
+    res = async_client.get("/posts", params={"mode": "followed"}, headers=headers1)
+    assert res.json() == []
+
+def test_async_delete_account(async_client):
+    headers1 = signup_and_login(async_client, "leaver")
+    headers2 = signup_and_login(async_client, "stayer")
+    leaver_id = async_client.get("/users/me", headers=headers1).json()["id"]
+    async_client.post("/follow", json={"followed_id": leaver_id}, headers=headers2)
+    post_id = async_client.post("/posts", json={"title": "t", "content": "c"}, headers=headers1).json()["id"]
+
+    assert async_client.delete("/users/me", headers=headers1).status_code == 204
+    assert async_client.get("/users/me", headers=headers1).status_code == 401
+    assert async_client.get(f"/posts/{post_id}").status_code == 404
+    assert async_client.get("/posts", params={"mode": "followed"}, headers=headers2).json() == []
+    assert async_client.post("/follow", json={"followed_id": leaver_id}, headers=headers2).status_code == 404
+    assert async_client.post("/vote", json={"post_id": post_id, "dir": 1}, headers=headers2).status_code == 404
+
+def test_async_login_wrong_password(async_client):
+    signup_and_login(async_client, "someone")
+    res = async_client.post("/login", data={"username": "someone", "password": "WRONG_PASSWORD"})
+    assert res.status_code == 403
+
+def test_async_feed_cache(async_client, monkeypatch):
+    from app.feed_cache import MemoryCacheBackend, feed_cache
+    monkeypatch.setattr(feed_cache, "backend", MemoryCacheBackend(100, ttl=60))
+    headers = signup_and_login(async_client, "cacheduser")
+
+    async_client.post("/posts", json={"title": "one", "content": "body"}, headers=headers)
+    assert len(async_client.get("/posts", headers=headers).json()) == 1
+    async_client.post("/posts", json={"title": "two", "content": "body"}, headers=headers)
+    assert [item["post"]["title"] for item in async_client.get("/posts", headers=headers).json()] == ["two", "one"]
+    feed_cache.clear()
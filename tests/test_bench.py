@@ -0,0 +1,34 @@
+from sqlmodel import select, func
+from app import models
+from app.counters import reconcile_vote_counts
+from bench.seed import seed
+from bench.workload import synthetic, parse_mix, MIXES
+from bench.report import percentile, summarize, compare
+from tests.conftest import engine
+
+def test_seed_builds_consistent_data(session):
+    summary = seed(engine, users=6, posts=30, votes=40, follows=2, seed=1)
+    assert summary == {"users": 6, "posts": 30, "votes": 40, "follows": 12}
+
+    assert reconcile_vote_counts(session) == 0
+    timeline_rows = session.exec(select(func.count()).select_from(models.TimelineEntry)).one()
+    assert timeline_rows > 0
+
+def test_synthetic_stream_is_reproducible():
+    mix = parse_mix("feed=3,vote=1")
+    first = synthetic(mix, 50, users=10, posts=100, seed=7)
+    assert first == synthetic(mix, 50, users=10, posts=100, seed=7)
+    assert {request["name"] for request in first} == {"GET /posts", "POST /vote"}
+    assert parse_mix("read-heavy") == MIXES["read-heavy"]
+
+def test_report_and_compare():
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 99) == 4
+
+    fast = summarize([("GET /posts", "200", 0.010)] * 99 + [("GET /posts", "200", 0.050)], 1.0, {})
+    slow = summarize([("GET /posts", "200", 0.020)] * 99 + [("GET /posts", "500", 0.050)], 1.0, {})
+    assert fast["endpoints"]["GET /posts"]["p50_ms"] == 10.0
+    assert slow["endpoints"]["GET /posts"]["errors"] == 1
+
+    assert compare(fast, fast)["regressions"] == []
+    assert compare(fast, slow)["regressions"] == ["GET /posts"]
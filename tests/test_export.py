@@ -0,0 +1,42 @@
+import json
+from datetime import datetime, timedelta, timezone
+from app.config import settings
+
+def read_ndjson(res):
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in res.text.splitlines()]
+
+def test_export_own_data(authorized_client, test_posts, test_user, test_user2):
+    authorized_client.post("/vote", json={"post_id": test_posts[3].id, "dir": 1})
+
+    records = read_ndjson(authorized_client.get("/users/me/export"))
+    posts = [record for record in records if record["type"] == "post"]
+    votes = [record for record in records if record["type"] == "vote"]
+    assert sorted(post["id"] for post in posts) == sorted(post.id for post in test_posts[:3])
+    assert {post["user_id"] for post in posts} == {test_user["id"]}
+    assert [(vote["user_id"], vote["post_id"]) for vote in votes] == [(test_user["id"], test_posts[3].id)]
+    assert records.index(posts[-1]) < records.index(votes[0])
+
+def test_export_since(authorized_client, test_posts, session):
+    test_posts[0].created_at = datetime.now(timezone.utc) - timedelta(days=3)
+    session.add(test_posts[0])
+    session.commit()
+
+    since = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    records = read_ndjson(authorized_client.get("/users/me/export", params={"since": since}))
+    assert sorted(record["id"] for record in records) == sorted(post.id for post in test_posts[1:3])
+
+def test_admin_export(authorized_client, test_posts, test_user, monkeypatch):
+    assert authorized_client.get("/admin/export").status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_USER_IDS", [test_user["id"]])
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    records = read_ndjson(authorized_client.get("/admin/export"))
+    assert sorted(record["id"] for record in records) == sorted(post.id for post in test_posts)
+
+    records = read_ndjson(authorized_client.get("/admin/export", params={"user_id": test_posts[3].user_id}))
+    assert [record["id"] for record in records] == [test_posts[3].id]
+
+def test_export_requires_auth(client):
+    assert client.get("/users/me/export").status_code == 401
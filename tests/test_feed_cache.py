@@ -0,0 +1,191 @@
+import asyncio
+import socketserver
+import threading
+import time
+import pytest
+from app import feed_cache as feed_cache_module
+from app.cache import AsyncSingleFlight, SingleFlight
+from app.feed_cache import MemoryCacheBackend, RedisCacheBackend, feed_cache, page_key
+from app.resp import RedisClient, RedisError, read_reply
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """Enough of a RESP server for the cache: GET, SET [PX], INCR, SELECT, PING."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.data: dict[bytes, tuple[bytes, float]] = {}
+        self.commands: list[bytes] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"redis://{host}:{port}/1"
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except ConnectionError:
+                return
+            self.wfile.write(self.reply(command))
+
+    def reply(self, command: list) -> bytes:
+        name, *args = command
+        data = self.server.data
+        self.server.commands.append(name.upper())
+        if name.upper() in (b"PING", b"SELECT"):
+            return b"+OK\r\n"
+        if name.upper() == b"GET":
+            value, expires_at = data.get(args[0], (None, 0))
+            if value is None or expires_at < time.monotonic():
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if name.upper() == b"SET":
+            ttl = int(args[3]) / 1000 if len(args) > 3 else 3600
+            data[args[0]] = (args[1], time.monotonic() + ttl)
+            return b"+OK\r\n"
+        if name.upper() == b"INCR":
+            value = int(data.get(args[0], (b"0", 0))[0]) + 1
+            data[args[0]] = (str(value).encode(), float("inf"))
+            return b":%d\r\n" % value
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+def fake_redis():
+    server = FakeRedis()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def use_backend(monkeypatch):
+    def use(backend):
+        monkeypatch.setattr(feed_cache, "backend", backend)
+        return backend
+    yield use
+    feed_cache.clear()
+
+def hits():
+    return feed_cache_module.REQUESTS.value(result="hit")
+
+def test_feed_pages_served_from_cache(authorized_client, test_posts, session, use_backend):
+    use_backend(MemoryCacheBackend(100, ttl=60))
+    first = authorized_client.get("/posts/", params={"limit": 2})
+    before = hits()
+
+    test_posts[0].title = "changed behind the cache"
+    session.add(test_posts[0])
+    session.commit()
+    second = authorized_client.get("/posts/", params={"limit": 2})
+    assert hits() == before + 1
+    assert second.json() == first.json()
+    assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+    # Searches and the home timeline are per caller and never cached.
+    authorized_client.get("/posts/", params={"search": "title"})
+    authorized_client.get("/posts/", params={"mode": "followed"})
+    assert hits() == before + 1
+
+def test_post_writes_invalidate_feed(authorized_client, test_posts, use_backend):
+    use_backend(MemoryCacheBackend(100, ttl=60))
+    assert len(authorized_client.get("/posts/").json()) == 4
+
+    created = authorized_client.post("/posts/", json={"title": "fresh", "content": "body"}).json()
+    assert len(authorized_client.get("/posts/").json()) == 5
+
+    authorized_client.put(f"/posts/{created['id']}", json={"title": "edited"})
+    titles = [item["post"]["title"] for item in authorized_client.get("/posts/").json()]
+    assert "edited" in titles
+
+    authorized_client.delete(f"/posts/{created['id']}")
+    assert len(authorized_client.get("/posts/").json()) == 4
+
+def test_page_key_normalizes_offset_with_cursor():
+    assert page_key(3, "new", 10, 20, "abc") == page_key(3, "new", 10, 0, "abc")
+    assert page_key(3, "new", 10, 20, None) != page_key(3, "new", 10, 0, None)
+    assert page_key(3, "new", 10, 0, None) != page_key(4, "new", 10, 0, None)
+
+def test_single_flight_coalesces_concurrent_misses():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return "page"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", load))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == ["page"] * 8
+
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flight.do("key", lambda: "again") == "again"
+
+def test_async_single_flight_coalesces_concurrent_misses():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "page"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", load) for _ in range(8)))
+
+    assert asyncio.run(main()) == ["page"] * 8
+    assert calls == [1]
+
+def test_resp_client(fake_redis):
+    client = RedisClient(fake_redis.url)
+    assert client.get("missing") is None
+    client.set("key", b"\x00binary\r\nvalue", ttl=60)
+    assert client.get("key") == b"\x00binary\r\nvalue"
+    assert client.incr("counter") == 1
+    assert client.incr("counter") == 2
+    with pytest.raises(RedisError, match="unknown command"):
+        client.execute("FLUSHALL")
+    # The connection is reused after an error reply; SELECT ran once, on connect.
+    assert client.get("key") is not None
+    assert fake_redis.commands.count(b"SELECT") == 1
+    client.close()
+
+def test_feed_cache_over_redis(authorized_client, test_posts, fake_redis, use_backend):
+    use_backend(RedisCacheBackend(RedisClient(fake_redis.url)))
+    first = authorized_client.get("/posts/").json()
+    before = hits()
+    assert authorized_client.get("/posts/").json() == first
+    assert hits() == before + 1
+
+    authorized_client.post("/posts/", json={"title": "fresh", "content": "body"})
+    assert fake_redis.data[b"feed:version"][0] == b"1"
+    assert len(authorized_client.get("/posts/").json()) == 5
+
+def test_unreachable_backend_falls_back_to_database(authorized_client, test_posts, fake_redis, use_backend):
+    url = fake_redis.url
+    fake_redis.shutdown()
+    fake_redis.server_close()
+    use_backend(RedisCacheBackend(RedisClient(url, timeout=0.2)))
+    errors = feed_cache_module.REQUESTS.value(result="error")
+
+    res = authorized_client.get("/posts/")
+    assert res.status_code == 200
+    assert len(res.json()) == 4
+    assert feed_cache_module.REQUESTS.value(result="error") == errors + 1
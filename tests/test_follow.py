@@ -1,6 +1,8 @@
 import pytest
-from sqlmodel import select
+from sqlalchemy import event
+from sqlmodel import select, update
 from app import models
+from tests.conftest import engine
 
 def test_follow_user(authorized_client, test_user, test_user2, session):
     res = authorized_client.post(
@@ -82,3 +84,73 @@ def test_unfollow_self(authorized_client, test_user):
     )
     assert res.status_code == 400
     assert "Cannot unfollow yourself" in res.json()["detail"]
+
+def signup(client, username):
+    res = client.post("/signup", json={"email": f"{username}@gmail.com", "password": "password123", "username": username})
+    assert res.status_code == 201
+    return res.json()
+
+def test_follow_counters(authorized_client, test_user, test_user2):
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]})
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]})
+
+    me = authorized_client.get(f"/users/{test_user['id']}").json()
+    other = authorized_client.get(f"/users/{test_user2['id']}").json()
+    assert (me["following_count"], me["follower_count"]) == (1, 0)
+    assert (other["following_count"], other["follower_count"]) == (0, 1)
+
+    authorized_client.delete(f"/unfollow/{test_user2['id']}")
+    other = authorized_client.get(f"/users/{test_user2['id']}").json()
+    assert other["follower_count"] == 0
+    assert authorized_client.get("/users/99999").status_code == 404
+
+def test_follower_list_pagination(authorized_client, client, test_user, session):
+    followed = [signup(client, f"followed{i}") for i in range(5)]
+    for user in followed:
+        assert authorized_client.post("/follow", json={"followed_id": user["id"]}).status_code == 201
+
+    names = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        res = authorized_client.get(f"/users/{test_user['id']}/following", params=params)
+        assert res.status_code == 200
+        names += [item["username"] for item in res.json()]
+        cursor = res.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert names == [user["username"] for user in reversed(followed)]
+
+    res = authorized_client.get(f"/users/{followed[0]['id']}/followers")
+    assert [item["id"] for item in res.json()] == [test_user["id"]]
+    assert authorized_client.get("/users/99999/followers").status_code == 404
+    res = authorized_client.get(f"/users/{test_user['id']}/followers", params={"cursor": cursor or "bogus"})
+    assert res.status_code == 400
+
+def test_reconcile_follow_counts(authorized_client, test_user, test_user2, session):
+    from app.counters import reconcile_follow_counts
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]})
+    session.exec(update(models.User).values(follower_count=7, following_count=0))
+    session.commit()
+
+    assert reconcile_follow_counts(session, batch_size=1) == 2
+    counts = session.exec(
+        select(models.User.id, models.User.follower_count, models.User.following_count).order_by(models.User.id)
+    ).all()
+    assert counts == [(test_user["id"], 0, 1), (test_user2["id"], 1, 0)]
+    assert reconcile_follow_counts(session) == 0
+
+def test_follow_checks_target_inside_insert(authorized_client, test_user2):
+    statements = []
+    def capture(conn, cursor, statement, *args):
+        statements.append(" ".join(statement.split()))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert authorized_client.post("/follow", json={"followed_id": test_user2["id"]}).status_code == 201
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    follow_statements = [statement for statement in statements if "follows" in statement]
+    assert follow_statements[0].startswith("INSERT INTO follows")
+    assert "deleted_at IS NULL" in follow_statements[0]
+    assert not any(statement.startswith("SELECT") for statement in follow_statements)
@@ -0,0 +1,30 @@
+from sqlmodel import create_engine, text
+from app.config import settings
+from app.database import POOL_WAIT, InstrumentedQueuePool, engine_options
+
+def test_pool_status(client, authorized_client, test_user, monkeypatch):
+    assert client.get("/internal/pool", headers={"Authorization": ""}).status_code == 401
+    assert authorized_client.get("/internal/pool").status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_USER_IDS", [test_user["id"]])
+    res = authorized_client.get("/internal/pool")
+    assert res.status_code == 200
+    pool = res.json()["pools"]["sync"]
+    assert pool["pool"] == "InstrumentedQueuePool"
+    assert {"size", "checked_out", "checked_in", "overflow", "checkout_waits"} <= set(pool)
+
+def test_checkout_wait_recorded():
+    options = engine_options("sqlite:///test.db", InstrumentedQueuePool)
+    assert options["poolclass"] is InstrumentedQueuePool
+    waits = POOL_WAIT.count(pool="sync")
+
+    pooled = create_engine("sqlite:///test.db", **options)
+    with pooled.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        assert pooled.pool.checkedout() == 1
+    pooled.dispose()
+
+    assert POOL_WAIT.count(pool="sync") == waits + 1
+
+def test_in_memory_sqlite_not_pooled():
+    assert "poolclass" not in engine_options("sqlite://", InstrumentedQueuePool)
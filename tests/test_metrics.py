@@ -0,0 +1,45 @@
+from app.instrumentation import REQUEST_QUERIES, RESPONSES
+from app.metrics import Counter, Gauge, Histogram, Registry
+
+def test_metrics_endpoint_reports_routes_and_queries(authorized_client, test_posts):
+    queries_before = REQUEST_QUERIES.count(method="GET", route="/posts")
+    authorized_client.get("/posts/", params={"limit": 2})
+    authorized_client.get("/no-such-route")
+
+    assert REQUEST_QUERIES.count(method="GET", route="/posts") == queries_before + 1
+    assert REQUEST_QUERIES.sum(method="GET", route="/posts") > 0
+    assert RESPONSES.value(method="GET", route="unmatched", status="404") >= 1
+
+    res = authorized_client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = res.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_responses_total{method="GET",route="/posts",status="200"}' in body
+    assert 'http_request_db_queries_bucket{method="GET",route="/posts",le="+Inf"}' in body
+    assert "http_requests_in_flight 1" in body
+
+def test_registry_render_format(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr("app.metrics.REGISTRY", registry)
+    requests = Counter("demo_total", "Demo\\counter", ["path"])
+    Gauge("demo_depth", "Depth").set(2.5)
+    latency = Histogram("demo_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.inc(path='a"b\nc')
+    latency.observe(0.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP demo_total Demo\\\\counter",
+        "# TYPE demo_total counter",
+        'demo_total{path="a\\"b\\nc"} 1',
+        "# HELP demo_depth Depth",
+        "# TYPE demo_depth gauge",
+        "demo_depth 2.5",
+        "# HELP demo_seconds Latency",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{le="0.1"} 0',
+        'demo_seconds_bucket{le="1.0"} 1',
+        'demo_seconds_bucket{le="+Inf"} 1',
+        "demo_seconds_count 1",
+        "demo_seconds_sum 0.5",
+    ]
@@ -0,0 +1,62 @@
+from sqlalchemy import inspect, text
+from sqlmodel import create_engine
+from app import migrations
+
+def test_upgrade_fresh_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert migrations.upgrade(engine) == [m.version for m in migrations.MIGRATIONS]
+    assert migrations.upgrade(engine) == []
+
+    with engine.connect() as connection:
+        assert migrations.current_version(connection) == migrations.HEAD
+        assert migrations.pending(connection) == []
+        indexes = {index["name"] for index in inspect(connection).get_indexes("posts")}
+    assert {"ix_posts_published_created", "ix_posts_user_created"} <= indexes
+    engine.dispose()
+
+def test_upgrade_legacy_database(tmp_path):
+    """A database created by the original models: no counters, search or extra indexes."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        for statement in (
+            "CREATE TABLE users_v2 (id INTEGER PRIMARY KEY, email VARCHAR(128) NOT NULL, "
+            "username VARCHAR(50) NOT NULL, password_hash VARCHAR NOT NULL, created_at DATETIME NOT NULL)",
+            "CREATE TABLE posts (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, content VARCHAR(5000) NOT NULL, "
+            "user_id INTEGER NOT NULL REFERENCES users_v2(id), created_at DATETIME NOT NULL, published BOOLEAN NOT NULL)",
+            "CREATE TABLE votes (user_id INTEGER REFERENCES users_v2(id), post_id INTEGER REFERENCES posts(id), "
+            "PRIMARY KEY (user_id, post_id))",
+            "CREATE TABLE follows (follower_id INTEGER REFERENCES users_v2(id), followed_id INTEGER REFERENCES users_v2(id), "
+            "PRIMARY KEY (follower_id, followed_id))",
+            "INSERT INTO users_v2 VALUES (1, 'a@b.c', 'alice', 'x', '2024-01-01 00:00:00')",
+            "INSERT INTO posts VALUES (1, 'legacy searchable', 'body', 1, '2024-01-01 00:00:00', 1)",
+            "INSERT INTO users_v2 VALUES (2, 'b@b.c', 'bob', 'x', '2024-01-01 00:00:00')",
+            "INSERT INTO posts VALUES (2, 'followed author', 'body', 2, '2024-01-02 00:00:00', 1)",
+            "INSERT INTO votes VALUES (1, 1)",
+            "INSERT INTO follows VALUES (1, 2)",
+        ):
+            connection.execute(text(statement))
+
+    migrations.upgrade(engine, target=2)
+    with engine.connect() as connection:
+        assert migrations.current_version(connection) == 2
+        assert connection.execute(text("SELECT vote_count, version FROM posts WHERE id = 1")).one() == (1, 1)
+        assert [m.version for m in migrations.pending(connection)] == [3, 4, 5, 6, 7, 8, 9, 10]
+
+    assert migrations.upgrade(engine) == [3, 4, 5, 6, 7, 8, 9, 10]
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT rowid FROM posts_fts WHERE posts_fts MATCH 'searchable'")).all() == [(1,)]
+        assert "ix_follows_followed_follower" in {index["name"] for index in inspect(connection).get_indexes("follows")}
+        assert inspect(connection).has_table("timeline")
+        assert connection.execute(text(
+            "SELECT follower_count, following_count FROM users_v2 ORDER BY id"
+        )).all() == [(0, 1), (1, 0)]
+        assert connection.execute(text("SELECT count(*) FROM follows WHERE created_at IS NULL")).scalar() == 0
+        assert connection.execute(text("SELECT count(*) FROM posts WHERE deleted_at IS NULL")).scalar() == 2
+        assert inspect(connection).has_table("deletions")
+        # Follows made before the timeline existed are backfilled.
+        assert connection.execute(text("SELECT user_id, post_id FROM timeline")).all() == [(1, 2)]
+
+    with engine.begin() as connection:
+        migrations.m0009_timeline_backfill.upgrade(connection)
+        assert connection.execute(text("SELECT count(*) FROM timeline")).scalar() == 1
+    engine.dispose()
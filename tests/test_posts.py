@@ -1,3 +1,7 @@
+import base64
+import json
+import pytest
+from sqlalchemy import event
 from sqlmodel import select
 from app import models
 
@@ -62,4 +66,155 @@ def test_update_other_user_post(authorized_client, test_user, test_user2, test_p
         "id": test_posts[3].id
     }
     res = authorized_client.put(f"/posts/{test_posts[3].id}", json=data)
-    assert res.status_code == 403
\ No newline at end of file
+    assert res.status_code == 403
+
+def test_get_posts_newest_first(authorized_client, test_posts):
+    res = authorized_client.get("/posts/")
+    ids = [item["post"]["id"] for item in res.json()]
+    assert ids == sorted((post.id for post in test_posts), reverse=True)
+
+def test_get_posts_cursor_pagination(authorized_client, test_posts):
+    res1 = authorized_client.get("/posts/", params={"limit": 3})
+    assert res1.status_code == 200
+    assert len(res1.json()) == 3
+    cursor = res1.headers["X-Next-Cursor"]
+
+    res2 = authorized_client.get("/posts/", params={"limit": 3, "cursor": cursor})
+    assert res2.status_code == 200
+    assert "X-Next-Cursor" not in res2.headers
+
+    ids = [item["post"]["id"] for item in res1.json() + res2.json()]
+    assert ids == sorted((post.id for post in test_posts), reverse=True)
+
+def test_get_posts_cursor_with_search(authorized_client, test_posts):
+    res1 = authorized_client.get("/posts/", params={"limit": 1, "search": "3rd"})
+    res2 = authorized_client.get(
+        "/posts/", params={"limit": 1, "search": "3rd", "cursor": res1.headers["X-Next-Cursor"]}
+    )
+    assert [item["post"]["id"] for item in res1.json() + res2.json()] == [test_posts[3].id, test_posts[2].id]
+
+def test_get_posts_invalid_cursor(authorized_client, test_posts):
+    res = authorized_client.get("/posts/", params={"cursor": "not-a-cursor"})
+    assert res.status_code == 400
+
+@pytest.mark.parametrize("values", [[{"x": 1}, 1], [None, 1], [[1], 1], [{"dt": 5}, 1], [{"dt": "2024-01-01T00:00:00"}, "1"], [True, 1]])
+def test_get_posts_cursor_with_wrong_value_types(authorized_client, test_posts, values):
+    payload = json.dumps({"s": "new", "v": values}).encode()
+    cursor = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+    res = authorized_client.get("/posts/", params={"cursor": cursor})
+    assert res.status_code == 400
+
+def test_search_matches_title_and_content(authorized_client, test_posts, session):
+    test_posts[0].content = "a post about gardening"
+    session.add(test_posts[0])
+    session.commit()
+
+    res = authorized_client.get("/posts/", params={"search": "garden"})
+    assert [item["post"]["id"] for item in res.json()] == [test_posts[0].id]
+
+    res = authorized_client.get("/posts/", params={"search": "3rd title"})
+    assert sorted(item["post"]["id"] for item in res.json()) == [test_posts[2].id, test_posts[3].id]
+
+def test_search_ranks_title_matches_first(authorized_client, test_posts, session):
+    test_posts[1].content = "mentions first in the body"
+    session.add(test_posts[1])
+    session.commit()
+
+    res = authorized_client.get("/posts/", params={"search": "first"})
+    assert [item["post"]["id"] for item in res.json()] == [test_posts[0].id, test_posts[1].id]
+
+def test_search_index_follows_deletes(authorized_client, test_posts):
+    authorized_client.delete(f"/posts/{test_posts[0].id}")
+    res = authorized_client.get("/posts/", params={"search": "first"})
+    assert res.json() == []
+
+def test_search_without_terms(authorized_client, test_posts):
+    res = authorized_client.get("/posts/", params={"search": "%%"})
+    assert res.status_code == 200
+    assert res.json() == []
+
+def test_get_post_conditional(authorized_client, test_posts):
+    url = f"/posts/{test_posts[0].id}"
+    res = authorized_client.get(url)
+    etag = res.headers["ETag"]
+
+    res = authorized_client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+
+    authorized_client.post("/vote", json={"post_id": test_posts[0].id, "dir": 1})
+    res = authorized_client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.json()["votes"] == 1
+    assert res.headers["ETag"] != etag
+
+def test_get_post_cache_follows_updates(authorized_client, test_posts):
+    url = f"/posts/{test_posts[0].id}"
+    etag = authorized_client.get(url).headers["ETag"]
+
+    authorized_client.put(url, json={"title": "updated title"})
+    res = authorized_client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.json()["post"]["title"] == "updated title"
+
+    authorized_client.delete(url)
+    assert authorized_client.get(url).status_code == 404
+
+def test_get_posts_conditional(authorized_client, test_posts):
+    res = authorized_client.get("/posts/", params={"limit": 2})
+    etag = res.headers["ETag"]
+
+    res = authorized_client.get("/posts/", params={"limit": 2}, headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert res.status_code == 304
+    assert "X-Next-Cursor" in res.headers
+
+    authorized_client.post("/vote", json={"post_id": test_posts[3].id, "dir": 1})
+    res = authorized_client.get("/posts/", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert res.status_code == 200
+
+def test_get_posts_by_ids(authorized_client, test_posts):
+    wanted = [test_posts[2].id, 88888, test_posts[0].id, test_posts[2].id]
+    res = authorized_client.get("/posts/", params={"ids": ",".join(map(str, wanted))})
+    assert res.status_code == 200
+    assert [item["post"]["id"] for item in res.json()] == [test_posts[2].id, test_posts[0].id]
+    assert "X-Next-Cursor" not in res.headers
+
+    assert authorized_client.get("/posts/", params={"ids": "1,x"}).status_code == 400
+    assert authorized_client.get("/posts/", params={"ids": ",".join(map(str, range(1, 102)))}).status_code == 400
+
+def test_expand_author_and_my_vote(authorized_client, test_posts, test_user, test_user2):
+    authorized_client.post("/vote", json={"post_id": test_posts[3].id, "dir": 1})
+    res = authorized_client.get("/posts/", params={"expand": "author,my_vote"})
+    assert res.status_code == 200
+    items = {item["post"]["id"]: item for item in res.json()}
+    assert items[test_posts[3].id]["author"] == {"id": test_user2["id"], "username": test_user2["username"]}
+    assert items[test_posts[3].id]["my_vote"] is True
+    assert items[test_posts[0].id]["author"]["username"] == test_user["username"]
+    assert items[test_posts[0].id]["my_vote"] is False
+
+    res = authorized_client.get(f"/posts/{test_posts[3].id}", params={"expand": "my_vote"})
+    assert res.json()["my_vote"] is True
+    assert "author" not in res.json()
+    assert "author" not in authorized_client.get("/posts/").json()[0]
+    assert authorized_client.get("/posts/", params={"expand": "comments"}).status_code == 400
+
+def test_expanded_page_query_count_is_constant(authorized_client, test_posts):
+    from tests.conftest import engine
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    def queries(ids):
+        statements.clear()
+        res = authorized_client.get("/posts/", params={"ids": ",".join(map(str, ids)), "expand": "author,my_vote"})
+        assert len(res.json()) == len(ids)
+        return len(statements)
+
+    ids = [post.id for post in test_posts]
+    queries(ids[:1])
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        assert queries(ids[:1]) == queries(ids) == 3
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
@@ -0,0 +1,63 @@
+"""Run EXPLAIN QUERY PLAN on every statement the routers issue and fail on
+full table scans, so a dropped or unusable index is caught in CI. The
+deletion reaper is checked alongside them."""
+import re
+import pytest
+from sqlalchemy import event
+from app import reaper
+from tests.conftest import engine
+
+# SQLite before 3.36 prints "SCAN TABLE posts", later versions "SCAN posts".
+FULL_SCAN = re.compile(r"SCAN (?:TABLE )?(\w+)$")
+
+@pytest.fixture
+def captured():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if re.match(r"\s*(SELECT|UPDATE|DELETE|INSERT)", statement, re.IGNORECASE):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", capture)
+
+def full_scans(session, statements) -> list[str]:
+    found = []
+    connection = session.connection()
+    for statement, parameters in statements:
+        for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all():
+            detail = row[-1]
+            if FULL_SCAN.match(detail):
+                found.append(f"{detail}: {statement}")
+    return found
+
+def test_router_queries_use_indexes(authorized_client, test_posts, test_user, test_user2, session, captured):
+    post_id = test_posts[0].id
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]})
+    authorized_client.post("/posts", json={"title": "indexed", "content": "content"})
+    authorized_client.get("/posts", params={"limit": 2})
+    next_cursor = authorized_client.get("/posts", params={"limit": 2}).headers["X-Next-Cursor"]
+    authorized_client.get("/posts", params={"limit": 2, "cursor": next_cursor})
+    authorized_client.get("/posts", params={"mode": "followed"})
+    hot_cursor = authorized_client.get("/posts", params={"sort": "hot", "limit": 2}).headers["X-Next-Cursor"]
+    authorized_client.get("/posts", params={"sort": "hot", "limit": 2, "cursor": hot_cursor})
+    authorized_client.get("/posts", params={"sort": "top", "limit": 2})
+    authorized_client.get("/posts", params={"search": "title"})
+    authorized_client.get(f"/posts/{post_id}")
+    authorized_client.get("/posts", params={"ids": f"{post_id},{test_posts[3].id}", "expand": "author,my_vote"})
+    authorized_client.get(f"/users/{test_user2['id']}/followers")
+    authorized_client.get("/users/me/export", params={"since": "2024-01-01T00:00:00Z"})
+    following = authorized_client.get(f"/users/{test_user['id']}/following", params={"limit": 1})
+    authorized_client.get(f"/users/{test_user['id']}/following", params={"cursor": following.headers["X-Next-Cursor"]})
+    authorized_client.post("/vote", json={"post_id": post_id, "dir": 1})
+    authorized_client.post("/vote", json={"post_id": post_id, "dir": 0})
+    authorized_client.post("/votes/batch", json=[{"post_id": post_id, "dir": 1}])
+    authorized_client.put(f"/posts/{post_id}", json={"title": "renamed"})
+    authorized_client.delete(f"/posts/{post_id}")
+    authorized_client.delete(f"/unfollow/{test_user2['id']}")
+    authorized_client.delete("/users/me")
+    reaper.reap(session)
+
+    assert len(captured) > 20
+    assert full_scans(session, captured) == []
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+from app import leases, models, ranking
+from app.config import settings
+from app.counters import vote_count_update
+from tests.conftest import engine
+
+def test_hot_score_decays_with_age():
+    at = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    fresh = ranking.hot_score(10, at - timedelta(hours=1), at)
+    day_old = ranking.hot_score(10, at - timedelta(days=1), at)
+    assert fresh > day_old > 0
+    assert ranking.hot_score(50, at - timedelta(days=1), at) > day_old
+    # Naive datetimes, as SQLite returns them, are read as UTC.
+    assert ranking.hot_score(10, (at - timedelta(hours=1)).replace(tzinfo=None), at) == fresh
+    assert ranking.hot_score(10, at - timedelta(hours=settings.HOT_WINDOW_HOURS + 1), at) == 0
+
+def test_reference_time_moves_in_refresh_steps():
+    now = datetime(2025, 6, 1, 12, 0, 1, tzinfo=timezone.utc)
+    assert ranking.reference_time(now) == ranking.reference_time(now + timedelta(seconds=settings.HOT_REFRESH_SECONDS - 2))
+    assert ranking.reference_time(now) <= now
+
+def test_refresher_wakes_when_the_reference_time_steps():
+    now = datetime(2025, 6, 1, 12, 0, 1, tzinfo=timezone.utc)
+    wait = ranking.until_next_step(now)
+    assert 0 < wait <= settings.HOT_REFRESH_SECONDS
+    assert ranking.reference_time(now + timedelta(seconds=wait)) == now + timedelta(seconds=wait)
+    assert ranking.reference_time(now + timedelta(seconds=wait)) > ranking.reference_time(now)
+    assert ranking.hot_refresher.delay is ranking.until_next_step
+
+def test_vote_rescores_without_reading_the_post(authorized_client, test_posts, session):
+    post = test_posts[0]
+    statements = []
+    def capture(conn, cursor, statement, *args):
+        statements.append(" ".join(statement.split()))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert authorized_client.post("/vote", json={"post_id": post.id, "dir": 1}).status_code == 201
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    on_posts = [statement.split()[0] for statement in statements if statement.startswith("UPDATE posts") or "FROM posts" in statement]
+    assert on_posts == ["UPDATE", "UPDATE"]
+    session.refresh(post)
+    assert post.hot_score == ranking.hot_score(1, post.created_at, ranking.reference_time())
+
+def test_vote_rescores_in_the_counter_update_on_postgres():
+    at = ranking.reference_time()
+    statement = vote_count_update(1, 1).values(
+        hot_score=ranking.hot_score_sql(models.Post.vote_count + 1, models.Post.created_at, at)
+    )
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "hot_score=CASE" in sql and "power(" in sql
+
+def test_sort_hot_and_top(authorized_client, test_posts, session):
+    now = datetime.now(timezone.utc)
+    old, fresh = test_posts[0], test_posts[1]
+    old.created_at = now - timedelta(days=2)
+    fresh.created_at = now - timedelta(minutes=5)
+    for post in test_posts[2:]:
+        post.created_at = now - timedelta(hours=settings.HOT_WINDOW_HOURS + 1)
+    session.add_all(test_posts)
+    session.commit()
+
+    assert authorized_client.post("/vote", json={"post_id": old.id, "dir": 1}).status_code == 201
+    assert authorized_client.post("/vote", json={"post_id": fresh.id, "dir": 1}).status_code == 201
+
+    res = authorized_client.get("/posts", params={"sort": "hot", "limit": 1})
+    ids = [item["post"]["id"] for item in res.json()]
+    res = authorized_client.get("/posts", params={"sort": "hot", "limit": 1, "cursor": res.headers["X-Next-Cursor"]})
+    ids += [item["post"]["id"] for item in res.json()]
+    assert ids == [fresh.id, old.id]
+
+    authorized_client.post("/vote", json={"post_id": fresh.id, "dir": 0})
+    res = authorized_client.get("/posts", params={"sort": "top", "limit": 1})
+    assert [item["post"]["id"] for item in res.json()] == [old.id]
+    assert authorized_client.get("/posts", params={"sort": "random"}).status_code == 422
+
+def test_refresh_hot_scores(session, test_posts):
+    now = datetime.now(timezone.utc)
+    test_posts[0].created_at = now - timedelta(hours=settings.HOT_WINDOW_HOURS + 1)
+    test_posts[0].hot_score = 5
+    for post in test_posts[1:]:
+        post.created_at = now - timedelta(hours=1)
+    session.add_all(test_posts)
+    session.commit()
+
+    assert ranking.refresh_hot_scores(session, batch_size=2) == len(test_posts) - 1
+    scores = dict(session.exec(select(models.Post.id, models.Post.hot_score)).all())
+    assert scores[test_posts[0].id] == 0
+    assert all(scores[post.id] > 0 for post in test_posts[1:])
+
+def test_stale_score_not_written_over_a_newer_vote(session, test_posts):
+    post = test_posts[0]
+    ranking.rescore(session, [post.id])
+    session.commit()
+    session.refresh(post)
+    scored = post.hot_score
+
+    # Computed from a vote_count that a concurrent vote has since changed.
+    session.exec(ranking.hot_score_update(), params=[
+        {"post_id": post.id, "votes": post.vote_count + 1, "score": scored * 10}
+    ])
+    session.commit()
+    session.refresh(post)
+    assert post.hot_score == scored
+
+def test_refresh_runs_in_the_lease_holder_only(session):
+    assert leases.acquire(session, "hot-refresh", ttl=60, holder="worker-1")
+    assert leases.acquire(session, "hot-refresh", ttl=60, holder="worker-1")
+    assert not leases.acquire(session, "hot-refresh", ttl=60, holder="worker-2")
+
+    # Once the holder stops renewing, another worker takes over.
+    assert leases.acquire(session, "hot-refresh", ttl=-1, holder="worker-1")
+    assert leases.acquire(session, "hot-refresh", ttl=60, holder="worker-2")
+    assert not leases.acquire(session, "hot-refresh", ttl=60, holder="worker-1")
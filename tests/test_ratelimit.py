@@ -0,0 +1,111 @@
+import pytest
+from app import ratelimit
+from app.config import settings
+from app.main import app
+from app.oauth2 import create_access_token, get_current_user
+from app.ratelimit import Limit, MemoryBackend, parse_limit
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+def test_parse_limit():
+    assert parse_limit("10/minute") == Limit(10, 60)
+    assert parse_limit("3/second").refill_rate == 3
+    with pytest.raises(ValueError):
+        parse_limit("ten/minute")
+    with pytest.raises(ValueError):
+        parse_limit("10/fortnight")
+
+def test_bucket_refills_over_time(clock):
+    backend = MemoryBackend(shards=2)
+    limit = Limit(2, 60)
+    assert backend.acquire("k", limit).allowed
+    assert backend.acquire("k", limit).allowed
+    denied = backend.acquire("k", limit)
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(30)
+    assert backend.acquire("other", limit).allowed
+
+    clock[0] += 30
+    assert backend.acquire("k", limit).allowed
+    assert not backend.acquire("k", limit).allowed
+
+def test_idle_buckets_expire_lazily(clock):
+    backend = MemoryBackend(shards=1, max_keys=2)
+    limit = Limit(1, 1)
+    backend.acquire("a", limit)
+    backend.acquire("b", limit)
+    assert len(backend) == 2
+    clock[0] += 5
+    backend.acquire("c", limit)
+    assert len(backend) == 1
+
+def test_login_rate_limited_per_ip(client, test_user, monkeypatch, clock):
+    monkeypatch.setitem(settings.RATE_LIMITS, "login", "2/minute")
+    rejected = ratelimit.REJECTED.value(limit="login")
+    credentials = {"username": test_user["username"], "password": "wrong password"}
+
+    assert client.post("/login", data=credentials).status_code == 403
+    assert client.post("/login", data=credentials).status_code == 403
+    res = client.post("/login", data=credentials)
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) == 30
+    assert ratelimit.REJECTED.value(limit="login") == rejected + 1
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    assert client.post("/login", data=credentials).status_code == 403
+
+def test_limits_are_per_user(authorized_client, client, test_posts, test_user2, monkeypatch):
+    monkeypatch.setitem(settings.RATE_LIMITS, "search", "1/minute")
+    assert authorized_client.get("/posts", params={"search": "title"}).status_code == 200
+    assert authorized_client.get("/posts", params={"search": "title"}).status_code == 429
+    # Plain feed reads are not searches.
+    assert authorized_client.get("/posts").status_code == 200
+
+    other = {"Authorization": f"Bearer {create_access_token(data={'user_id': test_user2['id']})}"}
+    assert client.get("/posts", params={"search": "title"}, headers=other).status_code == 200
+
+def test_vote_batch_costs_one_token_per_vote(authorized_client, test_posts, monkeypatch):
+    monkeypatch.setitem(settings.RATE_LIMITS, "vote", "3/minute")
+    batch = [{"post_id": post.id, "dir": 1} for post in test_posts[:2]]
+    assert authorized_client.post("/votes/batch", json=batch).status_code == 200
+    assert authorized_client.post("/votes/batch", json=batch).status_code == 429
+    assert authorized_client.post("/vote", json={"post_id": test_posts[2].id, "dir": 1}).status_code == 201
+
+def test_vote_batch_rejected_before_authentication(authorized_client, test_posts, monkeypatch):
+    monkeypatch.setitem(settings.RATE_LIMITS, "vote", "2/minute")
+    batch = [{"post_id": post.id, "dir": 1} for post in test_posts[:2]]
+    assert authorized_client.post("/votes/batch", json=batch).status_code == 200
+
+    authenticated = []
+    def never_authenticate():
+        authenticated.append(True)
+    app.dependency_overrides[get_current_user] = never_authenticate
+    try:
+        assert authorized_client.post("/votes/batch", json=batch).status_code == 429
+    finally:
+        del app.dependency_overrides[get_current_user]
+    assert authenticated == []
+
+def test_client_address_behind_trusted_proxy(client, test_user, monkeypatch, clock):
+    monkeypatch.setitem(settings.RATE_LIMITS, "login", "1/minute")
+    credentials = {"username": test_user["username"], "password": "wrong password"}
+    def login(forwarded):
+        return client.post("/login", data=credentials, headers={"X-Forwarded-For": forwarded}).status_code
+
+    # Untrusted peers cannot pick their own bucket.
+    assert login("1.1.1.1") == 403
+    assert login("2.2.2.2") == 429
+
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["*"])
+    assert login("1.1.1.1") == 403
+    assert login("2.2.2.2") == 403
+    assert login("9.9.9.9, 2.2.2.2") == 429
+
+    # Only the addresses of known proxies are skipped from the right.
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["testclient", "10.0.0.1"])
+    assert login("3.3.3.3, 10.0.0.1") == 403
+    assert login("3.3.3.3") == 429
@@ -0,0 +1,80 @@
+from sqlmodel import select
+from app import models, reaper
+from app.oauth2 import create_access_token
+
+def auth_header(user):
+    return {"Authorization": f"Bearer {create_access_token(data={'user_id': user['id']})}"}
+
+def test_deleted_post_hidden_until_reaped(authorized_client, test_user2, test_posts, session):
+    post_id = test_posts[0].id
+    headers2 = auth_header(test_user2)
+    authorized_client.post("/vote", json={"post_id": post_id, "dir": 1}, headers=headers2)
+
+    assert authorized_client.delete(f"/posts/{post_id}").status_code == 204
+    assert authorized_client.get(f"/posts/{post_id}").status_code == 404
+    assert authorized_client.delete(f"/posts/{post_id}").status_code == 404
+    assert post_id not in [item["post"]["id"] for item in authorized_client.get("/posts/").json()]
+    assert authorized_client.get("/posts/", params={"ids": str(post_id)}).json() == []
+    res = authorized_client.post("/vote", json={"post_id": post_id, "dir": 1})
+    assert res.status_code == 404
+
+    # Votes wait for the reaper.
+    assert session.exec(select(models.Vote).where(models.Vote.post_id == post_id)).all() != []
+    votes_removed = reaper.ROWS.value(table="votes")
+    completed = reaper.COMPLETED.value(kind="post")
+
+    assert reaper.reap(session) == 1
+    session.expire_all()
+    assert session.exec(select(models.Vote).where(models.Vote.post_id == post_id)).all() == []
+    assert session.get(models.Post, post_id) is None
+    assert session.exec(select(models.Deletion)).all() == []
+    assert reaper.ROWS.value(table="votes") == votes_removed + 1
+    assert reaper.COMPLETED.value(kind="post") == completed + 1
+    assert reaper.PENDING.value(kind="post") == 0
+
+def test_deleted_user_reaped_with_follows_and_votes(authorized_client, client, test_user, test_user2, test_posts, session):
+    user_id, other_id = test_user["id"], test_user2["id"]
+    other_post = test_posts[3].id
+    headers2 = auth_header(test_user2)
+    authorized_client.post("/follow", json={"followed_id": other_id})
+    authorized_client.post("/follow", json={"followed_id": user_id}, headers=headers2)
+    authorized_client.post("/vote", json={"post_id": other_post, "dir": 1})
+
+    assert authorized_client.delete("/users/me").status_code == 204
+    assert authorized_client.get("/users/me").status_code == 401
+    assert client.post("/login", data={"username": test_user["username"], "password": test_user["password"]}).status_code == 403
+    assert client.get(f"/users/{user_id}", headers=headers2).status_code == 404
+    assert client.post("/follow", json={"followed_id": user_id}, headers=headers2).status_code == 404
+    feed = client.get("/posts/", headers=headers2).json()
+    assert [item["post"]["id"] for item in feed] == [other_post]
+
+    assert reaper.reap(session) == 1
+    session.expire_all()
+    assert session.get(models.User, user_id) is None
+    assert session.exec(select(models.Post).where(models.Post.user_id == user_id)).all() == []
+    assert session.exec(select(models.Follow)).all() == []
+    other = session.get(models.User, other_id)
+    assert (other.follower_count, other.following_count) == (0, 0)
+    assert session.get(models.Post, other_post).vote_count == 0
+
+def test_reap_resumes_after_partial_run(authorized_client, test_user, test_user2, test_posts, session, monkeypatch):
+    user_id = test_user["id"]
+    headers2 = auth_header(test_user2)
+    for post in test_posts[:3]:
+        authorized_client.post("/vote", json={"post_id": post.id, "dir": 1}, headers=headers2)
+    authorized_client.delete("/users/me")
+
+    # A first run that drains the votes but never gets to remove the rows.
+    finish = reaper._finish
+    monkeypatch.setattr(reaper, "_finish", lambda *args: False)
+    assert reaper.reap(session, batch_size=1) == 0
+    monkeypatch.setattr(reaper, "_finish", finish)
+    assert session.exec(select(models.Vote)).all() == []
+    assert reaper.PENDING.value(kind="user") == 1
+
+    assert reaper.reap(session, batch_size=1) == 1
+    assert reaper.reap(session, batch_size=1) == 0
+    session.expire_all()
+    assert session.get(models.User, user_id) is None
+    assert session.exec(select(models.Post)).all() != []
+    assert reaper.PENDING.value(kind="user") == 0
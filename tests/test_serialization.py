@@ -0,0 +1,75 @@
+from datetime import datetime, timezone, timedelta
+import pytest
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from app import models
+from app.config import settings
+from app.oauth2 import create_access_token
+from app.serialization import FastJSONResponse, post_out_list
+
+def reference_body(items):
+    """What FastAPI renders for ``response_model=list[PostOut]`` (excluding None) with JSONResponse."""
+    adapter = TypeAdapter(list[models.PostOut])
+    validated = adapter.validate_python(items, from_attributes=True)
+    return JSONResponse(adapter.dump_python(validated, mode="json", exclude_none=True)).body
+
+def test_post_out_list_matches_validated_output():
+    created = [
+        datetime(2024, 1, 1, 12, 0, 0),
+        datetime(2024, 1, 1, 12, 0, 0, 5),
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 0, 0, 0, 123000, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+    ]
+    items = [
+        {
+            "post": models.Post(
+                id=index + 1, user_id=7, created_at=created_at, published=index % 2 == 0,
+                title=f"tést \U0001F600 {index}", content='quote " slash / back \\ tab \t nl \n \x01'
+            ),
+            "votes": index * 3,
+        }
+        for index, created_at in enumerate(created)
+    ]
+    assert post_out_list(items).body == reference_body(items)
+    items[0].update(author={"id": 7, "username": "seven"}, my_vote=False)
+    items[1].update(my_vote=True)
+    assert post_out_list(items).body == reference_body(items)
+    assert post_out_list([]).body == reference_body([])
+
+def test_get_posts_fast_path_is_byte_identical(authorized_client, test_posts, monkeypatch):
+    authorized_client.post("/vote", json={"post_id": test_posts[0].id, "dir": 1})
+
+    fast = authorized_client.get("/posts/", params={"limit": 3})
+    monkeypatch.setattr(settings, "FAST_JSON", False)
+    validated = authorized_client.get("/posts/", params={"limit": 3})
+
+    assert fast.content == validated.content
+    assert fast.headers["X-Next-Cursor"] == validated.headers["X-Next-Cursor"]
+    assert fast.headers["ETag"] == validated.headers["ETag"]
+    assert fast.headers["content-type"] == validated.headers["content-type"] == "application/json"
+
+@pytest.mark.parametrize("relation", ["followers", "following"])
+def test_follow_lists_fast_path_is_byte_identical(authorized_client, client, test_user, relation, monkeypatch):
+    for index, name in enumerate(("ünïcode \U0001F600", "second", "third")):
+        other = client.post(
+            "/signup", json={"email": f"other{index}@gmail.com", "password": "password123", "username": name}
+        ).json()
+        headers = {"Authorization": f"Bearer {create_access_token(data={'user_id': other['id']})}"}
+        client.post("/follow", json={"followed_id": test_user["id"]}, headers=headers)
+        authorized_client.post("/follow", json={"followed_id": other["id"]})
+
+    path = f"/users/{test_user['id']}/{relation}"
+    fast = authorized_client.get(path, params={"limit": 2})
+    monkeypatch.setattr(settings, "FAST_JSON", False)
+    validated = authorized_client.get(path, params={"limit": 2})
+
+    adapter = TypeAdapter(list[models.FollowUser])
+    reference = JSONResponse(adapter.dump_python(adapter.validate_python(fast.json()), mode="json")).body
+    assert len(fast.json()) == 2
+    assert fast.content == validated.content == reference
+    assert fast.headers["X-Next-Cursor"] == validated.headers["X-Next-Cursor"]
+    assert fast.headers["content-type"] == validated.headers["content-type"] == "application/json"
+
+def test_fast_json_response_renders_plain_content():
+    assert FastJSONResponse([{"a": 1}]).body == JSONResponse([{"a": 1}]).body
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import pytest
+from sqlalchemy import event
+from sqlmodel import create_engine
+from app import migrations
+
+def loaded_on_import(prefixes, **env):
+    """Modules under ``prefixes`` that importing ``app.main`` loads, in a fresh interpreter."""
+    code = (
+        "import sys, app.main; "
+        f"print(sorted(m for m in sys.modules if m.startswith({tuple(prefixes)!r})))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, env={**os.environ, **env}
+    ).stdout
+    return out.strip().splitlines()[-1]
+
+def test_import_does_not_load_password_hashing():
+    """argon2 is loaded by the first login or signup, not by worker startup."""
+    assert loaded_on_import(("pwdlib", "argon2")) == "[]"
+
+def test_import_loads_optional_components_only_when_enabled():
+    optional = ("app.vote_buffer", "app.suggestions")
+    assert loaded_on_import(optional) == "['app.suggestions']"
+    assert loaded_on_import(optional, SUGGESTIONS_ENABLED="false") == "[]"
+    assert loaded_on_import(optional, VOTE_WRITE_BEHIND="true") == "['app.suggestions', 'app.vote_buffer']"
+
+def test_check_rejects_unmigrated_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    with pytest.raises(migrations.SchemaOutOfDate, match="app.cli migrate"):
+        migrations.check(engine)
+
+    migrations.upgrade(engine, target=migrations.HEAD - 1)
+    with pytest.raises(migrations.SchemaOutOfDate):
+        migrations.check(engine)
+    engine.dispose()
+
+def test_check_is_one_query(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+    migrations.upgrade(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    assert migrations.check(engine) == migrations.HEAD
+    assert len(statements) == 1
+    engine.dispose()
@@ -0,0 +1,119 @@
+from collections import Counter as Tally
+from app import models
+from app.config import settings
+from app.oauth2 import create_access_token
+from app.suggestions import FollowGraph
+from tests.conftest import engine
+
+def graph(edges):
+    follow_graph = FollowGraph(engine, max_candidates=10, cache_size=100, cache_ttl=60, refresh_interval=60)
+    for follower_id, followed_id in edges:
+        follow_graph.follow(follower_id, followed_id)
+    return follow_graph
+
+def test_ranked_by_mutual_connections():
+    follow_graph = graph([(1, 2), (1, 3), (2, 4), (3, 4), (2, 5), (3, 1), (2, 3)])
+    # 4 is followed by two of user 1's follows, 5 by one; 1 itself and 3
+    # (already followed) are never suggested.
+    assert follow_graph.suggest(1, 10) == [(4, 2), (5, 1)]
+    assert follow_graph.suggest(1, 1) == [(4, 2)]
+    assert follow_graph.suggest(99, 10) == []
+
+def test_follow_events_update_suggestions():
+    follow_graph = graph([(1, 2), (2, 4), (2, 5)])
+    assert follow_graph.suggest(1, 10) == [(4, 1), (5, 1)]
+
+    follow_graph.follow(1, 4)
+    follow_graph.follow(1, 4)
+    assert len(follow_graph) == 4
+    # Served from the old ranking, minus the account now followed.
+    assert follow_graph.suggest(1, 10) == [(5, 1)]
+
+    follow_graph.unfollow(1, 2)
+    follow_graph.unfollow(1, 2)
+    assert len(follow_graph) == 3
+    assert follow_graph.rerank() == 1
+    assert follow_graph.suggest(1, 10) == []
+
+def test_ranking_does_not_hold_the_graph_lock(monkeypatch):
+    follow_graph = graph([(1, 2), (2, 4), (2, 5)])
+    followed_during_rank = []
+    update = Tally.update
+
+    def update_then_follow(self, ids):
+        # Runs inside _rank; with the lock held this follow would deadlock.
+        if not followed_during_rank:
+            follow_graph.follow(2, 6)
+            followed_during_rank.append(True)
+        update(self, ids)
+
+    monkeypatch.setattr(Tally, "update", update_then_follow)
+    assert follow_graph.suggest(1, 10) == [(4, 1), (5, 1)]
+    assert followed_during_rank == [True]
+    assert len(follow_graph) == 4
+
+def test_reload_reads_follows_and_keeps_concurrent_events(session, test_user, test_user2):
+    session.add(models.Follow(follower_id=test_user["id"], followed_id=test_user2["id"]))
+    session.commit()
+    follow_graph = graph([(50, 60)])
+
+    original_read = follow_graph._read
+    def read_then_follow():
+        loaded = original_read()
+        follow_graph.follow(test_user2["id"], 70)
+        return loaded
+    follow_graph._read = read_then_follow
+    follow_graph.reload()
+
+    assert len(follow_graph) == 2
+    assert follow_graph.suggest(test_user["id"], 10) == [(70, 1)]
+    assert follow_graph.suggest(50, 10) == []
+
+def test_rankings_are_precomputed_off_the_request_path(session, monkeypatch):
+    follow_graph = graph([(1, 2), (2, 4), (3, 2)])
+    assert follow_graph.suggest(1, 10) == [(4, 1)]
+    assert follow_graph.suggest(3, 10) == [(4, 1)]
+
+    ranked = []
+    rank = follow_graph._rank
+    def counting_rank(user_id):
+        ranked.append(user_id)
+        return rank(user_id)
+    monkeypatch.setattr(follow_graph, "_rank", counting_rank)
+
+    # A friend's follow reaches the ranking once it ages out, in the background.
+    follow_graph.follow(2, 5)
+    assert follow_graph.rerank() == 0
+    monkeypatch.setattr(follow_graph, "cache_ttl", 0)
+    assert follow_graph.rerank() == 2
+    assert sorted(ranked) == [1, 3]
+
+    # A reload (of an empty table here) re-ranks everyone who had a ranking
+    # before any of them asks again.
+    ranked.clear()
+    follow_graph.reload()
+    assert sorted(ranked) == [1, 3]
+    assert follow_graph.suggest(1, 10) == []
+    assert follow_graph.suggest(3, 10) == []
+    assert sorted(ranked) == [1, 3]
+
+def test_suggestions_endpoint(authorized_client, client, test_user, test_user2):
+    res = client.post("/signup", json={"email": "third@gmail.com", "password": "password123", "username": "third"})
+    third = res.json()
+
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]})
+    headers = {"Authorization": f"Bearer {create_access_token(data={'user_id': test_user2['id']})}"}
+    assert client.post("/follow", json={"followed_id": third["id"]}, headers=headers).status_code == 201
+
+    res = authorized_client.get("/users/me/suggestions")
+    assert res.status_code == 200
+    assert res.json() == [{"id": third["id"], "mutual_connections": 1}]
+
+    authorized_client.post("/follow", json={"followed_id": third["id"]})
+    assert authorized_client.get("/users/me/suggestions").json() == []
+    assert client.get("/users/me/suggestions", headers={"Authorization": "Bearer bogus"}).status_code == 401
+
+def test_suggestions_disabled(authorized_client, test_user2, monkeypatch):
+    monkeypatch.setattr(settings, "SUGGESTIONS_ENABLED", False)
+    assert authorized_client.post("/follow", json={"followed_id": test_user2["id"]}).status_code == 201
+    assert authorized_client.get("/users/me/suggestions").status_code == 404
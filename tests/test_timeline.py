@@ -0,0 +1,100 @@
+from sqlmodel import select
+from app import models, reaper, timeline
+from app.config import settings
+from app.oauth2 import create_access_token
+
+def auth_header(user):
+    return {"Authorization": f"Bearer {create_access_token(data={'user_id': user['id']})}"}
+
+def followed_ids(client, **params):
+    res = client.get("/posts/", params={"mode": "followed", **params})
+    assert res.status_code == 200
+    return [item["post"]["id"] for item in res.json()]
+
+def test_follow_backfills_timeline(authorized_client, test_user2, test_posts):
+    assert followed_ids(authorized_client) == []
+
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]})
+    assert followed_ids(authorized_client) == [test_posts[3].id]
+
+def test_new_post_fans_out_to_followers(authorized_client, test_user, test_user2, session):
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]})
+    res = authorized_client.post(
+        "/posts/", json={"title": "fresh", "content": "fresh content"}, headers=auth_header(test_user2)
+    )
+    assert res.status_code == 201
+
+    entry = session.exec(select(models.TimelineEntry)).one()
+    assert entry.user_id == test_user["id"]
+    assert followed_ids(authorized_client) == [res.json()["id"]]
+
+def test_unfollow_prunes_timeline(authorized_client, test_user2, test_posts, session):
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]})
+    authorized_client.delete(f"/unfollow/{test_user2['id']}")
+
+    assert followed_ids(authorized_client) == []
+    assert session.exec(select(models.TimelineEntry)).all() == []
+
+def test_delete_post_retracts_timeline_entries(authorized_client, test_user, test_user2, test_posts, session):
+    client2_headers = auth_header(test_user2)
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]}, headers=client2_headers)
+    authorized_client.post("/follow", json={"followed_id": test_user["id"]}, headers=client2_headers)
+
+    post_id = test_posts[0].id
+    res = authorized_client.delete(f"/posts/{post_id}")
+    assert res.status_code == 204
+    timeline = authorized_client.get("/posts/", params={"mode": "followed"}, headers=client2_headers).json()
+    assert post_id not in [item["post"]["id"] for item in timeline]
+
+    # The entries themselves go with the reaper.
+    reaper.reap(session)
+    entries = session.exec(select(models.TimelineEntry.post_id)).all()
+    assert post_id not in entries
+
+def test_high_fanout_author_served_on_read(authorized_client, test_user2, session, monkeypatch):
+    monkeypatch.setattr(settings, "TIMELINE_FANOUT_LIMIT", 0)
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]})
+    res = authorized_client.post(
+        "/posts/", json={"title": "viral", "content": "viral content"}, headers=auth_header(test_user2)
+    )
+
+    assert session.exec(select(models.TimelineEntry)).all() == []
+    assert session.get(models.User, test_user2["id"]).fanout_on_read
+    assert followed_ids(authorized_client) == [res.json()["id"]]
+
+def test_timeline_trimmed_to_max_entries(authorized_client, test_user, test_user2, session, monkeypatch):
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]})
+    for i in range(4):
+        authorized_client.post(
+            "/posts/", json={"title": f"post {i}", "content": "content"}, headers=auth_header(test_user2)
+        )
+
+    monkeypatch.setattr(settings, "TIMELINE_MAX_ENTRIES", 2)
+    def entries(user_id):
+        return session.exec(select(models.TimelineEntry).where(models.TimelineEntry.user_id == user_id)).all()
+
+    # Reading the feed never writes; the background trim does.
+    assert len(followed_ids(authorized_client, limit=10)) == 4
+    assert len(entries(test_user["id"])) == 4
+    assert timeline.trim_all(session, batch_size=1) == 1
+    assert len(entries(test_user["id"])) == 2
+    assert followed_ids(authorized_client, limit=10) == [entry.post_id for entry in sorted(
+        entries(test_user["id"]), key=lambda entry: entry.created_at, reverse=True
+    )]
+    assert timeline.trim_all(session) == 0
+
+def test_timeline_cursor_pagination(authorized_client, test_user2):
+    authorized_client.post("/follow", json={"followed_id": test_user2["id"]})
+    created = [
+        authorized_client.post(
+            "/posts/", json={"title": f"post {i}", "content": "content"}, headers=auth_header(test_user2)
+        ).json()["id"]
+        for i in range(3)
+    ]
+
+    res1 = authorized_client.get("/posts/", params={"mode": "followed", "limit": 2})
+    res2 = authorized_client.get(
+        "/posts/", params={"mode": "followed", "limit": 2, "cursor": res1.headers["X-Next-Cursor"]}
+    )
+    ids = [item["post"]["id"] for item in res1.json() + res2.json()]
+    assert ids == created[::-1]
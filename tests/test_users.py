@@ -74,4 +74,72 @@ def test_create_user_with_short_username(client):
         "/signup",
         json={"email": "test@gmail.com", "password": "password123", "username": "ab"}
     )
-    assert res.status_code == 422
\ No newline at end of file
+    assert res.status_code == 422
+
+def test_current_user_served_from_cache(authorized_client, test_user):
+    from app.cache import LOOKUPS
+
+    authorized_client.get("/users/me")
+    hits = LOOKUPS.value(cache="principal", result="hit")
+    token_hits = LOOKUPS.value(cache="token", result="hit")
+
+    res = authorized_client.get("/users/me")
+    assert res.status_code == 200
+    assert LOOKUPS.value(cache="principal", result="hit") == hits + 1
+    assert LOOKUPS.value(cache="token", result="hit") == token_hits + 1
+
+    body = authorized_client.get("/metrics").text
+    assert 'cache_lookups_total{cache="principal",result="hit"}' in body
+    assert 'cache_entries{cache="token"} 1' in body
+
+
+def test_user_update_invalidates_cached_principal(authorized_client, test_user, session):
+    from app.models import User
+
+    authorized_client.get("/users/me")
+    user = session.get(User, test_user["id"])
+    user.username = "renamed"
+    session.add(user)
+    session.commit()
+
+    res = authorized_client.get("/users/me")
+    assert res.json()["username"] == "renamed"
+
+
+def test_invalid_token_rejected(client):
+    res = client.get("/users/me", headers={"Authorization": "Bearer not-a-token"})
+    assert res.status_code == 401
+
+
+def test_login_rejected_when_hash_pool_saturated(client, test_user, monkeypatch):
+    import threading
+    from app import security
+
+    monkeypatch.setattr(security, "_capacity", threading.BoundedSemaphore(1))
+    security._capacity.acquire()
+    res = client.post(
+        "/login",
+        data={"username": test_user["username"], "password": test_user["password"]}
+    )
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+
+
+def test_login_rehashes_outdated_password_hash(client, test_user, session):
+    from pwdlib.hashers.argon2 import Argon2Hasher
+    from app.models import User
+    from app.security import password_hasher
+
+    user = session.get(User, test_user["id"])
+    user.password_hash = Argon2Hasher(time_cost=1).hash(test_user["password"])
+    session.add(user)
+    session.commit()
+
+    res = client.post(
+        "/login",
+        data={"username": test_user["username"], "password": test_user["password"]}
+    )
+    assert res.status_code == 200
+
+    session.refresh(user)
+    assert not password_hasher().current_hasher.check_needs_rehash(user.password_hash)
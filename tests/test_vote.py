@@ -0,0 +1,226 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from app import models, reaper
+from app.config import settings
+from app.counters import reconcile_vote_counts
+from app.vote_buffer import vote_buffer, DROPPED, FLUSH_LAG
+from app.oauth2 import create_access_token
+from tests.conftest import engine
+
+@pytest.fixture
+def write_behind(monkeypatch):
+    monkeypatch.setattr(settings, "VOTE_WRITE_BEHIND", True)
+    monkeypatch.setattr(vote_buffer, "engine", engine)
+    yield vote_buffer
+    vote_buffer.stop()
+
+def test_vote_on_post(authorized_client, test_posts, session):
+    res = authorized_client.post("/vote", json={"post_id": test_posts[3].id, "dir": 1})
+    assert res.status_code == 201
+
+    session.refresh(test_posts[3])
+    assert test_posts[3].vote_count == 1
+
+def test_vote_twice_on_post(authorized_client, test_posts):
+    res1 = authorized_client.post("/vote", json={"post_id": test_posts[3].id, "dir": 1})
+    assert res1.status_code == 201
+    res2 = authorized_client.post("/vote", json={"post_id": test_posts[3].id, "dir": 1})
+    assert res2.status_code == 409
+
+def test_delete_vote(authorized_client, test_posts, session):
+    authorized_client.post("/vote", json={"post_id": test_posts[3].id, "dir": 1})
+    res = authorized_client.post("/vote", json={"post_id": test_posts[3].id, "dir": 0})
+    assert res.status_code == 201
+
+    session.refresh(test_posts[3])
+    assert test_posts[3].vote_count == 0
+
+def test_delete_vote_non_exist(authorized_client, test_posts):
+    res = authorized_client.post("/vote", json={"post_id": test_posts[3].id, "dir": 0})
+    assert res.status_code == 404
+
+def test_vote_post_non_exist(authorized_client, test_posts):
+    res = authorized_client.post("/vote", json={"post_id": 80000, "dir": 1})
+    assert res.status_code == 404
+
+def test_vote_unauthorized_user(client, test_posts):
+    res = client.post("/vote", json={"post_id": test_posts[3].id, "dir": 1})
+    assert res.status_code == 401
+
+def test_post_reads_serve_vote_count(authorized_client, test_posts):
+    authorized_client.post("/vote", json={"post_id": test_posts[0].id, "dir": 1})
+
+    res = authorized_client.get(f"/posts/{test_posts[0].id}")
+    assert res.json()["votes"] == 1
+
+    votes = {item["post"]["id"]: item["votes"] for item in authorized_client.get("/posts/").json()}
+    assert votes[test_posts[0].id] == 1
+    assert votes[test_posts[1].id] == 0
+
+def test_reconcile_vote_counts(test_posts, test_user, session):
+    session.add(models.Vote(user_id=test_user["id"], post_id=test_posts[0].id))
+    test_posts[1].vote_count = 7
+    session.add(test_posts[1])
+    session.commit()
+
+    assert reconcile_vote_counts(session, batch_size=2) == 2
+
+    counts = dict(session.exec(select(models.Post.id, models.Post.vote_count)).all())
+    assert counts[test_posts[0].id] == 1
+    assert counts[test_posts[1].id] == 0
+    assert reconcile_vote_counts(session) == 0
+
+def test_vote_batch(authorized_client, test_posts, session):
+    authorized_client.post("/vote", json={"post_id": test_posts[1].id, "dir": 1})
+
+    res = authorized_client.post("/votes/batch", json=[
+        {"post_id": test_posts[0].id, "dir": 1},
+        {"post_id": test_posts[1].id, "dir": 1},
+        {"post_id": test_posts[2].id, "dir": 0},
+        {"post_id": 80000, "dir": 1},
+        {"post_id": test_posts[1].id, "dir": 0},
+    ])
+    assert res.status_code == 200
+    assert [item["status"] for item in res.json()] == [
+        "added", "already_voted", "not_voted", "post_not_found", "removed"
+    ]
+
+    counts = dict(session.exec(select(models.Post.id, models.Post.vote_count)).all())
+    assert counts[test_posts[0].id] == 1
+    assert counts[test_posts[1].id] == 0
+    assert reconcile_vote_counts(session) == 0
+
+def test_vote_batch_toggle_writes_net_change(authorized_client, test_posts, session):
+    res = authorized_client.post("/votes/batch", json=[
+        {"post_id": test_posts[0].id, "dir": 1},
+        {"post_id": test_posts[0].id, "dir": 0},
+        {"post_id": test_posts[0].id, "dir": 1},
+    ])
+    assert [item["status"] for item in res.json()] == ["added", "removed", "added"]
+
+    session.refresh(test_posts[0])
+    assert test_posts[0].vote_count == 1
+
+def test_vote_batch_rejects_empty_and_oversized(authorized_client, test_posts):
+    assert authorized_client.post("/votes/batch", json=[]).status_code == 422
+    too_many = [{"post_id": test_posts[0].id, "dir": 1}] * 101
+    assert authorized_client.post("/votes/batch", json=too_many).status_code == 422
+
+def test_delete_vote_post_non_exist(authorized_client):
+    res = authorized_client.post("/vote", json={"post_id": 80000, "dir": 0})
+    assert res.status_code == 404
+    assert res.json()["detail"] == "Post not found"
+
+def test_delete_post_with_votes(authorized_client, test_posts):
+    authorized_client.post("/vote", json={"post_id": test_posts[0].id, "dir": 1})
+    res = authorized_client.delete(f"/posts/{test_posts[0].id}")
+    assert res.status_code == 204
+
+def test_write_behind_vote_reads_own_writes(authorized_client, test_posts, session, write_behind):
+    post_id = test_posts[0].id
+    res = authorized_client.post("/vote", json={"post_id": post_id, "dir": 1})
+    assert res.status_code == 202
+    assert authorized_client.post("/vote", json={"post_id": post_id, "dir": 1}).status_code == 409
+    assert authorized_client.post("/vote", json={"post_id": 80000, "dir": 1}).status_code == 404
+
+    assert authorized_client.get(f"/posts/{post_id}").json()["votes"] == 1
+    session.refresh(test_posts[0])
+    assert test_posts[0].vote_count == 0
+
+    lag_count = FLUSH_LAG.count()
+    assert write_behind.flush() == 1
+    assert FLUSH_LAG.count() == lag_count + 1
+
+    session.refresh(test_posts[0])
+    assert test_posts[0].vote_count == 1
+    assert authorized_client.get(f"/posts/{post_id}").json()["votes"] == 1
+    assert authorized_client.post("/vote", json={"post_id": post_id, "dir": 1}).status_code == 409
+
+def test_write_behind_deduplicates_toggles(authorized_client, test_posts, session, write_behind):
+    post_id = test_posts[0].id
+    authorized_client.post("/vote", json={"post_id": post_id, "dir": 1})
+    authorized_client.post("/vote", json={"post_id": post_id, "dir": 0})
+    assert authorized_client.post("/vote", json={"post_id": post_id, "dir": 0}).status_code == 404
+    assert len(write_behind) == 1
+
+    write_behind.flush()
+    assert session.exec(select(models.Vote)).all() == []
+    assert reconcile_vote_counts(session) == 0
+
+def test_write_behind_drains_on_stop(authorized_client, test_posts, session, write_behind):
+    write_behind.start()
+    for post in test_posts:
+        authorized_client.post("/vote", json={"post_id": post.id, "dir": 1})
+    write_behind.stop()
+
+    assert len(write_behind) == 0
+    assert len(session.exec(select(models.Vote)).all()) == len(test_posts)
+    assert reconcile_vote_counts(session) == 0
+
+def test_write_behind_batch_goes_through_buffer(authorized_client, test_posts, session, write_behind):
+    first, second = test_posts[0].id, test_posts[1].id
+    authorized_client.post("/vote", json={"post_id": first, "dir": 1})
+
+    res = authorized_client.post("/votes/batch", json=[
+        {"post_id": first, "dir": 1},
+        {"post_id": first, "dir": 0},
+        {"post_id": second, "dir": 1},
+        {"post_id": 80000, "dir": 1},
+    ])
+    assert res.status_code == 202
+    assert [item["status"] for item in res.json()] == ["already_voted", "removed", "added", "post_not_found"]
+    assert session.exec(select(models.Vote)).all() == []
+
+    write_behind.flush()
+    assert [vote.post_id for vote in session.exec(select(models.Vote)).all()] == [second]
+    assert reconcile_vote_counts(session) == 0
+
+def test_write_behind_drops_votes_on_deleted_posts(authorized_client, test_posts, session, write_behind):
+    post_id = test_posts[0].id
+    assert authorized_client.post("/vote", json={"post_id": post_id, "dir": 1}).status_code == 202
+    assert authorized_client.delete(f"/posts/{post_id}").status_code == 204
+
+    assert write_behind.flush() == 1
+    assert session.exec(select(models.Vote)).all() == []
+    votes_removed = reaper.ROWS.value(table="votes")
+    assert reaper.reap(session) == 1
+    assert reaper.ROWS.value(table="votes") == votes_removed
+
+def test_write_behind_drops_votes_of_deleted_users(authorized_client, test_user2, test_posts, session, write_behind):
+    headers2 = {"Authorization": f"Bearer {create_access_token(data={'user_id': test_user2['id']})}"}
+    first, second = test_posts[0].id, test_posts[1].id
+    authorized_client.post("/vote", json={"post_id": first, "dir": 1})
+    authorized_client.post("/vote", json={"post_id": second, "dir": 1}, headers=headers2)
+    assert authorized_client.delete("/users/me").status_code == 204
+    assert len(write_behind) == 1
+
+    # Another worker's buffer still holds a vote from an account deleted here.
+    write_behind.submit(test_user2["id"], first, 1, False)
+    assert authorized_client.delete("/users/me", headers=headers2).status_code == 204
+    reaper.reap(session)
+    reaper.reap(session)
+
+    write_behind.flush()
+    assert len(write_behind) == 0
+    assert session.exec(select(models.Vote)).all() == []
+
+def test_write_behind_drops_rejected_votes(authorized_client, test_user2, test_posts, session, write_behind, monkeypatch):
+    bad = (test_user2["id"], test_posts[0].id)
+    write = write_behind._write
+    def rejecting(batch):
+        if bad in batch:
+            raise IntegrityError("INSERT INTO votes", {}, Exception("FOREIGN KEY constraint failed"))
+        return write(batch)
+    monkeypatch.setattr(write_behind, "_write", rejecting)
+
+    for post in test_posts:
+        authorized_client.post("/vote", json={"post_id": post.id, "dir": 1})
+    write_behind.submit(*bad, 1, False)
+    dropped = DROPPED.value()
+
+    assert write_behind.flush() == len(test_posts) + 1
+    assert len(write_behind) == 0
+    assert DROPPED.value() == dropped + 1
+    assert len(session.exec(select(models.Vote)).all()) == len(test_posts)
+    assert reconcile_vote_counts(session) == 0